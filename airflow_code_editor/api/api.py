@@ -15,74 +15,129 @@
 #   limitations under the License
 #
 
+import base64
+import codecs
+import json
 import logging
 import mimetypes
-
-from pygments import highlight
-from pygments.formatters import HtmlFormatter
-from pygments.lexers import get_lexer_for_filename
+import re
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple, Union
 
 from airflow_code_editor import git
+from airflow_code_editor.async_fs import get_async_root_fs
 from airflow_code_editor.commons import (
     HTTP_200_OK,
+    HTTP_202_ACCEPTED,
+    HTTP_304_NOT_MODIFIED,
     HTTP_400_BAD_REQUEST,
     HTTP_401_UNAUTHORIZED,
     HTTP_404_NOT_FOUND,
     HTTP_500_SERVER_ERROR,
     VERSION,
 )
-from airflow_code_editor.fs import RootFS
+from airflow_code_editor.fs import get_root_fs
+from airflow_code_editor.matcher import SEARCH_MODE_REGEX, get_matcher
 from airflow_code_editor.presigned import create_presigned, decode_presigned
+from airflow_code_editor.search_index import get_search_indexes, search_index_enabled
 from airflow_code_editor.tree import get_stat, get_tree
 from airflow_code_editor.utils import (
-    DummyLexer,
+    TextNormalizer,
     airflow_version,
     error_message,
     generate_csrf,
     get_plugin_boolean_config,
+    get_plugin_config,
     get_plugin_int_config,
+    highlight_context,
     make_response,
+    make_stream_response,
     normalize_path,
+    normalize_text_chunks,
     prepare_api_response,
+    read_mount_points_config,
 )
 
 __all__ = [
     "save",
+    "save_stream",
     "load",
     "delete",
     "format",
     "tree",
     "search",
+    "search_index",
     "ping",
     "get_version",
     "generate_presigned",
     "load_presigned",
 ]
 
+STREAM_MIMETYPES = {
+    "ndjson": "application/x-ndjson",  # newline-delimited JSON
+    "sse": "text/event-stream",  # server-sent events
+}
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"  # Cache-Control of the git objects addressed by hash
+
+
+def save_error(path: str, ex: Exception):
+    "Prepare the response for a failed save"
+    logging.error(ex)
+    return prepare_api_response(
+        path=normalize_path(path),
+        http_status_code=HTTP_400_BAD_REQUEST,
+        error_message="Error saving {path}: {message}".format(path=path, message=error_message(ex)),
+    )
 
-def save(path: str, data: bytes, mime_type: str):
-    "Save a file (invoked by the HTTP POST method)"
+
+def save(path: str, data: Union[bytes, Iterable[bytes]], mime_type: str):
+    """
+    Save a file (invoked by the HTTP POST method).
+    data is the file content or an iterable of chunks (the file is written while reading the chunks)
+    """
     try:
-        root_fs = RootFS()
-        is_text = mime_type.startswith("text/")
-        if is_text:
-            text = data.decode("utf-8", errors="ignore")
+        root_fs = get_root_fs()
+        chunks = [data] if isinstance(data, bytes) else data
+        if mime_type.startswith("text/"):
             # Newline fix (remove cr)
-            text = text.replace("\r", "").rstrip() + "\n"
-            root_fs.path(path).write_text(text)
-        else:
-            root_fs.path(path).write_bytes(data)
+            chunks = normalize_text_chunks(chunks)
+        root_fs.path(path).write_stream(chunks)
         return prepare_api_response(path=normalize_path(path))
     except Exception as ex:
-        logging.error(ex)
-        return prepare_api_response(
-            path=normalize_path(path),
-            http_status_code=HTTP_400_BAD_REQUEST,
-            error_message="Error saving {path}: {message}".format(path=path, message=error_message(ex)),
-        )
+        return save_error(path, ex)
+
+
+async def normalize_text_stream(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    "Normalize a text split in chunks (see TextNormalizer)"
+    normalizer = TextNormalizer()
+    async for chunk in chunks:
+        data = normalizer.feed(chunk)
+        if data:
+            yield data
+    yield normalizer.end()
 
 
-def git_repo_get(path):
+async def save_stream(path: str, chunks: AsyncIterable[bytes], mime_type: str):
+    "Save a file from an async stream of chunks, without blocking the event loop (invoked by the HTTP POST method)"
+    try:
+        root_fs = get_async_root_fs()
+        if mime_type.startswith("text/"):
+            # Newline fix (remove cr)
+            chunks = normalize_text_stream(chunks)
+        await root_fs.path(path).write_stream(chunks)
+        return prepare_api_response(path=normalize_path(path))
+    except Exception as ex:
+        return save_error(path, ex)
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    "Check if an ETag matches the If-None-Match request header"
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def git_repo_get(path, if_none_match: Optional[str] = None):
     "Get a file from GIT (invoked by the HTTP GET method)"
     try:
         # Download git blob - path = '<hash>/<name>'
@@ -90,7 +145,17 @@ def git_repo_get(path):
     except Exception:
         # No attachment filename
         attachment_filename = None
+    # The objects addressed by hash never change, the browser can cache them forever
+    etag = f'"{path}"' if git.is_object_id(path) else None
+    if etag is not None and etag_matches(etag, if_none_match):
+        response = make_response("", HTTP_304_NOT_MODIFIED, None)
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
     response = execute_git_command(["cat-file", "-p", path])
+    if etag is not None and response.status_code == HTTP_200_OK:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
     if attachment_filename:
         content_disposition = 'attachment; filename="{0}"'.format(attachment_filename)
         response.headers["Content-Disposition"] = content_disposition
@@ -103,22 +168,76 @@ def git_repo_get(path):
     return response
 
 
-def execute_git_command(git_args):
+def get_output_limit(config_limit: int, limit: Optional[int]) -> int:
+    "Combine the configured limit and the requested limit (0 for unlimited)"
+    if not limit or limit < 0:
+        return config_limit
+    return min(config_limit, limit) if config_limit else limit
+
+
+def stream_git_output(output, stream):
+    "Send the output of a git command as newline-delimited JSON or server-sent events"
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    chunks = iter(output)
+    try:
+        for chunk in chunks:
+            text = decoder.decode(chunk)
+            if text:
+                data = json.dumps({"data": text})
+                yield f"data: {data}\n\n" if stream == "sse" else data + "\n"
+        text = decoder.decode(b"", final=True)
+        if text:
+            data = json.dumps({"data": text})
+            yield f"data: {data}\n\n" if stream == "sse" else data + "\n"
+        end = {"end": True, "returncode": output.returncode, "truncated": output.truncated}
+        stderr = output.stderr.decode("utf-8", errors="replace") if isinstance(output.stderr, bytes) else output.stderr
+        if stderr:
+            end["error"] = {"message": stderr}
+        data = json.dumps(end)
+        yield f"event: end\ndata: {data}\n\n" if stream == "sse" else data + "\n"
+    except Exception as ex:
+        logging.error(ex)
+        data = json.dumps({"error": {"message": "Error: {message}".format(message=error_message(ex))}})
+        yield f"event: error\ndata: {data}\n\n" if stream == "sse" else data + "\n"
+    finally:
+        # Terminate the git command when the client disconnects
+        chunks.close()
+
+
+def execute_git_command(
+    git_args, stream: Optional[str] = None, max_bytes: Optional[int] = None, max_lines: Optional[int] = None
+):
     "Execute a GIT command (invoked by the HTTP POST method)"
+    if stream:
+        # Stream the output while the command runs
+        if stream not in STREAM_MIMETYPES:
+            return prepare_api_response(
+                error_message=f"Invalid stream {stream}",
+                http_status_code=HTTP_400_BAD_REQUEST,
+            )
+        try:
+            output = git.GitOutputStream(
+                git_args,
+                max_bytes=get_output_limit(get_plugin_int_config("git_stream_max_bytes"), max_bytes),
+                max_lines=get_output_limit(get_plugin_int_config("git_stream_max_lines"), max_lines),
+            )
+        except ValueError as ex:
+            return prepare_api_response(error_message=str(ex), http_status_code=HTTP_400_BAD_REQUEST)
+        return make_stream_response(stream_git_output(output, stream), STREAM_MIMETYPES[stream])
     return git.execute_git_command(git_args).prepare_git_response()
 
 
-def load(path):
+def load(path, if_none_match: Optional[str] = None):
     "Send the contents of a file to the client"
     try:
         path = normalize_path(path)
         if path.startswith("~git/"):
             # Download git blob - path = '~git/<hash>/<name>'
             _, path = path.split("/", 1)
-            return git_repo_get(path)
+            return git_repo_get(path, if_none_match)
         else:
             # Download file
-            root_fs = RootFS()
+            root_fs = get_root_fs()
             return root_fs.path(path).send_file(as_attachment=True)
     except Exception as ex:
         logging.error(ex)
@@ -142,7 +261,7 @@ def delete(path):
         )
     try:
         # Delete the file
-        root_fs = RootFS()
+        root_fs = get_root_fs()
         root_fs.path(path).delete()
         return prepare_api_response(message="File deleted")
     except FileNotFoundError:
@@ -216,33 +335,223 @@ def tree(path, args={}, method="GET"):
         )
 
 
+def prepare_search_match(match, context_, highlight_=True):
+    "Prepare a search result item, highlighting the context"
+    if not context_:
+        return {"row_number": match["row_number"], "path": match["path"]}
+    if not highlight_:  # raw context, highlighted by the client (lazy highlighting)
+        return {
+            "row_number": match["row_number"],
+            "context": match["context"],
+            "context_first_row": match["context_first_row"],
+            "path": match["path"],
+        }
+    context = highlight_context(match["path"], match["context"], match["context_first_row"], match["row_number"])
+    return {"row_number": match["row_number"], "context": context, "path": match["path"]}
+
+
+def encode_search_cursor(path: str, skip: int) -> str:
+    "Encode the position of a search (file path, number of matches to be skipped in the file)"
+    return base64.urlsafe_b64encode(f"{skip}:{path}".encode("utf-8")).decode("ascii")
+
+
+def decode_search_cursor(cursor: Optional[str]) -> Tuple[Optional[str], int]:
+    "Decode a search cursor, return a tuple (file path, number of matches to be skipped in the file)"
+    if not cursor:
+        return None, 0
+    try:
+        skip, path = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split(":", 1)
+        if not path.startswith("/"):
+            raise ValueError()
+        return path, int(skip)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def get_int_arg(args, key: str, default: int = 0) -> int:
+    "Get a non negative integer argument"
+    value = args.get(key)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {key}")
+    if value < 0:
+        raise ValueError(f"Invalid {key}")
+    return value
+
+
+def get_list_arg(args, key: str) -> Optional[List[str]]:
+    "Get a comma-separated list argument"
+    value = args.get(key)
+    if not value:
+        return None
+    return [x.strip() for x in value.split(",") if x.strip()] or None
+
+
+class SearchResults:
+    "A page of search results - truncated and cursor are set after the iteration"
+
+    def __init__(self, matches, max_results: int = 0, offset: int = 0, cursor: Tuple[Optional[str], int] = (None, 0)):
+        self.matches = matches  # iter_search generator
+        self.max_results = max_results  # max number of results (0 = unlimited)
+        self.offset = offset  # number of results to be skipped
+        self.start_path, self.skip = cursor  # search start position
+        self.truncated = False  # True if there are more results
+        self.cursor: Optional[str] = None  # next page cursor
+
+    def __iter__(self):
+        offset = self.offset
+        count = 0
+        file_path = None
+        file_match = 0  # number of the match in the current file
+        try:
+            for match in self.matches:
+                if match["path"] != file_path:
+                    file_path = match["path"]
+                    file_match = 0
+                file_match += 1
+                if file_path == self.start_path and file_match <= self.skip:
+                    continue
+                if offset > 0:
+                    offset -= 1
+                    continue
+                if self.max_results and count >= self.max_results:
+                    # Stop searching when the limit is reached
+                    self.truncated = True
+                    self.cursor = encode_search_cursor(file_path, file_match - 1)
+                    break
+                count += 1
+                yield match
+        finally:
+            self.matches.close()
+
+
+def stream_search(results, context_, stream, highlight_=True):
+    "Send the search results as newline-delimited JSON or server-sent events"
+    try:
+        for match in results:
+            data = json.dumps(prepare_search_match(match, context_, highlight_))
+            yield f"data: {data}\n\n" if stream == "sse" else data + "\n"
+        data = json.dumps({"end": True, "truncated": results.truncated, "cursor": results.cursor})
+        yield f"event: end\ndata: {data}\n\n" if stream == "sse" else data + "\n"
+    except Exception as ex:
+        logging.error(ex)
+        data = json.dumps({"error": {"message": "Error: {message}".format(message=error_message(ex))}})
+        yield f"event: error\ndata: {data}\n\n" if stream == "sse" else data + "\n"
+    finally:
+        # Stop searching when the client disconnects
+        results.matches.close()
+
+
 def search(args={}):
     "File search"
     query = args.get("query")
-    root_fs = RootFS()
-    result = []
     context_ = args.get('context') == 'true'  # include context in results
-    for match in root_fs.search(query=query):
-        if context_:
-            formatter = HtmlFormatter(
-                linenos=True,
-                cssclass="source",
-                nobackground=True,
-                linenostart=match["context_first_row"],
-                hl_lines=[match["row_number"] - match["context_first_row"] + 1],
-            )
-            try:
-                lexer = get_lexer_for_filename(match["path"])
-            except Exception:
-                lexer = DummyLexer()
-            try:
-                context = highlight(match["context"], lexer, formatter)
-            except Exception:
-                context = match["context"]
-            result.append({"row_number": match["row_number"], "context": context, "path": match["path"]})
+    highlight_ = args.get('highlight') != 'lazy'  # lazy: return the raw context, without highlighting
+    stream = args.get("stream")  # stream format (ndjson/sse)
+    try:
+        max_results = get_int_arg(args, "max_results", get_plugin_int_config("search_max_results"))
+        max_matches_per_file = get_int_arg(
+            args, "max_matches_per_file", get_plugin_int_config("search_max_matches_per_file")
+        )
+        offset = get_int_arg(args, "offset")
+        cursor = decode_search_cursor(args.get("cursor"))
+        max_depth = get_int_arg(args, "max_depth") if args.get("max_depth") else None
+        if not query:
+            raise ValueError("Missing query")
+        mode = args.get("mode") or SEARCH_MODE_REGEX  # regex/literal
+        ignore_case = args.get("ignore_case") == "true"
+        whole_word = args.get("whole_word") == "true"
+        get_matcher(query, mode=mode, ignore_case=ignore_case, whole_word=whole_word)  # check the pattern
+    except (ValueError, re.error) as ex:
+        return prepare_api_response(
+            value=[],
+            http_status_code=HTTP_400_BAD_REQUEST,
+            error_message=str(ex),
+        )
+    path = "/" + normalize_path(args.get("path"))  # search only in the given directory
+    include = get_list_arg(args, "include")  # include only the files matching the patterns
+    exclude = get_plugin_config("ignored_entries").split(",") + (get_list_arg(args, "exclude") or [])
+    root_fs = get_root_fs()
+    matches = root_fs.iter_search(
+        query=query,
+        path=path,
+        filter=include,
+        exclude=exclude,
+        max_depth=max_depth,
+        max_matches_per_file=max_matches_per_file,
+        start_at=cursor[0],
+        mode=mode,
+        ignore_case=ignore_case,
+        whole_word=whole_word,
+    )
+    results = SearchResults(matches, max_results=max_results, offset=offset, cursor=cursor)
+    if stream in STREAM_MIMETYPES:
+        return make_stream_response(
+            stream_search(results, context_, stream, highlight_),
+            mimetype=STREAM_MIMETYPES[stream],
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    value = [prepare_search_match(match, context_, highlight_) for match in results]
+    return prepare_api_response(value=value, truncated=results.truncated, cursor=results.cursor)
+
+
+def search_highlight(items):
+    "Highlight a batch of search contexts (returned by a search with highlight=lazy)"
+    try:
+        value = [
+            highlight_context(item["path"], item["context"], int(item["context_first_row"]), int(item["row_number"]))
+            for item in items
+        ]
+    except (KeyError, TypeError, ValueError) as ex:
+        return prepare_api_response(
+            value=[],
+            http_status_code=HTTP_400_BAD_REQUEST,
+            error_message=f"Invalid item: {ex}",
+        )
+    return prepare_api_response(value=value)
+
+
+def search_index(args={}, method="GET"):
+    "Get the search index status (GET) or start rebuilding the search index in background (POST)"
+    if not search_index_enabled():
+        return prepare_api_response(
+            value=[],
+            http_status_code=HTTP_400_BAD_REQUEST,
+            error_message="Search index is disabled",
+        )
+    try:
+        root_fs = get_root_fs()
+        mount = args.get("mount")  # mount point name (default: all the mount points)
+        if mount:
+            mount_points = read_mount_points_config()
+            if mount not in mount_points:
+                return prepare_api_response(
+                    value=[],
+                    http_status_code=HTTP_404_NOT_FOUND,
+                    error_message="Mount point not found",
+                )
+            mounts = ["/" if mount_points[mount].default else "/~" + mount]
+        else:
+            mounts = None
+        indexes = get_search_indexes(root_fs, mounts)
+        if method == "POST":
+            for index in indexes:
+                index.start_rebuild(root_fs)
+            value = [index.status() for index in indexes]
+            return prepare_api_response(value=value, http_status_code=HTTP_202_ACCEPTED)
         else:
-            result.append({"row_number": match["row_number"], "path": match["path"]})
-    return prepare_api_response(value=result)
+            value = [index.status() for index in indexes]
+            return prepare_api_response(value=value)
+    except Exception as ex:
+        logging.error(ex)
+        return prepare_api_response(
+            value=[],
+            http_status_code=HTTP_500_SERVER_ERROR,
+            error_message="Error: {message}".format(message=error_message(ex)),
+        )
 
 
 def ping():
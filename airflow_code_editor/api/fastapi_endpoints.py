@@ -16,6 +16,7 @@
 #
 
 from fastapi import Depends, FastAPI, Request, status
+from fastapi.concurrency import run_in_threadpool
 
 from airflow_code_editor.api import api
 from airflow_code_editor.fastapi_security import (
@@ -36,7 +37,13 @@ app = FastAPI()
 async def repo_base(request: Request):
     body = await request.json()
     git_args = body.get("args", [])
-    return api.execute_git_command(git_args)
+    return await run_in_threadpool(
+        api.execute_git_command,
+        git_args,
+        stream=body.get("stream"),
+        max_bytes=body.get("max_bytes"),
+        max_lines=body.get("max_lines"),
+    )
 
 
 @app.post(
@@ -47,8 +54,7 @@ async def repo_base(request: Request):
 async def save(path: str, request: Request):
     "Save a file"
     mime_type = request.headers.get("content-type", "text/plain")
-    data = await request.body()
-    return api.save(path=path, data=data, mime_type=mime_type)
+    return await api.save_stream(path=path, chunks=request.stream(), mime_type=mime_type)
 
 
 @app.get(
@@ -58,7 +64,7 @@ async def save(path: str, request: Request):
 )
 def load(path: str, request: Request):
     "Send the contents of a file to the client"
-    return api.load(path)
+    return api.load(path, if_none_match=request.headers.get("if-none-match"))
 
 
 @app.delete(
@@ -101,7 +107,7 @@ def presigned(token: str, request: Request):
 async def format(request: Request):
     "Sort imports and format code"
     data = (await request.body()).decode("utf-8")
-    return api.format(data)
+    return await run_in_threadpool(api.format, data)
 
 
 @app.get(
@@ -144,6 +150,32 @@ def search(request: Request):
     return api.search(args=request.query_params)
 
 
+@app.get(
+    "/search/index",
+    dependencies=[Depends(requires_access_dag(method="GET"))],
+    include_in_schema=False,
+)
+@app.post(
+    "/search/index",
+    dependencies=[Depends(requires_access_dag(method="PUT"))],
+    include_in_schema=False,
+)
+def search_index(request: Request):
+    "Get the search index status/rebuild the search index"
+    return api.search_index(args=request.query_params, method=request.method)
+
+
+@app.post(
+    "/search/highlight",
+    dependencies=[Depends(requires_access_dag(method="GET"))],
+    include_in_schema=False,
+)
+async def search_highlight(request: Request):
+    "Highlight search contexts"
+    body = await request.json()
+    return await run_in_threadpool(api.search_highlight, body.get("items", []))
+
+
 @app.get(
     "/ping",
     dependencies=[Depends(requires_access_dag(method="GET"))],
@@ -179,7 +211,7 @@ def get_version():
 )
 def api_get_files(path: str, request: Request):
     "Get file content"
-    return api.load(path)
+    return api.load(path, if_none_match=request.headers.get("if-none-match"))
 
 
 @app.post(
@@ -194,8 +226,7 @@ def api_get_files(path: str, request: Request):
 async def api_post_files(path: str, request: Request):
     "Write file content"
     mime_type = request.headers.get("content-type", "text/plain")
-    data = await request.body()
-    return api.save(path=path, data=data, mime_type=mime_type)
+    return await api.save_stream(path=path, chunks=request.stream(), mime_type=mime_type)
 
 
 @app.delete(
@@ -240,6 +271,34 @@ def api_get_search(request: Request):
     return api.search(args=request.query_params)
 
 
+@app.get(
+    "/api/search/index",
+    dependencies=[Depends(requires_access_dag(method="GET"))],
+)
+def api_get_search_index(request: Request):
+    "Get the search index status"
+    return api.search_index(args=request.query_params, method="GET")
+
+
+@app.post(
+    "/api/search/index",
+    dependencies=[Depends(requires_access_dag(method="PUT"))],
+)
+def api_post_search_index(request: Request):
+    "Rebuild the search index"
+    return api.search_index(args=request.query_params, method="POST")
+
+
+@app.post(
+    "/api/search/highlight",
+    dependencies=[Depends(requires_access_dag(method="GET"))],
+)
+async def api_post_search_highlight(request: Request):
+    "Highlight search contexts"
+    body = await request.json()
+    return await run_in_threadpool(api.search_highlight, body.get("items", []))
+
+
 @app.post(
     "/api/git",
     dependencies=[Depends(requires_access_dag(method="GET"))],
@@ -248,7 +307,13 @@ async def api_post_git(request: Request):
     "Execute a GIT command"
     body = await request.json()
     git_args = body.get("args", [])
-    return api.execute_git_command(git_args)
+    return await run_in_threadpool(
+        api.execute_git_command,
+        git_args,
+        stream=body.get("stream"),
+        max_bytes=body.get("max_bytes"),
+        max_lines=body.get("max_lines"),
+    )
 
 
 @app.get(
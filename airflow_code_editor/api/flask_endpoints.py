@@ -33,6 +33,9 @@ __all__ = [
     "post_files",
     "delete_files",
     "search",
+    "get_search_index",
+    "post_search_index",
+    "post_search_highlight",
     "post_git",
     "get_version",
     "generate_presigned",
@@ -60,7 +63,7 @@ def get_tree_root():
 @csrf.exempt
 def get_files(*, path: str = None):
     "Get file content"
-    return api.load(path)
+    return api.load(path, if_none_match=request.headers.get("If-None-Match"))
 
 
 @security.requires_access_dag("PUT")
@@ -68,6 +71,7 @@ def get_files(*, path: str = None):
 def post_files(*, path: str = None):
     "Write file content"
     mime_type = request.headers.get("Content-Type", "text/plain")
+    # The body has already been read by connexion, request.stream is empty
     data = request.get_data()
     return api.save(path=path, data=data, mime_type=mime_type)
 
@@ -86,12 +90,39 @@ def search(*, query: str):
     return api.search(args=request.args)
 
 
+@security.requires_access_dag("GET")
+@csrf.exempt
+def get_search_index(*, mount: str = None):
+    "Get the search index status"
+    return api.search_index(args=request.args, method="GET")
+
+
+@security.requires_access_dag("PUT")
+@csrf.exempt
+def post_search_index(*, mount: str = None):
+    "Rebuild the search index"
+    return api.search_index(args=request.args, method="POST")
+
+
+@security.requires_access_dag("GET")
+@csrf.exempt
+def post_search_highlight():
+    "Highlight search contexts"
+    items = request.json.get("items", [])
+    return api.search_highlight(items)
+
+
 @security.requires_access_dag("PUT")
 @csrf.exempt
 def post_git():
     "Execute a GIT command"
     git_args = request.json.get("args", [])
-    return api.execute_git_command(git_args)
+    return api.execute_git_command(
+        git_args,
+        stream=request.json.get("stream"),
+        max_bytes=request.json.get("max_bytes"),
+        max_lines=request.json.get("max_lines"),
+    )
 
 
 @security.requires_access_dag("GET")
@@ -33,7 +33,7 @@ from airflow_code_editor.commons import (
     STATIC,
     VERSION,
 )
-from airflow_code_editor.utils import is_enabled
+from airflow_code_editor.utils import is_enabled, read_chunks
 
 __all__ = [
     "appbuilder_view",
@@ -74,19 +74,23 @@ class AppBuilderCodeEditorView(BaseView):
     @auth.has_access(PERMISSIONS)
     def repo_base(self):
         git_args = request.json.get("args", [])
-        return api.execute_git_command(git_args)
+        return api.execute_git_command(
+            git_args,
+            stream=request.json.get("stream"),
+            max_bytes=request.json.get("max_bytes"),
+            max_lines=request.json.get("max_lines"),
+        )
 
     @expose("/files/<path:path>", methods=["POST"])
     @auth.has_access(PERMISSIONS)
     def save(self, path=None):
         mime_type = request.headers.get("Content-Type", "text/plain")
-        data = request.get_data()
-        return api.save(path=path, data=data, mime_type=mime_type)
+        return api.save(path=path, data=read_chunks(request.stream), mime_type=mime_type)
 
     @expose("/files/<path:path>", methods=["GET"])
     @auth.has_access(PERMISSIONS)
     def load(self, path=None):
-        return api.load(path)
+        return api.load(path, if_none_match=request.headers.get("If-None-Match"))
 
     @expose("/files/<path:path>", methods=["DELETE"])
     @auth.has_access(PERMISSIONS)
@@ -114,6 +118,16 @@ class AppBuilderCodeEditorView(BaseView):
     def search(self):
         return api.search(args=request.args)
 
+    @expose("/search/index", methods=["GET", "POST"])
+    @auth.has_access(PERMISSIONS)
+    def search_index(self):
+        return api.search_index(args=request.args, method=request.method)
+
+    @expose("/search/highlight", methods=["POST"])
+    @auth.has_access(PERMISSIONS)
+    def search_highlight(self):
+        return api.search_highlight(request.json.get("items", []))
+
     @expose("/version", methods=["GET"])
     @auth.has_access(PERMISSIONS)
     def get_version(self):
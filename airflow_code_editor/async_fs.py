@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+#
+#   Copyright 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License
+
+import asyncio
+import functools
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, TypeVar
+
+import fsspec
+import fsspec.asyn
+
+from airflow_code_editor.commons import FS_EVENT_MKDIR, FS_EVENT_REMOVE, FS_EVENT_WRITE
+from airflow_code_editor.fs import (
+    UPLOAD_TEMP_PREFIX,
+    RootFS,
+    copy_to_local_file,
+    get_root_fs,
+    is_local,
+    split,
+)
+from airflow_code_editor.utils import get_plugin_int_config
+
+__all__ = [
+    "AsyncRootFS",
+    "AsyncFSPath",
+    "get_async_root_fs",
+    "run_in_executor",
+]
+
+R = TypeVar("R")
+
+WRITE_BLOCK_SIZE = 1024 * 1024  # size of the blocks written by write_stream
+
+# Thread pool running the blocking filesystem operations
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    "Get the thread pool running the blocking filesystem operations"
+    global _executor, _executor_workers
+    workers = max(1, get_plugin_int_config("async_fs_workers"))
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="code_editor_fs")
+            _executor_workers = workers
+        return _executor
+
+
+async def run_in_executor(func: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    "Run a blocking function in the filesystem thread pool"
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def is_async(fs: fsspec.AbstractFileSystem) -> bool:
+    "Check if a filesystem has an asyncio implementation (e.g. s3, gcs, http)"
+    return isinstance(fs, fsspec.asyn.AsyncFileSystem)
+
+
+async def run_async(fs: fsspec.asyn.AsyncFileSystem, method: str, *args: Any, **kwargs: Any) -> Any:
+    "Run a coroutine of an fsspec async filesystem on the filesystem event loop"
+    coro = getattr(fs, method)(*args, **kwargs)
+    if fs.asynchronous:  # filesystem bound to the running loop
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, fs.loop))
+
+
+class AsyncRootFS:
+    """
+    Asyncio interface to a RootFS.
+    The operations on fsspec async filesystems are awaited without blocking a thread,
+    the other operations run in a bounded thread pool.
+    """
+
+    def __init__(self, root_fs: RootFS) -> None:
+        self.root_fs = root_fs
+
+    def path(self, *parts: str) -> "AsyncFSPath":
+        "Return an AsyncFSPath instance for the given path"
+        return AsyncFSPath(*parts, root_fs=self)
+
+    async def notify(self, event: str, path: str, target: Optional[str] = None) -> None:
+        "Notify the listeners (the listeners are executed in the thread pool)"
+        await run_in_executor(self.root_fs.notify, event, path, target)
+
+    async def exists(self, path: str) -> bool:
+        "Check if path exists"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            try:
+                return await run_async(fs, "_exists", fs_path)
+            except Exception:
+                return False
+        return await run_in_executor(self.root_fs.exists, path)
+
+    async def isdir(self, path: str) -> bool:
+        "Check if path is a directory"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            try:
+                return await run_async(fs, "_isdir", fs_path)
+            except Exception:
+                return False
+        return await run_in_executor(self.root_fs.isdir, path)
+
+    async def isfile(self, path: str) -> bool:
+        "Check if path is a file"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            try:
+                return await run_async(fs, "_isfile", fs_path)
+            except Exception:
+                return False
+        return await run_in_executor(self.root_fs.isfile, path)
+
+    async def info(self, path: str) -> Dict[str, Any]:
+        "Get file info"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            return await run_async(fs, "_info", fs_path)
+        return await run_in_executor(self.root_fs.info, path)
+
+    async def listdir(self, path: str = "/") -> List[str]:
+        "List directory contents"
+        return await run_in_executor(self.root_fs.listdir, path)
+
+    async def read_bytes(self, path: str) -> bytes:
+        "Read bytes from a file"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            return await run_async(fs, "_cat_file", fs_path)
+        return await run_in_executor(self.root_fs.read_bytes, path)
+
+    async def read_text(self, path: str, encoding=None, errors=None) -> str:
+        "Read text from a file"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            data = await run_async(fs, "_cat_file", fs_path)
+            return data.decode(encoding or "utf-8", errors or "strict")
+        return await run_in_executor(self.root_fs.read_text, path, encoding=encoding, errors=errors)
+
+    async def write_bytes(self, path: str, data: bytes) -> None:
+        "Write bytes to a file"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            # Ensure parent directory exists
+            parent_path = os.path.dirname(path)
+            if parent_path and parent_path != '/':
+                await run_async(fs, "_makedirs", os.path.dirname(fs_path), exist_ok=True)
+                await self.notify(FS_EVENT_MKDIR, parent_path)
+            await run_async(fs, "_pipe_file", fs_path, data)
+            await self.notify(FS_EVENT_WRITE, path)
+        else:
+            await run_in_executor(self.root_fs.write_bytes, path, data)
+
+    async def write_stream(self, path: str, chunks: AsyncIterable[bytes]) -> None:
+        """
+        Write a file from an async iterable of chunks (e.g. the request body), without loading
+        the whole file in memory. The chunks are written to a local temporary file first, the file is changed
+        only when all the chunks are received (local files are overwritten, remote files are uploaded).
+        """
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        # Ensure parent directory exists
+        parent_path = os.path.dirname(path)
+        if parent_path and parent_path != '/':
+            await run_in_executor(self.root_fs.makedirs, parent_path, exist_ok=True)
+        f = await run_in_executor(tempfile.NamedTemporaryFile, prefix=UPLOAD_TEMP_PREFIX)
+        try:
+            # The chunks are collected and written in blocks, limiting the number of calls to the thread pool
+            block: List[bytes] = []
+            block_size = 0
+            async for chunk in chunks:
+                block.append(chunk)
+                block_size += len(chunk)
+                if block_size >= WRITE_BLOCK_SIZE:
+                    await run_in_executor(f.writelines, block)
+                    block = []
+                    block_size = 0
+            await run_in_executor(f.writelines, block)
+            await run_in_executor(f.flush)
+            if is_local(fs):
+                await run_in_executor(copy_to_local_file, f, fs_path)
+            elif is_async(fs):
+                await run_async(fs, "_put_file", f.name, fs_path)
+            else:
+                await run_in_executor(fs.put_file, f.name, fs_path)
+        finally:
+            await run_in_executor(f.close)
+        await self.notify(FS_EVENT_WRITE, path)
+
+    async def write_text(self, path: str, data: str, encoding=None, errors=None) -> None:
+        "Write text to a file"
+        fs, _ = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            await self.write_bytes(path, data.encode(encoding or "utf-8", errors or "strict"))
+        else:
+            await run_in_executor(self.root_fs.write_text, path, data, encoding=encoding, errors=errors)
+
+    async def remove(self, path: str) -> None:
+        "Remove a file"
+        fs, fs_path = self.root_fs._get_fs_and_path(path)
+        if is_async(fs):
+            await run_async(fs, "_rm_file", fs_path)
+            await self.notify(FS_EVENT_REMOVE, path)
+        else:
+            await run_in_executor(self.root_fs.remove, path)
+
+
+class AsyncFSPath:
+    "Asyncio counterpart of FSPath"
+
+    def __init__(self, *parts: str, root_fs: AsyncRootFS) -> None:
+        self.root_fs = root_fs
+        if parts:
+            self.path = os.path.join("/", *parts)
+        else:
+            self.path = "/"
+
+    @property
+    def name(self) -> str:
+        "The final path component"
+        return split(self.path)[1]
+
+    async def exists(self) -> bool:
+        "Check if this path exists"
+        return await self.root_fs.exists(self.path)
+
+    async def is_dir(self) -> bool:
+        "Check if this path is a directory"
+        return await self.root_fs.isdir(self.path)
+
+    async def is_file(self) -> bool:
+        "Check if this path is a file"
+        return await self.root_fs.isfile(self.path)
+
+    async def info(self) -> Dict[str, Any]:
+        "Get file info"
+        return await self.root_fs.info(self.path)
+
+    async def read_bytes(self) -> bytes:
+        "Get the contents of a file as bytes"
+        return await self.root_fs.read_bytes(self.path)
+
+    async def read_text(self, encoding=None, errors=None) -> str:
+        "Get the contents of a file as a string"
+        return await self.root_fs.read_text(self.path, encoding=encoding, errors=errors)
+
+    async def write_bytes(self, data: bytes) -> None:
+        "Write bytes to a file"
+        await self.root_fs.write_bytes(self.path, data)
+
+    async def write_text(self, data: str) -> None:
+        "Write text to a file"
+        await self.root_fs.write_text(self.path, data)
+
+    async def write_stream(self, chunks: AsyncIterable[bytes]) -> None:
+        "Write a file from an async iterable of chunks"
+        await self.root_fs.write_stream(self.path, chunks)
+
+    async def unlink(self, missing_ok: bool = False) -> None:
+        "Remove this file"
+        try:
+            await self.root_fs.remove(self.path)
+        except FileNotFoundError as ex:
+            if not missing_ok:
+                raise ex
+
+    def __truediv__(self, key) -> "AsyncFSPath":
+        return AsyncFSPath(self.path, key, root_fs=self.root_fs)
+
+    def __str__(self) -> str:
+        return self.path
+
+    def __repr__(self) -> str:
+        return f"AsyncFSPath({self.path!r})"
+
+
+def get_async_root_fs() -> AsyncRootFS:
+    "Get the asyncio interface to the shared RootFS"
+    return AsyncRootFS(get_root_fs())
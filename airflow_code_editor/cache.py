@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+#
+#   Copyright 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+__all__ = [
+    "LRUCache",
+]
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    "Thread-safe LRU cache, limited by the total (estimated) size of the values"
+
+    def __init__(self, max_size: int, sizeof: Callable[[V], int]) -> None:
+        self.max_size = max_size  # maximum total size of the values
+        self.sizeof = sizeof  # function estimating the size of a value
+        self.size = 0  # current total size
+        self.hits = 0
+        self.misses = 0
+        self._items: "OrderedDict[Hashable, Tuple[V, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Optional[V] = None) -> Optional[V]:
+        "Get a value from the cache, marking it as recently used"
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key: Hashable, value: V) -> None:
+        "Add a value to the cache, evicting the least recently used values if the cache is full"
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._items[key] = (value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, evicted_size) = self._items.popitem(last=False)
+                self.size -= evicted_size
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        "Remove a value from the cache, returning it"
+        with self._lock:
+            item = self._items.pop(key, None)
+            if item is None:
+                return None
+            self.size -= item[1]
+            return item[0]
+
+    def keys(self) -> List[Hashable]:
+        "Return the keys of the cached values"
+        with self._lock:
+            return list(self._items)
+
+    def clear(self) -> None:
+        "Remove all the values from the cache and reset the statistics"
+        with self._lock:
+            self._items.clear()
+            self.size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._items
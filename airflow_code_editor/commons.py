@@ -30,13 +30,22 @@ __all__ = [
     'CONFIG_SECTION',
     'DEFAULT_GIT_BRANCH',
     'SUPPORTED_GIT_COMMANDS',
+    'READ_ONLY_GIT_COMMANDS',
     'HTTP_200_OK',
+    'HTTP_202_ACCEPTED',
+    'HTTP_304_NOT_MODIFIED',
     'HTTP_400_BAD_REQUEST',
     'HTTP_401_UNAUTHORIZED',
     'HTTP_404_NOT_FOUND',
     'HTTP_500_SERVER_ERROR',
     'PLUGIN_DEFAULT_CONFIG',
     'ROOT_MOUNTPOUNT',
+    'FS_EVENT_WRITE',
+    'FS_EVENT_REMOVE',
+    'FS_EVENT_RMDIR',
+    'FS_EVENT_MOVE',
+    'FS_EVENT_COPY',
+    'FS_EVENT_MKDIR',
     'JS_FILES',
     'ICON_HOME',
     'ICON_GIT',
@@ -64,6 +73,8 @@ STATIC = '/static/' + PLUGIN_NAME
 CONFIG_SECTION = PLUGIN_NAME + '_plugin'
 DEFAULT_GIT_BRANCH = 'main'
 HTTP_200_OK = 200
+HTTP_202_ACCEPTED = 202
+HTTP_304_NOT_MODIFIED = 304
 HTTP_400_BAD_REQUEST = 400
 HTTP_401_UNAUTHORIZED = 401
 HTTP_404_NOT_FOUND = 404
@@ -88,6 +99,21 @@ SUPPORTED_GIT_COMMANDS = [
     'tag',
     'unstage',
 ]
+# Commands not changing the repository/files (executed concurrently)
+READ_ONLY_GIT_COMMANDS = frozenset(
+    [
+        'cat-file',
+        'diff',
+        'for-each-ref',
+        'help',
+        'log',
+        'ls-local',
+        'ls-tree',
+        'mounts',
+        'show',
+        'status',
+    ]
+)
 PLUGIN_DEFAULT_CONFIG = {
     'enabled': True,
     'git_enabled': True,
@@ -96,13 +122,40 @@ PLUGIN_DEFAULT_CONFIG = {
     'git_author_name': None,
     'git_author_email': None,
     'git_init_repo': True,
+    'git_max_concurrent_reads': 4,
+    'git_batch_idle_timeout': 60,
+    'git_object_cache_size': 33554432,
+    'git_object_cache_directory': None,
+    'git_stream_max_bytes': 0,
+    'git_stream_max_lines': 0,
     'root_directory': None,
     'line_length': 88,
     'string_normalization': False,
     'ignored_entries': '.*,__pycache__,lost+found',
+    'ignore_files': '.gitignore,.codeeditorignore',
     'search_context': 2,
+    'search_max_results': 1000,
+    'search_max_matches_per_file': 0,
+    'search_workers': 4,
+    'search_max_files': 0,
+    'search_time_budget': 0,
+    'search_index': False,
+    'search_index_directory': None,
+    'search_index_max_file_size': 1048576,
+    'search_index_reconcile_interval': 60,
+    'search_index_reconcile_max_files': 10000,
+    'search_cache_size': 33554432,
+    'listing_cache_ttl': 30,
+    'listing_cache_size': 1000,
+    'async_fs_workers': 8,
 }
 ROOT_MOUNTPOUNT = 'root'
+FS_EVENT_WRITE = 'write'
+FS_EVENT_REMOVE = 'remove'
+FS_EVENT_RMDIR = 'rmdir'
+FS_EVENT_MOVE = 'move'
+FS_EVENT_COPY = 'copy'
+FS_EVENT_MKDIR = 'mkdir'
 JS_FILES = [
     'airflow_code_editor.js',
 ]
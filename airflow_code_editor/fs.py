@@ -16,22 +16,67 @@
 
 import datetime
 import errno
+import io
+import logging
+import mmap
 import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
 import uuid
-from dataclasses import dataclass
-from fnmatch import fnmatch
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import PurePosixPath
-from typing import Any, Dict, Generator, List, Optional, Tuple, Union
+from typing import (
+    IO,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import fsspec
 import fsspec.implementations.local
-from psslib.contentmatcher import ContentMatcher
-from psslib.driver import LINE_CONTEXT, LINE_MATCH, _build_match_context_dict
 from psslib.utils import istextfile
 
+from airflow_code_editor.cache import LRUCache
+from airflow_code_editor.commons import (
+    FS_EVENT_COPY,
+    FS_EVENT_MKDIR,
+    FS_EVENT_MOVE,
+    FS_EVENT_REMOVE,
+    FS_EVENT_RMDIR,
+    FS_EVENT_WRITE,
+)
+from airflow_code_editor.ignore import (
+    PathMatcher,
+    check_ignores,
+    get_ignore_files,
+    get_ignored_entries,
+    get_ignored_entries_matcher,
+    get_path_matcher,
+)
+from airflow_code_editor.matcher import (
+    SEARCH_MODE_REGEX,
+    Matcher,
+    MatchResult,
+    context_windows,
+    get_matcher,
+)
+from airflow_code_editor.search_index import get_search_index, on_fs_change, sort_key
 from airflow_code_editor.utils import (
-    get_plugin_config,
+    MountPoint,
     get_plugin_int_config,
+    ordered_map,
     read_mount_points_config,
     send_file,
 )
@@ -39,6 +84,10 @@ from airflow_code_editor.utils import (
 __all__ = [
     "RootFS",
     "FSError",
+    "add_listener",
+    "remove_listener",
+    "get_root_fs",
+    "reload_root_fs",
 ]
 
 
@@ -56,6 +105,37 @@ class MountError(FSError):
 
 
 SEND_FILE_CHUNK_SIZE = 8192
+UPLOAD_TEMP_PREFIX = "airflow_code_editor_upload_"  # prefix of the temporary files of the uploads
+TEXT_CHECK_BLOCK_SIZE = 512  # bytes checked for detecting binary files
+SEARCH_BLOCK_SIZE = 1024 * 1024  # size of the blocks read while searching remote files
+ROOT_FS_POOL_SIZE = 4  # maximum number of shared RootFS instances
+IGNORE_FILES_CACHE_SIZE = 1024  # maximum number of cached ignore files matchers
+SEARCH_CACHE_ITEM_OVERHEAD = 256  # estimated memory used by a cached search match, excluding strings
+
+# Listener arguments: root fs, event, path, target path (for move/copy)
+FSListener = Callable[["RootFS", str, str, Optional[str]], None]
+_listeners: List[FSListener] = []
+# Per-file search results, keyed by path, mtime, size and query
+_search_cache: Optional[LRUCache] = None
+# Directory listings of the remote mount points, keyed by mount point location and path
+_listing_cache: Optional[LRUCache] = None
+# Compiled ignore files (.gitignore, ...) matchers, keyed by directory and ignore files modification times
+_ignore_files_cache: LRUCache = LRUCache(IGNORE_FILES_CACHE_SIZE, sizeof=lambda item: 1)
+# Shared RootFS instances, keyed by mount points configuration
+_root_fs_pool: Dict[Tuple, "RootFS"] = {}
+_root_fs_pool_lock = threading.Lock()
+
+
+def add_listener(listener: FSListener) -> None:
+    "Register a function to be called after any change made through RootFS"
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: FSListener) -> None:
+    "Unregister a change listener"
+    if listener in _listeners:
+        _listeners.remove(listener)
 
 
 def split(pathname: str):
@@ -87,22 +167,73 @@ def forcedir(path: str) -> str:
     return path
 
 
+def is_local(fs: fsspec.AbstractFileSystem) -> bool:
+    "Check if a filesystem is local (local filesystems are accessed directly, without fsspec)"
+    return isinstance(fs, fsspec.implementations.local.LocalFileSystem)
+
+
+def copy_to_local_file(f: IO[bytes], fs_path: str) -> None:
+    "Copy a completely written temporary file into a local file, in place (keeping links, owner and mode)"
+    f.seek(0)
+    with open(fs_path, "wb") as target:
+        shutil.copyfileobj(f, target)
+
+
+def local_info(path: str, st: os.stat_result) -> Dict[str, Any]:
+    "Build a file info (as returned by fsspec) from a stat result"
+    return {
+        "name": path,
+        "size": st.st_size,
+        "type": "directory" if stat.S_ISDIR(st.st_mode) else "file" if stat.S_ISREG(st.st_mode) else "other",
+        "created": getattr(st, "st_birthtime", st.st_ctime),
+        "mode": st.st_mode,
+        "uid": st.st_uid,
+        "gid": st.st_gid,
+        "mtime": st.st_mtime,
+        "ino": st.st_ino,
+        "nlink": st.st_nlink,
+    }
+
+
+def scandir_info(path: str) -> List[Tuple[str, Dict[str, Any]]]:
+    "List a local directory, returning (name, info) tuples (symbolic links are followed)"
+    result = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                st = entry.stat()
+            except OSError:  # broken symbolic link, symbolic link loop, permission denied
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:  # removed
+                    continue
+            result.append((entry.name, local_info(entry.path, st)))
+    return sorted(result, key=lambda x: x[0])
+
+
 class RootFS:
     "Root filesystem with mountpoints"
 
-    def __init__(self):
-        mounts = read_mount_points_config()
+    def __init__(self, mounts: Optional[Dict[str, MountPoint]] = None):
+        if mounts is None:
+            mounts = read_mount_points_config()
         # Setup filesystems
         self.mounts: List[Tuple[str, fsspec.AbstractFileSystem, str]] = []  # (mount_path, filesystem, base_path)
+        self.mount_paths: Set[str] = set()  # mount points paths
+        # Mount points routing table, keyed by the first component of the mount point path
+        self._routes: Dict[str, List[Tuple[str, fsspec.AbstractFileSystem, str]]] = {}
+        self.cached_mounts: Set[str] = set()  # mount points with directory listing cache
         # Set default fs (root)
-        root_fs_path = [v.path for v in mounts.values() if v.default][0]
-        self.root_fs, self.root_fs_base_path = self._open_fs(root_fs_path)
+        root_mount = [v for v in mounts.values() if v.default][0]
+        self.root_fs, self.root_fs_base_path = self._open_fs(root_mount.path)
         self.default_fs = self.root_fs
+        if root_mount.cache or (root_mount.cache is None and not is_local(self.root_fs)):
+            self.cached_mounts.add("/")
         # Mount other fs
         for k, v in mounts.items():
             if not v.default:
                 mount_path = "/~" + k
-                self.mount(mount_path, v.path)
+                self.mount(mount_path, v.path, cache=v.cache)
 
     def _open_fs(self, path: str) -> Tuple[fsspec.AbstractFileSystem, str]:
         "Open a filesystem from a path/URL"
@@ -116,23 +247,40 @@ class RootFS:
             # Local file path
             return fsspec.filesystem("file"), path
 
+    def _find_mount(self, path: str) -> Optional[Tuple[str, fsspec.AbstractFileSystem, str]]:
+        "Find the mount point containing a normalized absolute path (None for the default fs)"
+        routes = self._routes.get(path[1:].split("/", 1)[0])
+        if routes:
+            for mount in routes:
+                mount_path = mount[0]
+                if path == mount_path or path.startswith(mount_path + "/"):
+                    return mount
+        return None
+
+    def get_mount_point(self, path: str) -> Tuple[str, str]:
+        "Return the mount point path and the mounted location (protocol and base path) for a given path"
+        mount = self._find_mount(abspath(normpath(path)))
+        if mount is not None:
+            mount_path, mount_fs, base_path = mount
+            return mount_path, f"{mount_fs.protocol}:{base_path}"
+        return "/", f"{self.default_fs.protocol}:{self.root_fs_base_path}"
+
     def _get_fs_and_path(self, path: str) -> Tuple[fsspec.AbstractFileSystem, str]:
         "Get the appropriate filesystem and adjusted path for a given path"
         path = abspath(normpath(path))
 
-        # Check mounts (longest prefix match)
-        for mount_path, mount_fs, base_path in sorted(self.mounts, key=lambda x: len(x[0]), reverse=True):
-            if path.startswith(mount_path):
-                # Calculate relative path from mount point
-                rel_path = path[len(mount_path) :].lstrip('/')
-                if not rel_path:
-                    rel_path = ""
-                # Combine base path with relative path
-                if base_path:
-                    full_path = os.path.join(base_path, rel_path) if rel_path else base_path
-                else:
-                    full_path = rel_path if rel_path else "/"
-                return mount_fs, full_path
+        # Check mounts
+        mount = self._find_mount(path)
+        if mount is not None:
+            mount_path, mount_fs, base_path = mount
+            # Calculate relative path from mount point
+            rel_path = path[len(mount_path) :].lstrip('/')
+            # Combine base path with relative path
+            if base_path:
+                full_path = os.path.join(base_path, rel_path) if rel_path else base_path
+            else:
+                full_path = rel_path if rel_path else "/"
+            return mount_fs, full_path
 
         # Use default fs
         if self.root_fs_base_path:
@@ -140,8 +288,11 @@ class RootFS:
             path = os.path.join(self.root_fs_base_path, path.lstrip('/'))
         return self.default_fs, path
 
-    def mount(self, path: str, fs_or_path: Union[str, fsspec.AbstractFileSystem]) -> None:
-        "Mounts a filesystem on a given path"
+    def mount(self, path: str, fs_or_path: Union[str, fsspec.AbstractFileSystem], cache: Optional[bool] = None) -> None:
+        """
+        Mounts a filesystem on a given path
+        cache enables the directory listing cache (default: enabled for remote filesystems)
+        """
         if isinstance(fs_or_path, str):
             fs_, base_path = self._open_fs(fs_or_path)
         else:
@@ -151,11 +302,19 @@ class RootFS:
         path = forcedir(abspath(normpath(path)))
 
         # Check for overlapping mounts
-        for mount_path, _, _ in self.mounts:
+        for mount_path in self.mount_paths:
+            mount_path = forcedir(mount_path)
             if path.startswith(mount_path) or mount_path.startswith(path):
                 raise MountError("mount point overlaps existing mount")
 
-        self.mounts.append((path.rstrip('/'), fs_, base_path))
+        mount = (path.rstrip('/'), fs_, base_path)
+        self.mounts.append(mount)
+        self.mount_paths.add(mount[0])
+        routes = self._routes.setdefault(mount[0][1:].split("/", 1)[0], [])
+        routes.append(mount)
+        routes.sort(key=lambda x: len(x[0]), reverse=True)  # longest prefix first
+        if cache or (cache is None and not is_local(fs_)):
+            self.cached_mounts.add(path.rstrip('/'))
 
     def path(self, *parts: str):
         "Return a FSPath instance for the given path"
@@ -175,6 +334,8 @@ class RootFS:
         "Check if path exists"
         fs, path = self._get_fs_and_path(path)
         try:
+            if is_local(fs):
+                return os.path.exists(path)
             return fs.exists(path)
         except Exception:
             return False
@@ -183,6 +344,8 @@ class RootFS:
         "Check if path is a directory"
         fs, path = self._get_fs_and_path(path)
         try:
+            if is_local(fs):
+                return os.path.isdir(path)
             return fs.isdir(path)
         except Exception:
             return False
@@ -191,14 +354,20 @@ class RootFS:
         "Check if path is a file"
         fs, path = self._get_fs_and_path(path)
         try:
+            if is_local(fs):
+                return os.path.isfile(path)
             return fs.isfile(path)
         except Exception:
             return False
 
     def listdir(self, path: str = "/") -> List[str]:
         "List directory contents"
+        if self.listing_cache_key(path) is not None:
+            return [name for name, _ in self.listdir_info(path)]
         fs, path = self._get_fs_and_path(path)
         try:
+            if is_local(fs):
+                return sorted(os.listdir(path))
             items = fs.ls(path, detail=False)
             # Extract just the names (basenames)
             result = []
@@ -211,33 +380,110 @@ class RootFS:
         except (FileNotFoundError, NotADirectoryError):
             raise FileNotFoundError(path)
 
+    def listing_cache_key(self, path: str) -> Optional[Tuple[str, str]]:
+        "Return the directory listing cache key for a path (None if the cache is disabled for the mount point)"
+        if get_listing_cache() is None:
+            return None
+        mount_path, location = self.get_mount_point(path)
+        if mount_path not in self.cached_mounts:
+            return None
+        _, fs_path = self._get_fs_and_path(path)
+        return location, fs_path.rstrip("/")
+
+    def listdir_info(self, path: str = "/") -> List[Tuple[str, Dict[str, Any]]]:
+        "List directory contents, returning (name, info) tuples with a single call"
+        key = self.listing_cache_key(path)
+        if key is None:
+            return self._listdir_info(path)
+        cache = get_listing_cache()
+        cached = cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return list(cached[1])
+        result = self._listdir_info(path)
+        cache.set(key, (time.monotonic() + get_plugin_int_config("listing_cache_ttl"), result))
+        return list(result)
+
+    def invalidate_listing_cache(self, path: str, recursive: bool = False) -> None:
+        "Remove a directory listing (and the listings of the subdirectories, if recursive) from the cache"
+        cache = _listing_cache
+        if cache is None:
+            return
+        mount_path, location = self.get_mount_point(path)
+        _, fs_path = self._get_fs_and_path(path)
+        fs_path = fs_path.rstrip("/")
+        cache.pop((location, fs_path))
+        if recursive:
+            for key in cache.keys():
+                if key[0] == location and key[1].startswith(fs_path + "/"):
+                    cache.pop(key)
+
+    def _listdir_info(self, path: str) -> List[Tuple[str, Dict[str, Any]]]:
+        fs, path = self._get_fs_and_path(path)
+        if is_local(fs):
+            return scandir_info(path)
+        try:
+            items = fs.ls(path, detail=True)
+        except (FileNotFoundError, NotADirectoryError):
+            raise FileNotFoundError(path)
+        # Listing a file returns the file itself
+        if (
+            len(items) == 1
+            and items[0].get("type") != "directory"
+            and items[0]["name"].rstrip("/") == fs._strip_protocol(path).rstrip("/")
+        ):
+            raise NotADirectoryError(path)
+        result = []
+        for info in items:
+            basename = os.path.basename(info["name"].rstrip('/'))
+            if basename:  # Skip empty strings
+                result.append((basename, info))
+        return sorted(result, key=lambda x: x[0])
+
     def makedirs(self, path: str, recreate=False, exist_ok=False) -> None:
         "Create directories"
-        fs, path = self._get_fs_and_path(path)
+        fs, fs_path = self._get_fs_and_path(path)
         try:
-            fs.makedirs(path, exist_ok=recreate or exist_ok)
+            fs.makedirs(fs_path, exist_ok=recreate or exist_ok)
         except FileExistsError:
             if not (recreate or exist_ok):
                 raise
+        self.notify(FS_EVENT_MKDIR, path)
+
+    def notify(self, event: str, path: str, target: Optional[str] = None) -> None:
+        "Notify a change to the listeners"
+        path = abspath(normpath(path))
+        if target is not None:
+            target = abspath(normpath(target))
+        for listener in list(_listeners):
+            try:
+                listener(self, event, path, target)
+            except Exception as ex:
+                logging.error("Error notifying %s %s: %s", event, path, ex)
 
     def remove(self, path: str) -> None:
         "Remove a file"
-        fs, path = self._get_fs_and_path(path)
-        fs.rm(path, recursive=False)
+        fs, fs_path = self._get_fs_and_path(path)
+        fs.rm(fs_path, recursive=False)
+        self.notify(FS_EVENT_REMOVE, path)
 
     def rmdir(self, path: str) -> None:
         "Remove a directory"
-        fs, path = self._get_fs_and_path(path)
-        fs.rmdir(path)
+        fs, fs_path = self._get_fs_and_path(path)
+        fs.rmdir(fs_path)
+        self.notify(FS_EVENT_RMDIR, path)
 
     def info(self, path: str) -> Dict[str, Union[int, float]]:
         "Get file info"
         fs, path = self._get_fs_and_path(path)
+        if is_local(fs):
+            return local_info(path, os.stat(path))
         return fs.info(path)
 
     def size(self, path: str) -> int:
         "Get file size"
         fs, path = self._get_fs_and_path(path)
+        if is_local(fs):
+            return os.path.getsize(path)
         return fs.size(path)
 
     def move(self, src: str, dst: str) -> None:
@@ -256,6 +502,7 @@ class RootFS:
                 with dst_fs.open(dst_path, 'wb') as dst_file:
                     dst_file.write(src_file.read())
             src_fs.rm(src_path)
+        self.notify(FS_EVENT_MOVE, src, dst)
 
     def copy(self, src: str, dst: str) -> None:
         "Copy a file"
@@ -265,6 +512,7 @@ class RootFS:
         with src_fs.open(src_path, 'rb') as src_file:
             with dst_fs.open(dst_path, 'wb') as dst_file:
                 dst_file.write(src_file.read())
+        self.notify(FS_EVENT_COPY, src, dst)
 
     def read_text(self, path: str, encoding=None, errors=None) -> str:
         "Read text from a file"
@@ -285,9 +533,10 @@ class RootFS:
         if parent_path and parent_path != '/':
             self.makedirs(parent_path, exist_ok=True)
 
-        fs, path = self._get_fs_and_path(path)
-        with fs.open(path, 'w', encoding=encoding, errors=errors) as f:
+        fs, fs_path = self._get_fs_and_path(path)
+        with fs.open(fs_path, 'w', encoding=encoding, errors=errors) as f:
             f.write(data)
+        self.notify(FS_EVENT_WRITE, path)
 
     def write_bytes(self, path: str, data: bytes) -> None:
         "Write bytes to a file"
@@ -296,83 +545,238 @@ class RootFS:
         if parent_path and parent_path != '/':
             self.makedirs(parent_path, exist_ok=True)
 
-        fs, path = self._get_fs_and_path(path)
-        with fs.open(path, 'wb') as f:
+        fs, fs_path = self._get_fs_and_path(path)
+        with fs.open(fs_path, 'wb') as f:
             f.write(data)
+        self.notify(FS_EVENT_WRITE, path)
+
+    def write_stream(self, path: str, chunks: Iterable[bytes]) -> None:
+        """
+        Write a file from an iterable of chunks, without loading the whole file in memory.
+        The chunks are written to a local temporary file first, the file is changed only
+        when all the chunks are received (local files are overwritten, remote files are uploaded).
+        """
+        # Ensure parent directory exists
+        parent_path = os.path.dirname(path)
+        if parent_path and parent_path != '/':
+            self.makedirs(parent_path, exist_ok=True)
+
+        fs, fs_path = self._get_fs_and_path(path)
+        with tempfile.NamedTemporaryFile(prefix=UPLOAD_TEMP_PREFIX) as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            if is_local(fs):
+                copy_to_local_file(f, fs_path)
+            else:
+                fs.put_file(f.name, fs_path)
+        self.notify(FS_EVENT_WRITE, path)
 
     def touch(self, path: str) -> None:
         "Create or update a file"
-        fs, path = self._get_fs_and_path(path)
-        fs.touch(path)
+        fs, fs_path = self._get_fs_and_path(path)
+        fs.touch(fs_path)
+        self.notify(FS_EVENT_WRITE, path)
 
     def get_local_path(self, path: str) -> str:
         "Get local path"
         fs, path = self._get_fs_and_path(path)
-        if isinstance(fs, fsspec.implementations.local.LocalFileSystem):
+        if is_local(fs):
             return path
         else:
             return None
 
+    def load_ignore_files(self, path: str, items: Iterable[Tuple[str, Dict[str, Any]]]) -> Optional[PathMatcher]:
+        """
+        Load the ignore files (e.g. .gitignore) of a directory, items are the ignore files (name, info).
+        Return None if the directory doesn't contain any ignore file.
+        """
+        names = get_ignore_files()
+        found = {name: info for name, info in items if name in names and info.get("type") == "file"}
+        if not found:
+            return None
+        stamps = tuple((name, get_mtime(found[name]), found[name].get("size")) for name in names if name in found)
+        key = (self.get_mount_point(path)[1], path, stamps)
+        matcher = _ignore_files_cache.get(key)
+        if matcher is None:
+            patterns: List[str] = []
+            for name, _, _ in stamps:
+                try:
+                    patterns.extend(self.read_text(os.path.join(path, name), errors="replace").splitlines())
+                except (OSError, FSError):
+                    pass
+            matcher = PathMatcher(patterns)
+            _ignore_files_cache.set(key, matcher)
+        return matcher or None
+
+    def ignore_files_info(self, path: str) -> List[Tuple[str, Dict[str, Any]]]:
+        "Return the (name, info) of the ignore files of a directory"
+        result = []
+        for name in get_ignore_files():
+            try:
+                result.append((name, self.info(os.path.join(path, name))))
+            except (OSError, FSError):
+                pass
+        return result
+
+    def ignore_state(self, path: str, memo: Dict[str, Tuple[bool, Tuple]]) -> Tuple[bool, Tuple]:
+        """
+        Return (ignored, ignores) for a directory: ignored is true if the directory is ignored by
+        the ignore files of its parent directories, ignores are the (directory, matcher) applying
+        to the directory entries, from the mount point down. Results are memoized in memo.
+        """
+        if path in memo:
+            return memo[path]
+        if path == self.get_mount_point(path)[0]:
+            ignored, ignores = False, ()
+        else:
+            ignored, ignores = self.ignore_state(os.path.dirname(path), memo)
+            ignored = ignored or check_ignores(ignores, path, is_dir=True)
+        if not ignored:
+            matcher = self.load_ignore_files(path, self.ignore_files_info(path))
+            if matcher is not None:
+                ignores = ignores + ((path, matcher),)
+        memo[path] = (ignored, ignores)
+        return ignored, ignores
+
     def find_files(
         self,
         path: str = "/",
         filter: Union[List[str], str, None] = None,
         exclude: Optional[List[str]] = None,
         max_depth: Optional[int] = None,
+        max_files: Optional[int] = None,
+        time_budget: Optional[float] = None,
+        start_after: Optional[str] = None,
     ) -> Generator["FSPath", None, None]:
-        "Walk a filesystem, yielding FSPath"
-        if exclude == []:
-            exclude = None
+        """
+        Walk a filesystem, yielding FSPath (depth-first, the entries of each directory sorted by name).
+        The entries ignored by the ignore files (.gitignore, .codeeditorignore) are skipped.
+        The walk stops after max_files files or when time_budget (in seconds) is exceeded.
+        If start_after is set, the walk resumes after this path (the directories before it are not listed).
+        On remote mount points, the subdirectories are listed in advance by a pool of threads.
+        """
         if isinstance(filter, str):
             filter = [filter]
-
-        def should_exclude(name: str, patterns: Optional[List[str]]) -> bool:
-            "Check if name matches any exclude pattern"
-            if not patterns:
-                return False
-            for pattern in patterns:
-                if fnmatch(name, pattern):
-                    return True
-            return False
-
-        def matches_filter(name: str, patterns: Optional[List[str]]) -> bool:
-            "Check if name matches any filter pattern"
-            if not patterns:
-                return True
-            for pattern in patterns:
-                if fnmatch(name, pattern):
-                    return True
-            return False
-
-        def walk_recursive(current_path: str, depth: int = 0):
-            "Recursively walk directories"
-            if max_depth is not None and depth > max_depth:
-                return
-
+        exclude_matcher = get_path_matcher(tuple(exclude or ()))
+        filter_matcher = get_path_matcher(tuple(filter or ()))
+        ignore_files = set(get_ignore_files())
+        path = abspath(normpath(path))
+        deadline = time.monotonic() + time_budget if time_budget else None
+        after_key = start_after.split("/") if start_after else None
+        # Ignore files of the parent directories
+        if ignore_files and path != self.get_mount_point(path)[0]:
+            root_ignores = self.ignore_state(os.path.dirname(path), {})[1]
+        else:
+            root_ignores = ()
+        # Prefetch the directory listings on remote filesystems
+        workers = get_plugin_int_config("search_workers")
+        executor = (
+            ThreadPoolExecutor(max_workers=workers)
+            if workers > 1 and not is_local(self._get_fs_and_path(path)[0])
+            else None
+        )
+        prefetched: Dict[str, Future] = {}
+        # Directories to be prefetched, in walk order (at most max_prefetch listings are in flight)
+        prefetch_queue: Deque[str] = deque()
+        max_prefetch = workers * 2
+
+        def prefetch() -> None:
+            "Submit the next directory listings"
+            while executor is not None and prefetch_queue and len(prefetched) < max_prefetch:
+                dir_path = prefetch_queue.popleft()
+                prefetched[dir_path] = executor.submit(self.listdir_info, dir_path)
+
+        def enter(dir_path: str, rel_dir: str, depth: int, ignores: Tuple) -> Optional[Tuple]:
+            """
+            List a directory, applying the exclude/filter patterns and the ignore files.
+            Return the stack frame (entries iterator, depth, ignores) or None if the directory can't be listed.
+            """
+            future = prefetched.pop(dir_path, None)
+            if future is None and prefetch_queue and prefetch_queue[0] == dir_path:
+                prefetch_queue.popleft()  # not submitted yet, listed now
+            prefetch()
             try:
-                items = self.listdir(current_path)
-            except (FileNotFoundError, FSError):
-                return
-
-            for item in items:
-                item_path = os.path.join(current_path, item).replace('\\', '/')
-
+                items = future.result() if future is not None else self.listdir_info(dir_path)
+            except (FileNotFoundError, NotADirectoryError, FSError):
+                return None
+
+            # Load the ignore files of the current directory
+            if ignore_files:
+                matcher = self.load_ignore_files(dir_path, [x for x in items if x[0] in ignore_files])
+                if matcher is not None:
+                    ignores = ignores + ((dir_path, matcher),)
+
+            descend = max_depth is None or depth < max_depth
+            entries = []  # (path, relative path, info, is dir)
+            for item, info in items:
+                item_path = os.path.join(dir_path, item).replace('\\', '/')
+                rel_path = rel_dir + "/" + item if rel_dir else item
                 try:
-                    is_dir = self.isdir(item_path)
-
-                    # Handle directories
-                    if is_dir:
-                        # Recurse into directory unless excluded
-                        if not should_exclude(item, exclude):
-                            yield from walk_recursive(item_path, depth + 1)
+                    if info.get("islink"):
+                        # Follow symbolic links
+                        info = None
+                        is_dir = self.isdir(item_path)
                     else:
-                        # Handle files
-                        if not should_exclude(item, exclude) and matches_filter(item, filter):
-                            yield FSPath(item_path, root_fs=self)
+                        is_dir = info.get("type") == "directory"
                 except (FileNotFoundError, FSError):
                     continue
-
-        yield from walk_recursive(path, 0)
+                if ignores and check_ignores(ignores, item_path, is_dir):
+                    continue
+                # Skip the entries before start_after (except its parent directories)
+                if (
+                    after_key is not None
+                    and item_path.split("/") <= after_key
+                    and not (is_dir and start_after.startswith(item_path + "/"))
+                ):
+                    continue
+                if is_dir:
+                    # Skip the directory if excluded or no file can match the filter
+                    if (
+                        descend
+                        and not exclude_matcher.match(rel_path, is_dir=True)
+                        and (not filter_matcher or filter_matcher.may_match_dir(rel_path))
+                    ):
+                        entries.append((item_path, rel_path, info, True))
+                elif not exclude_matcher.match(rel_path) and (not filter_matcher or filter_matcher.match(rel_path)):
+                    entries.append((item_path, rel_path, info, False))
+            if executor is not None:
+                # The subdirectories are walked before the directories already queued
+                prefetch_queue.extendleft(reversed([x[0] for x in entries if x[3] and x[2] is not None]))
+                prefetch()
+            return iter(entries), depth, ignores
+
+        count = 0
+        stack = []
+        frame = enter(path, "", 0, root_ignores)
+        if frame is not None:
+            stack.append(frame)
+        try:
+            while stack:
+                if deadline is not None and time.monotonic() > deadline:
+                    logging.info("Walk of %s stopped, time budget exceeded", path)
+                    return
+                entries, depth, ignores = stack[-1]
+                entry = next(entries, None)
+                if entry is None:
+                    stack.pop()
+                    continue
+                item_path, rel_path, info, is_dir = entry
+                if is_dir:
+                    frame = enter(item_path, rel_path, depth + 1, ignores)
+                    if frame is not None:
+                        stack.append(frame)
+                else:
+                    yield FSPath(item_path, root_fs=self, info=info)
+                    count += 1
+                    if max_files and count >= max_files:
+                        logging.info("Walk of %s stopped, max number of files reached", path)
+                        return
+        finally:
+            if executor is not None:
+                for future in prefetched.values():
+                    future.cancel()
+                executor.shutdown(wait=False)
 
     def search(
         self,
@@ -382,92 +786,389 @@ class RootFS:
         filter: Optional[List[str]] = None,
         exclude: Optional[List[str]] = None,
         max_depth: Optional[int] = None,
-    ):
+        max_matches_per_file: Optional[int] = None,
+        mode: str = SEARCH_MODE_REGEX,
+        ignore_case: bool = False,
+        whole_word: bool = False,
+    ) -> List[Dict[str, Any]]:
         "Search for pattern in files"
+        return list(
+            self.iter_search(
+                query=query,
+                search_context=search_context,
+                path=path,
+                filter=filter,
+                exclude=exclude,
+                max_depth=max_depth,
+                max_matches_per_file=max_matches_per_file,
+                mode=mode,
+                ignore_case=ignore_case,
+                whole_word=whole_word,
+            )
+        )
+
+    def iter_search(
+        self,
+        query: str,
+        search_context: Optional[int] = None,
+        path: str = "/",
+        filter: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+        max_matches_per_file: Optional[int] = None,
+        start_at: Optional[str] = None,
+        mode: str = SEARCH_MODE_REGEX,
+        ignore_case: bool = False,
+        whole_word: bool = False,
+        max_files: Optional[int] = None,
+        time_budget: Optional[float] = None,
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        Search for pattern in files, yielding the matches of each file as soon as the file is scanned.
+        The files before the start_at path are skipped without reading them (for resuming a search).
+        At most max_files files are scanned, the walk stops when time_budget (in seconds) is exceeded.
+        """
         if search_context is None:
             search_context = get_plugin_int_config("search_context")
         if exclude is None:
-            exclude = get_plugin_config("ignored_entries").split(",")
+            exclude = get_ignored_entries()
+        if max_files is None:
+            max_files = get_plugin_int_config("search_max_files")
+        if time_budget is None:
+            time_budget = get_plugin_int_config("search_time_budget")
+
+        matcher = get_matcher(query, mode=mode, ignore_case=ignore_case, whole_word=whole_word)
+        files = self.search_candidates(matcher, path=path, filter=filter, exclude=exclude, max_depth=max_depth)
+        if files is None:
+            files = self.find_files(
+                path=path,
+                filter=filter,
+                exclude=exclude,
+                max_depth=max_depth,
+                max_files=max_files,
+                time_budget=time_budget,
+                start_after=start_at,
+            )
+            if start_at is not None:
+                # The file where the search resumes is yielded only if selected by the filters
+                resumed = self.filter_files(
+                    [abspath(normpath(start_at))], path=path, filter=filter, exclude=exclude, max_depth=max_depth
+                )
+                files = self.resume_walk(resumed, files)
+        else:
+            if start_at is not None:
+                start_key = sort_key(start_at)
+                files = [file_path for file_path in files if sort_key(file_path.path) >= start_key]
+            if max_files:
+                files = files[:max_files]
 
-        result = []
-        matcher = ContentMatcher(pattern=query.encode("utf-8"))
-        for file_path in self.find_files(filter=filter, exclude=exclude, max_depth=max_depth):
+        def search_file(file_path: FSPath) -> List[Dict[str, Any]]:
             try:
-                with file_path.open("rb") as f:
-                    if istextfile(f):
-                        f.seek(0)
-                        matches = list(matcher.match_file(f))
-                        if not search_context:
-                            for match in matches:
-                                context = match[0].decode("utf-8")
-                                row_number = match[1]
-                                result.append(
-                                    {
-                                        "row_number": row_number,  # matching row number
-                                        "context_first_row": row_number,  # context first row number
-                                        "context": context,  # context (matching row)
-                                        "path": file_path.path,  # file path
-                                    }
-                                )
-                        else:
-                            for row, context, context_first_row in prepare_search_context(f, matches, search_context):
-                                result.append(
-                                    {
-                                        "row_number": row,  # matching row number
-                                        "context_first_row": context_first_row,  # context first row number
-                                        "context": context,  # context
-                                        "path": file_path.path,  # file path
-                                    }
-                                )
+                return self.search_file(file_path, matcher, search_context, max_matches_per_file)
             except (OSError, IOError, FSError):
-                pass
+                return []
 
+        # Files are scanned in parallel, the results are yielded in the files order
+        results = ordered_map(search_file, files, get_plugin_int_config("search_workers"))
+        try:
+            for matches in results:
+                yield from matches
+        finally:
+            results.close()
+            # Stop walking the filesystem when the consumer stops early
+            if isinstance(files, Generator):
+                files.close()
+
+    def resume_walk(
+        self, resumed: List["FSPath"], files: Generator["FSPath", None, None]
+    ) -> Generator["FSPath", None, None]:
+        "Yield the file where a search resumes (if it still exists) and then the files walked after it"
+        try:
+            for file_path in resumed:
+                if file_path.is_file():
+                    yield file_path
+            yield from files
+        finally:
+            files.close()
+
+    def search_file(
+        self, file_path: "FSPath", matcher: Matcher, search_context: int, max_matches: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        "Search for pattern in a file, using the cached results if the file is unchanged"
+        cache = get_search_cache()
+        key = None
+        if cache is not None:
+            info = file_path.info()
+            mtime = get_mtime(info)
+            if mtime is not None:
+                fs, fs_path = self._get_fs_and_path(file_path.path)
+                key = (file_path.path, str(fs.protocol), fs_path, mtime, info.get("size"))
+                key += (matcher.key, search_context, max_matches)
+                result = cache.get(key)
+                if result is not None:
+                    return [dict(match) for match in result]
+        result = self.scan_file(file_path, matcher, search_context, max_matches)
+        if key is not None:
+            cache.set(key, result)
+            result = [dict(match) for match in result]
         return result
 
+    def scan_file(
+        self, file_path: "FSPath", matcher: Matcher, search_context: int, max_matches: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        "Search for pattern in a file"
+        local_path = self.get_local_path(file_path.path)
+        if local_path is not None:
+            # Local files are memory-mapped and searched in place
+            with open(local_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    if not istextfile(io.BytesIO(buffer[:TEXT_CHECK_BLOCK_SIZE])):
+                        return []
+                    return search_buffer(buffer, file_path.path, matcher, search_context, max_matches)
+        else:
+            with file_path.open("rb") as f:
+                if not istextfile(f):
+                    return []
+                f.seek(0)
+                return search_stream(f, file_path.path, matcher, search_context, max_matches)
 
-def prepare_search_context(f, matches, search_context) -> Generator[Tuple[int, str, int], None, None]:
-    f.seek(0)
-    match_context_dict = _build_match_context_dict(matches, search_context, search_context)
-    lines = []
-    context_first_row = 0
-    row_number = 0
-
-    prev_was_blank = False
-    had_context = False
-    for current_row_number, current_line in enumerate(f, 1):
-        current_line = current_line.decode("utf-8")
-        result, match = match_context_dict.get(current_row_number, (None, None))
-        if result is None:
-            prev_was_blank = True
-            continue
-
-        elif result == LINE_MATCH:
-            row_number = current_row_number
-            if current_row_number < context_first_row or context_first_row == 0:
-                context_first_row = current_row_number
-            lines.append(current_line)
-
-        elif result == LINE_CONTEXT:
-            if prev_was_blank and had_context:
-                context = "".join(lines)
-                yield row_number, context, context_first_row
-                lines = []
-                context_first_row = current_row_number
-            if context_first_row < context_first_row or context_first_row == 0:
-                context_first_row = current_row_number
-            lines.append(current_line)
-            had_context = True
-        prev_was_blank = False
-
-    if lines:
-        context = "".join(lines)
-        yield row_number, context, context_first_row
+    def search_candidates(
+        self,
+        matcher: Matcher,
+        path: str = "/",
+        filter: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+    ) -> Optional[List["FSPath"]]:
+        "Use the search index for selecting the files that may contain the query (None if not available)"
+        if matcher.literal is None:  # regex, trigrams can't be extracted from the query
+            return None
+        index = get_search_index(self, path)
+        if index is None:
+            return None
+        if not index.maybe_build(self):  # the files are walked until the index is ready
+            return None
+        index.maybe_reconcile(self)
+        candidates = index.candidates(matcher.literal)
+        if candidates is None:
+            return None
+        return self.filter_files(candidates, path=path, filter=filter, exclude=exclude, max_depth=max_depth)
+
+    def filter_files(
+        self,
+        paths: Iterable[str],
+        path: str = "/",
+        filter: Optional[List[str]] = None,
+        exclude: Optional[List[str]] = None,
+        max_depth: Optional[int] = None,
+    ) -> List["FSPath"]:
+        "Select the files in the search path matching the filters, as find_files does (without walking)"
+        path = abspath(normpath(path))
+        base_depth = len(PurePosixPath(path).parts)
+        if isinstance(filter, str):
+            filter = [filter]
+        exclude_matcher = get_path_matcher(tuple(exclude or ()))
+        filter_matcher = get_path_matcher(tuple(filter or ()))
+        ignore_memo: Dict[str, Tuple[bool, Tuple]] = {}
+        result = []
+        for candidate in paths:
+            if path != "/" and not candidate.startswith(forcedir(path)):
+                continue
+            parts = PurePosixPath(candidate).parts
+            if ".." in parts:
+                continue
+            # Directory depth, relative to the search path
+            if max_depth is not None and len(parts) - base_depth - 1 > max_depth:
+                continue
+            rel_path = "/".join(parts[base_depth:])
+            if exclude_matcher.is_ignored(rel_path):
+                continue
+            if filter_matcher and not filter_matcher.match(rel_path):
+                continue
+            # Check the ignore files of the parent directories
+            if get_ignore_files():
+                ignored, ignores = self.ignore_state(os.path.dirname(candidate), ignore_memo)
+                if ignored or check_ignores(ignores, candidate):
+                    continue
+            result.append(FSPath(candidate, root_fs=self))
+        return result
+
+
+def get_mtime(info: Dict[str, Any]) -> Optional[float]:
+    "Get the modification time (timestamp) from a file info"
+    mtime = info.get("mtime", info.get("LastModified"))
+    if isinstance(mtime, datetime.datetime):
+        # todo: timezone?
+        mtime = mtime.timestamp()
+    return mtime
+
+
+def sizeof_matches(matches: List[Dict[str, Any]]) -> int:
+    "Estimate the memory used by a list of search matches"
+    return SEARCH_CACHE_ITEM_OVERHEAD + sum(
+        SEARCH_CACHE_ITEM_OVERHEAD + len(match["context"]) + len(match["path"]) for match in matches
+    )
+
+
+def get_listing_cache() -> Optional[LRUCache]:
+    "Get the directory listing cache (None if disabled)"
+    global _listing_cache
+    max_size = get_plugin_int_config("listing_cache_size")
+    if max_size <= 0 or get_plugin_int_config("listing_cache_ttl") <= 0:
+        return None
+    if _listing_cache is None or _listing_cache.max_size != max_size:
+        _listing_cache = LRUCache(max_size, sizeof=lambda item: 1)
+    return _listing_cache
+
+
+def get_search_cache() -> Optional[LRUCache]:
+    "Get the per-file search results cache (None if disabled)"
+    global _search_cache
+    max_size = get_plugin_int_config("search_cache_size")
+    if max_size <= 0:
+        return None
+    if _search_cache is None or _search_cache.max_size != max_size:
+        _search_cache = LRUCache(max_size, sizeof=sizeof_matches)
+    return _search_cache
+
+
+def search_buffer(
+    buffer, path: str, matcher: Matcher, search_context: int, max_matches: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    "Search for pattern in a buffer (bytes or mmap)"
+    return matches_results(buffer, list(matcher.match(buffer, max_matches)), path, search_context)
+
+
+def search_stream(
+    f: IO[bytes],
+    path: str,
+    matcher: Matcher,
+    search_context: int,
+    max_matches: Optional[int] = None,
+    block_size: int = SEARCH_BLOCK_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Search for pattern in a file, reading blocks of whole lines.
+    Each block is searched together with the context lines of the previous and of the next block.
+    """
+    result: List[Dict[str, Any]] = []
+    count = 0  # number of matches
+    lineno = 0  # number of lines before the current block
+    before = b""  # context lines before the current block
+    block = read_lines_block(f, block_size)
+    while block and (not max_matches or count < max_matches):
+        next_block = read_lines_block(f, block_size)
+        # The next block must contain the context lines after the current block
+        while next_block.count(b"\n") < search_context:
+            line = f.readline()
+            if not line:
+                break
+            next_block += line
+        after = head_lines(next_block, search_context)
+        before_lines = before.count(b"\n")
+        matches = [
+            MatchResult(
+                match.matching_line,
+                match.matching_lineno + before_lines,
+                match.matching_column_ranges,
+                match.offset + len(before),
+            )
+            for match in matcher.match(block, max_matches - count if max_matches else None)
+        ]
+        if matches:
+            count += len(matches)
+            block_result = matches_results(before + block + after, matches, path, search_context, lineno - before_lines)
+            # Merge the context windows overlapping the previous block ones
+            if result and search_context and merge_context(result[-1], block_result[0]):
+                block_result.pop(0)
+            result.extend(block_result)
+        lineno += block.count(b"\n")
+        tail = tail_lines(block, search_context)
+        before = tail if len(tail) < len(block) else tail_lines(before + block, search_context)
+        block = next_block
+    return result
+
+
+def read_lines_block(f: IO[bytes], block_size: int) -> bytes:
+    "Read a block of data from a file, up to the end of the last line"
+    block = f.read(block_size)
+    if block and not block.endswith(b"\n"):
+        block += f.readline()
+    return block
+
+
+def head_lines(data: bytes, lines: int) -> bytes:
+    "Return the first lines of data"
+    end = 0
+    for _ in range(lines):
+        end = data.find(b"\n", end) + 1
+        if end == 0:
+            return data
+    return data[:end]
+
+
+def tail_lines(data: bytes, lines: int) -> bytes:
+    "Return the last (complete) lines of data"
+    if not lines:
+        return b""
+    start = len(data)
+    for _ in range(lines):
+        start = data.rfind(b"\n", 0, start - 1) + 1
+        if start == 0:
+            return data
+    return data[start:]
+
+
+def merge_context(previous: Dict[str, Any], match: Dict[str, Any]) -> bool:
+    "Merge a match context into the previous one if they are overlapping or adjacent, return true if merged"
+    context = previous["context"]
+    last_row = previous["context_first_row"] + context.count("\n") - context.endswith("\n")
+    if match["context_first_row"] > last_row + 1:
+        return False
+    # Append the rows after the last row of the previous context
+    skip = last_row - match["context_first_row"] + 1
+    rows = match["context"].split("\n", skip)
+    if len(rows) > skip:
+        previous["context"] += rows[-1]
+    previous["row_number"] = match["row_number"]
+    return True
+
+
+def matches_results(
+    buffer, matches: List[MatchResult], path: str, search_context: int, line_offset: int = 0
+) -> List[Dict[str, Any]]:
+    "Format the matches of a search in a buffer, adding line_offset to the row numbers"
+    result = []
+    if not search_context:
+        for match in matches:
+            result.append(
+                {
+                    "row_number": match.matching_lineno + line_offset,  # matching row number
+                    "context_first_row": match.matching_lineno + line_offset,  # context first row number
+                    "context": match.matching_line.decode("utf-8"),  # context (matching row)
+                    "path": path,  # file path
+                }
+            )
+    else:
+        for row, context, context_first_row in context_windows(buffer, matches, search_context):
+            result.append(
+                {
+                    "row_number": row + line_offset,  # matching row number
+                    "context_first_row": context_first_row + line_offset,  # context first row number
+                    "context": context,  # context
+                    "path": path,  # file path
+                }
+            )
+    return result
 
 
 class FSPath:
 
-    def __init__(self, *parts: str, root_fs: RootFS) -> None:
+    def __init__(self, *parts: str, root_fs: RootFS, info: Optional[Dict[str, Any]] = None) -> None:
         self.root_fs = root_fs
+        self._info = info  # file info from the directory listing
         if parts:
             self.path = os.path.join("/", *parts)
         else:
@@ -517,13 +1218,16 @@ class FSPath:
         else:
             self.unlink()
 
+    def info(self) -> Dict[str, Any]:
+        "File info (from the directory listing, if available)"
+        if self._info is not None:
+            return self._info
+        return self.root_fs.info(self.path)
+
     def stat(self) -> os.stat_result:
         "File stat"
-        info = self.root_fs.info(self.path)
-        mtime = info.get("mtime", info.get("LastModified"))
-        if isinstance(mtime, datetime.datetime):
-            # todo: timezone?
-            mtime = mtime.timestamp()
+        info = self.info()
+        mtime = get_mtime(info)
         return os.stat_result(
             (
                 info.get("mode"),
@@ -541,6 +1245,8 @@ class FSPath:
 
     def is_dir(self) -> bool:
         "Return True if this path is a directory"
+        if self._info is not None:
+            return self._info.get("type") == "directory"
         try:
             return self.root_fs.isdir(self.path)
         except Exception:
@@ -548,6 +1254,8 @@ class FSPath:
 
     def is_file(self) -> bool:
         "Return True if this path is a file"
+        if self._info is not None:
+            return self._info.get("type") == "file"
         try:
             return self.root_fs.isfile(self.path)
         except Exception:
@@ -562,28 +1270,27 @@ class FSPath:
         return self.root_fs.exists(self.path)
 
     def iterdir(self, show_ignored_entries=False) -> Generator["FSPath", None, None]:
-        "Iterate over the files in this directory"
-        ignored_entries = get_plugin_config("ignored_entries").split(",")
-        mount_points = [x[0].rstrip("/") for x in self.root_fs.mounts]
-        for name in sorted(self.root_fs.listdir(self.path)):
-            skip = False
+        "Iterate over the files in this directory (the entries carry the info from the directory listing)"
+        ignored_entries = get_ignored_entries_matcher()
+        mount_points = self.root_fs.mount_paths
+        for name, info in self.root_fs.listdir_info(self.path):
             if not show_ignored_entries:
                 fullpath = os.path.join(self.path, name)
-                # Skip mount points
-                if fullpath in mount_points:
-                    skip = True
-                # Ship hidden files
-                for pattern in ignored_entries:
-                    if fnmatch(fullpath if pattern.startswith("/") else name, pattern.strip()):
-                        skip = True
-            if not skip:
-                yield FSPath(self.path, name, root_fs=self.root_fs)
+                # Skip mount points and hidden files
+                if fullpath in mount_points or ignored_entries.match(
+                    fullpath.lstrip("/"), is_dir=info.get("type") == "directory"
+                ):
+                    continue
+            # Symbolic links info is not cached, the link target is checked when needed
+            yield FSPath(self.path, name, root_fs=self.root_fs, info=None if info.get("islink") else info)
 
     def size(self) -> Optional[int]:
         "Return file size for files and number of files for directories"
         try:
             if self.is_dir():
                 return len(self.root_fs.listdir(self.path))
+            elif self._info is not None and self._info.get("size") is not None:
+                return self._info["size"]
             else:
                 return self.root_fs.size(self.path)
         except Exception:
@@ -642,6 +1349,10 @@ class FSPath:
         self.root_fs.makedirs(self.parent.path, recreate=True)
         self.root_fs.write_bytes(self.path, data)
 
+    def write_stream(self, chunks: Iterable[bytes]) -> None:
+        "Write a file from an iterable of chunks"
+        self.root_fs.write_stream(self.path, chunks)
+
     def read_text(self, encoding=None, errors=None) -> str:
         "Get the contents of a file as a string"
         return self.root_fs.read_text(self.path, encoding=encoding, errors=errors)
@@ -694,3 +1405,43 @@ class FSPath:
         if not isinstance(other, FSPath):
             return NotImplemented
         return self.path >= other.path
+
+
+def on_listing_change(root_fs: RootFS, event: str, path: str, target: Optional[str]) -> None:
+    "Invalidate the cached directory listings after a change made through RootFS"
+    for changed_path in (path, target):
+        if changed_path:
+            # Listing of the parent directory and (for directories) of the path itself
+            root_fs.invalidate_listing_cache(split(changed_path)[0])
+            root_fs.invalidate_listing_cache(changed_path, recursive=True)
+
+
+def get_root_fs() -> RootFS:
+    """
+    Get the shared RootFS for the current mount points configuration.
+    The instances are pooled by configuration, so the filesystems (and the connections
+    to the remote mount points) are reused across requests.
+    """
+    mounts = read_mount_points_config()
+    key = tuple(sorted((name, v.path, v.default, v.cache) for name, v in mounts.items()))
+    with _root_fs_pool_lock:
+        root_fs = _root_fs_pool.get(key)
+        if root_fs is None:
+            root_fs = RootFS(mounts)
+            _root_fs_pool[key] = root_fs
+            # Discard the instances of the old configurations
+            while len(_root_fs_pool) > ROOT_FS_POOL_SIZE:
+                del _root_fs_pool[next(iter(_root_fs_pool))]
+        return root_fs
+
+
+def reload_root_fs() -> None:
+    "Discard the shared RootFS instances, the filesystems are opened again by the next get_root_fs call"
+    with _root_fs_pool_lock:
+        _root_fs_pool.clear()
+
+
+# Keep the search indexes updated
+add_listener(on_fs_change)
+# Keep the directory listing cache updated
+add_listener(on_listing_change)
@@ -16,26 +16,45 @@
 
 import logging
 import os
+import re
 import shlex
+import stat
 import subprocess
+import tempfile
 import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Generator,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
+from airflow_code_editor.cache import LRUCache
 from airflow_code_editor.commons import (
     DEFAULT_GIT_BRANCH,
     HTTP_200_OK,
     HTTP_404_NOT_FOUND,
+    READ_ONLY_GIT_COMMANDS,
     SUPPORTED_GIT_COMMANDS,
     GitOutput,
 )
-from airflow_code_editor.fs import RootFS
+from airflow_code_editor.fs import get_root_fs
 from airflow_code_editor.utils import (
     Response,
     get_current_user,
     get_plugin_boolean_config,
     get_plugin_config,
+    get_plugin_int_config,
     get_root_folder,
     make_response,
     normalize_path,
@@ -46,15 +65,107 @@ from airflow_code_editor.utils import (
 __all__ = [
     'git_enabled',
     'execute_git_command',
+    'git_ls_tree',
+    'is_object_id',
+    'GitOutputStream',
 ]
 
+GITLINK_MODE = 0o160000  # submodule tree entry mode
+CAT_FILE_PIPELINE_SIZE = 256  # max number of requests written to a cat-file process before reading the responses
+OBJECT_CACHE_ITEM_OVERHEAD = 100  # estimated memory used by an object cache item (in addition to the data)
+STREAM_CHUNK_SIZE = 65536  # max size of the output chunks of a streamed git command
+STREAM_MAX_STDERR = 65536  # max size of the error output of a streamed git command
+OBJECT_ID_RE = re.compile(r'[0-9a-f]{40}|[0-9a-f]{64}')  # sha1/sha256 object id
+
+_object_cache: Optional[LRUCache] = None
+
 
 def git_enabled() -> bool:
     "Return true if git is enabled in the configuration"
     return get_plugin_boolean_config('git_enabled')
 
 
-_execute_git_command_lock = threading.Lock()
+# Options of the branch/tag commands listing the branches/tags (read-only)
+LIST_OPTIONS = frozenset(['-a', '--all', '-r', '--remotes', '-l', '--list', '-v', '-vv', '--verbose'])
+
+
+class ReadWriteLock:
+    """
+    Readers-writer lock: many concurrent readers (up to a limit) or a single writer.
+    Waiting writers have priority over new readers.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0  # number of active readers
+        self._writer = False  # true if a writer is active
+        self._writers_waiting = 0  # number of waiting writers
+
+    @contextmanager
+    def read_lock(self, max_readers: int = 0) -> Generator[None, None, None]:
+        "Acquire the lock for reading (max_readers limits the concurrent readers, 0 for unlimited)"
+        with self._cond:
+            while self._writer or self._writers_waiting or (max_readers > 0 and self._readers >= max_readers):
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                self._cond.notify_all()
+
+    @contextmanager
+    def write_lock(self) -> Generator[None, None, None]:
+        "Acquire the lock for writing (exclusive access)"
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+_git_lock = ReadWriteLock()
+_init_git_repo_lock = threading.Lock()
+_repository_changes = 0  # number of commands changing the repository
+
+
+def is_read_only_command(git_args: List[str]) -> bool:
+    "Check if a git command doesn't change the repository/files"
+    git_cmd = git_args[0] if git_args else None
+    if git_cmd in READ_ONLY_GIT_COMMANDS:
+        return True
+    # List branches/tags
+    return git_cmd in ('branch', 'tag') and all(arg in LIST_OPTIONS for arg in git_args[1:])
+
+
+def repository_changed() -> None:
+    "The repository was changed by a git command, restart the cat-file processes"
+    global _repository_changes
+    _repository_changes += 1
+    close_cat_file_processes()
+
+
+def get_repository_changes() -> int:
+    "Return the number of commands that changed the repository"
+    return _repository_changes
+
+
+def git_lock(git_args: List[str]):
+    "Return the lock for executing a git command - read-only commands are executed concurrently"
+    if is_read_only_command(git_args):
+        return _git_lock.read_lock(get_plugin_int_config('git_max_concurrent_reads'))
+    else:
+        return _git_lock.write_lock()
 
 
 class CompletedGitCommand:
@@ -95,7 +206,7 @@ class CompletedGitCommand:
 
 
 def execute_git_command(git_args: List[str]) -> CompletedGitCommand:
-    with _execute_git_command_lock:
+    with git_lock(git_args):
         logging.info(' '.join(git_args))
         git_cmd = git_args[0] if git_args else None
         stdout: GitOutput = None
@@ -110,8 +221,17 @@ def execute_git_command(git_args: List[str]) -> CompletedGitCommand:
                 stdout = handler(git_args)
             # Git commands
             elif git_cmd in SUPPORTED_GIT_COMMANDS:
-                git_default_args = shlex.split(get_plugin_config('git_default_args'))
-                returncode, stdout, stderr = git_call(git_default_args + git_args, capture_output=True)
+                # Read the objects from the persistent cat-file processes
+                result = git_cat_file(git_args) if git_cmd == 'cat-file' else None
+                if result is not None:
+                    returncode, stdout, stderr = result
+                else:
+                    git_default_args = shlex.split(get_plugin_config('git_default_args'))
+                    returncode, stdout, stderr = git_call(git_default_args + git_args, capture_output=True)
+                    if git_cmd == 'cat-file' and returncode == 0 and cat_file_object_id(git_args):
+                        write_object_cache('cat-file', git_args[2], stdout)
+                if not is_read_only_command(git_args):
+                    repository_changed()
             else:
                 stdout = None
                 stderr = 'Command not supported: git {0}'.format(' '.join(git_args))
@@ -131,6 +251,104 @@ def execute_git_command(git_args: List[str]) -> CompletedGitCommand:
             return CompletedGitCommand(git_args, returncode, stdout, stderr)
 
 
+class GitOutputStream:
+    """
+    Output of a read-only git command, produced while the command runs, without buffering it.
+    The output is truncated after max_bytes bytes or max_lines lines (0 for unlimited),
+    terminating the command (returncode is the status of the terminated command).
+    returncode, stderr and truncated are set after the iteration.
+    """
+
+    def __init__(self, git_args: List[str], max_bytes: int = 0, max_lines: int = 0) -> None:
+        if not is_read_only_command(git_args):
+            # The output is sent to a client while the command runs, a command changing the repository
+            # would keep the exclusive lock for the whole response
+            raise ValueError('Only read-only commands can be streamed: git {0}'.format(' '.join(git_args)))
+        self.git_args = git_args
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.returncode: Optional[int] = None
+        self.stderr: GitOutput = None
+        self.truncated = False  # True if the output was truncated by the limits
+
+    @property
+    def git_cmd(self):
+        return self.git_args[0] if self.git_args else None
+
+    def __iter__(self) -> Iterator[bytes]:
+        if self.git_cmd not in SUPPORTED_GIT_COMMANDS or not git_enabled():
+            # Local commands, git disabled
+            result = execute_git_command(self.git_args)
+            self.returncode = result.returncode
+            self.stderr = result.stderr
+            stdout = result.stdout or b''
+            yield from self.limit(iter([stdout.encode('utf-8') if isinstance(stdout, str) else stdout]))
+            return
+        logging.info(' '.join(self.git_args))
+        git_default_args = shlex.split(get_plugin_config('git_default_args'))
+        # The error output is written to a temporary file (filling the stderr pipe would deadlock)
+        with tempfile.TemporaryFile() as stderr:
+            # The lock is held only while starting the command, not while the client receives the output
+            with git_lock(self.git_args):
+                init_git_repo()
+                try:
+                    process = subprocess.Popen(
+                        args=[get_plugin_config('git_cmd')] + git_default_args + self.git_args,
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=stderr,
+                        cwd=get_root_folder(),
+                        env=prepare_git_env(),
+                    )
+                except (FileNotFoundError, PermissionError):
+                    self.returncode = 127
+                    self.stderr = b'git command not found'
+                    return
+            try:
+                yield from self.limit(self.read_chunks(process.stdout))  # type: ignore
+            finally:
+                # Terminate the command if the output was truncated or the client disconnected
+                if process.poll() is None:
+                    process.kill()
+                self.returncode = process.wait()
+                process.stdout.close()  # type: ignore
+                stderr.seek(0)
+                self.stderr = stderr.read(STREAM_MAX_STDERR)
+
+    @staticmethod
+    def read_chunks(f: IO[bytes]) -> Iterator[bytes]:
+        "Read the available output, without waiting for a full chunk"
+        while True:
+            chunk = f.read1(STREAM_CHUNK_SIZE)  # type: ignore
+            if not chunk:
+                return
+            yield chunk
+
+    def limit(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        "Apply the bytes/lines limits to the output chunks"
+        total_bytes = 0
+        total_lines = 0
+        for chunk in chunks:
+            size = len(chunk)
+            if self.max_bytes:
+                size = min(size, self.max_bytes - total_bytes)
+            if self.max_lines and total_lines + chunk.count(b'\n', 0, size) >= self.max_lines:
+                # Cut the chunk after the last allowed line
+                pos = -1
+                for _ in range(self.max_lines - total_lines):
+                    pos = chunk.index(b'\n', pos + 1)
+                size = pos + 1
+            data = chunk[:size]
+            total_bytes += len(data)
+            total_lines += data.count(b'\n')
+            if data:
+                yield data
+            if (self.max_bytes and total_bytes >= self.max_bytes) or (self.max_lines and total_lines >= self.max_lines):
+                # Limit reached, check if there is more output
+                self.truncated = size < len(chunk) or any(chunks)
+                return
+
+
 def git_ls_local(git_args: List[str]) -> str:
     "'git ls-tree' like output for local folders"
     long_ = False  # long format
@@ -144,7 +362,7 @@ def git_ls_local(git_args: List[str]) -> str:
     path = git_args[1] if len(git_args) > 1 else ''
     path = normalize_path(path.split('#', 1)[0])
     result = []
-    root_fs = RootFS()
+    root_fs = get_root_fs()
     for item in root_fs.path(path).iterdir(show_ignored_entries=all_):
         if item.is_dir():
             type_ = 'tree'
@@ -167,7 +385,7 @@ def git_mounts(git_args: List[str]) -> str:
 
 def git_rm_local(git_args: List[str]) -> str:
     "Delete local files/directories"
-    root_fs = RootFS()
+    root_fs = get_root_fs()
     for arg in git_args[1:]:
         if arg:
             root_fs.path(arg).delete()
@@ -178,7 +396,7 @@ def git_mv_local(git_args: List[str]) -> str:
     "Rename/Move local files"
     if len(git_args) < 3:
         raise Exception('Missing source/destination args')
-    root_fs = RootFS()
+    root_fs = get_root_fs()
     target = git_args[-1]
     for arg in git_args[1:-1]:
         source = root_fs.path(arg)
@@ -221,6 +439,335 @@ def git_call(argv: List[str], capture_output: bool = False) -> Tuple[int, bytes,
         return 127, b'', b'git command not found'
 
 
+class GitObject(NamedTuple):
+    "Object read by a cat-file process"
+
+    oid: str  # object id
+    type: str  # blob, tree, commit or tag
+    size: int  # object size
+    data: Optional[bytes] = None  # object contents (None for --batch-check)
+
+
+class GitTreeEntry(NamedTuple):
+    "Tree entry ('git ls-tree -l' output line)"
+
+    mode: int  # file mode
+    type: str  # blob, tree or commit (submodule)
+    oid: str  # object id
+    size: Optional[int]  # blob size (None for trees and submodules)
+    name: str  # entry name
+
+
+class GitCatFile:
+    """
+    Long-lived 'git cat-file --batch' (or --batch-check) process, reading the objects over a pipe
+    instead of forking a git process for each object.
+    The process is restarted on failure and terminated after idle_timeout seconds of inactivity.
+    """
+
+    def __init__(self, cwd: Path, argv: List[str], batch_check: bool = False, idle_timeout: float = 60) -> None:
+        self.cwd = cwd
+        self.argv = argv + ['cat-file', '--batch-check' if batch_check else '--batch']
+        self.batch_check = batch_check
+        self.idle_timeout = idle_timeout
+        self.process: Optional[subprocess.Popen] = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+
+    def start(self) -> None:
+        "Start the cat-file process"
+        self.process = subprocess.Popen(
+            args=self.argv,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.cwd,
+            env=prepare_git_env(),
+        )
+        self.closed = threading.Event()
+        threading.Thread(
+            target=self.close_when_idle,
+            args=(self.process, self.closed),
+            name='code_editor_cat_file',
+            daemon=True,
+        ).start()
+
+    def close(self) -> None:
+        "Terminate the cat-file process"
+        with self.lock:
+            self._close()
+
+    def _close(self) -> None:
+        if self.process is not None:
+            process = self.process
+            self.process = None
+            self.closed.set()
+            try:
+                process.stdin.close()  # type: ignore
+                process.wait(timeout=1)
+            except Exception:
+                process.kill()
+                process.wait()
+            process.stdout.close()  # type: ignore
+
+    def close_when_idle(self, process: subprocess.Popen, closed: threading.Event) -> None:
+        "Terminate the process after idle_timeout seconds of inactivity"
+        timeout = self.idle_timeout
+        while not closed.wait(timeout):
+            with self.lock:
+                if self.process is not process:
+                    return
+                idle = time.monotonic() - self.last_used
+                if idle >= self.idle_timeout:
+                    logging.debug('Closing idle git cat-file process %s', process.pid)
+                    self._close()
+                    return
+            timeout = self.idle_timeout - idle
+
+    def read(self, names: Sequence[str]) -> List[Optional[GitObject]]:
+        "Read the objects (None for the missing objects), restarting the process on failure"
+        with self.lock:
+            try:
+                for attempt in range(2):
+                    if self.process is None or self.process.poll() is not None:
+                        self._close()
+                        self.start()
+                    try:
+                        return self._read(names)
+                    except (OSError, EOFError, ValueError) as ex:
+                        # Broken pipe or unexpected output - the process state is unknown
+                        logging.warning('git cat-file failure: %s', ex)
+                        self._close()
+                        if attempt:
+                            raise
+                return []
+            finally:
+                self.last_used = time.monotonic()
+
+    def _read(self, names: Sequence[str]) -> List[Optional[GitObject]]:
+        stdin = self.process.stdin  # type: ignore
+        stdout = self.process.stdout  # type: ignore
+        result: List[Optional[GitObject]] = []
+        # The requests are pipelined in small groups (filling the pipes would deadlock)
+        for i in range(0, len(names), CAT_FILE_PIPELINE_SIZE):
+            group = names[i : i + CAT_FILE_PIPELINE_SIZE]
+            stdin.write(b''.join(name.encode('utf-8') + b'\n' for name in group))
+            stdin.flush()
+            for _ in group:
+                header = stdout.readline()
+                if not header.endswith(b'\n'):
+                    raise EOFError('unexpected end of output')
+                if header.endswith((b' missing\n', b' ambiguous\n')):
+                    result.append(None)
+                    continue
+                oid, type_, size = header.decode('utf-8').split()
+                data = None
+                if not self.batch_check:
+                    data = stdout.read(int(size) + 1)
+                    if len(data) != int(size) + 1:
+                        raise EOFError('unexpected end of output')
+                    data = data[:-1]
+                result.append(GitObject(oid, type_, int(size), data))
+        return result
+
+
+_cat_file_processes: Dict[Tuple[Path, Tuple[str, ...], bool], GitCatFile] = {}
+_cat_file_processes_lock = threading.Lock()
+
+
+def get_cat_file(batch_check: bool = False) -> Optional[GitCatFile]:
+    "Get the persistent cat-file process of the repository (None if disabled)"
+    idle_timeout = get_plugin_int_config('git_batch_idle_timeout')
+    if idle_timeout <= 0 or not git_enabled():
+        return None
+    cwd = get_root_folder()
+    argv = [get_plugin_config('git_cmd')] + shlex.split(get_plugin_config('git_default_args'))
+    key = (cwd, tuple(argv), batch_check)
+    with _cat_file_processes_lock:
+        cat_file = _cat_file_processes.get(key)
+        if cat_file is None or cat_file.idle_timeout != idle_timeout:
+            cat_file = _cat_file_processes[key] = GitCatFile(cwd, argv, batch_check, idle_timeout)
+        return cat_file
+
+
+def close_cat_file_processes() -> None:
+    "Terminate the cat-file processes (the next reads start new processes)"
+    with _cat_file_processes_lock:
+        cat_files = list(_cat_file_processes.values())
+    for cat_file in cat_files:
+        cat_file.close()
+
+
+def git_cat_file(git_args: List[str]) -> Optional[Tuple[int, bytes, bytes]]:
+    "Execute 'git cat-file -p/-t/-s <object>' using the persistent cat-file processes (None if not supported)"
+    if len(git_args) != 3 or git_args[1] not in ('-p', '-t', '-s') or '\n' in git_args[2]:
+        return None
+    option, name = git_args[1:]
+    if cat_file_object_id(git_args):
+        data = read_object_cache('cat-file', name)
+        if data is not None:
+            return 0, data, b''
+    cat_file = get_cat_file(batch_check=option != '-p')
+    if cat_file is None:
+        return None
+    try:
+        obj = cat_file.read([name])[0]
+    except (OSError, EOFError, ValueError):
+        return None  # fallback to git cat-file
+    if obj is None:
+        return 128, b'', f'fatal: Not a valid object name {name}\n'.encode('utf-8')
+    elif option == '-t':
+        return 0, f'{obj.type}\n'.encode('utf-8'), b''
+    elif option == '-s':
+        return 0, f'{obj.size}\n'.encode('utf-8'), b''
+    elif obj.type == 'tree':  # the trees are formatted by git
+        return None
+    if cat_file_object_id(git_args):
+        write_object_cache('cat-file', name, obj.data or b'')
+    return 0, obj.data or b'', b''
+
+
+def parse_tree(data: bytes, oid_size: int) -> List[Tuple[int, str, str]]:
+    "Parse a tree object, return a list of (mode, oid, name)"
+    result = []
+    i = 0
+    while i < len(data):
+        space = data.index(b' ', i)
+        nul = data.index(b'\0', space)
+        mode = int(data[i:space], 8)
+        name = data[space + 1 : nul].decode('utf-8', errors='replace')
+        oid = data[nul + 1 : nul + 1 + oid_size].hex()
+        result.append((mode, oid, name))
+        i = nul + 1 + oid_size
+    return result
+
+
+def is_blob(mode: int) -> bool:
+    "Check if a tree entry mode is a blob (file or symlink)"
+    return not stat.S_ISDIR(mode) and mode != GITLINK_MODE
+
+
+def git_ls_tree(tree_ish: str) -> Optional[List[GitTreeEntry]]:
+    """
+    List the contents of a tree object with the sizes of the blobs (like 'git ls-tree -l'),
+    using the persistent cat-file processes. Return None if the cat-file processes are disabled.
+    """
+    if '\n' in tree_ish:
+        return None
+    if is_object_id(tree_ish):
+        entries = read_object_cache('ls-tree', tree_ish)
+        if entries is not None:
+            return entries
+    with git_lock(['ls-tree']):
+        init_git_repo()
+        cat_file = get_cat_file()
+        cat_file_check = get_cat_file(batch_check=True)
+        if cat_file is None or cat_file_check is None:
+            return None
+        try:
+            tree = cat_file.read([tree_ish])[0]
+            if tree is not None and tree.type != 'tree':
+                # Peel commits/tags (<rev>:<path>^{tree} would be a path)
+                tree = cat_file.read([tree.oid + '^{tree}'])[0]
+            if tree is None:
+                return []
+            cached = read_object_cache('ls-tree', tree.oid)
+            if cached is not None:
+                return cached
+            entries = parse_tree(tree.data or b'', len(tree.oid) // 2)
+            sizes = cat_file_check.read([oid for mode, oid, _ in entries if is_blob(mode)])
+        except (OSError, EOFError, ValueError):
+            return None  # fallback to git ls-tree
+        result = []
+        blob_sizes = iter(sizes)
+        for mode, oid, name in entries:
+            if stat.S_ISDIR(mode):
+                result.append(GitTreeEntry(mode, 'tree', oid, None, name))
+            elif not is_blob(mode):
+                result.append(GitTreeEntry(mode, 'commit', oid, None, name))
+            else:
+                obj = next(blob_sizes)
+                result.append(GitTreeEntry(mode, 'blob', oid, obj.size if obj is not None else None, name))
+        write_object_cache('ls-tree', tree.oid, result)
+        if is_object_id(tree_ish):
+            write_object_cache('ls-tree', tree_ish, result)
+        return result
+
+
+def is_object_id(name: str) -> bool:
+    "Check if a name is a full object id (the content of the objects addressed by id never changes)"
+    return OBJECT_ID_RE.fullmatch(name) is not None
+
+
+def cat_file_object_id(git_args: List[str]) -> bool:
+    "Check if a cat-file command pretty-prints an object addressed by id (the output can be cached)"
+    return len(git_args) == 3 and git_args[1] == '-p' and is_object_id(git_args[2])
+
+
+def sizeof_object(value: Any) -> int:
+    "Estimate the memory used by a cached object"
+    if isinstance(value, bytes):
+        return OBJECT_CACHE_ITEM_OVERHEAD + len(value)
+    return OBJECT_CACHE_ITEM_OVERHEAD + sum(OBJECT_CACHE_ITEM_OVERHEAD + len(entry.name) for entry in value)
+
+
+def get_object_cache() -> Optional[LRUCache]:
+    "Get the in-memory git object cache (None if disabled)"
+    global _object_cache
+    max_size = get_plugin_int_config('git_object_cache_size')
+    if max_size <= 0:
+        return None
+    if _object_cache is None or _object_cache.max_size != max_size:
+        _object_cache = LRUCache(max_size, sizeof=sizeof_object)
+    return _object_cache
+
+
+def get_object_cache_path(oid: str) -> Optional[Path]:
+    "Get the path of an object in the disk cache (None if disabled)"
+    directory = get_plugin_config('git_object_cache_directory')
+    if not directory:
+        return None
+    return Path(directory) / oid[:2] / oid[2:]
+
+
+def read_object_cache(kind: str, oid: str) -> Any:
+    "Get an immutable object (cat-file output or ls-tree entries) from the memory cache or from the disk cache"
+    cache = get_object_cache()
+    if cache is not None:
+        value = cache.get((kind, oid))
+        if value is not None:
+            return value
+    path = get_object_cache_path(oid) if kind == 'cat-file' else None
+    if path is None:
+        return None
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if cache is not None:
+        cache.set((kind, oid), data)
+    return data
+
+
+def write_object_cache(kind: str, oid: str, value: Any) -> None:
+    "Add an immutable object to the memory cache (the cat-file outputs are also stored in the disk cache)"
+    cache = get_object_cache()
+    if cache is not None:
+        cache.set((kind, oid), value)
+    path = get_object_cache_path(oid) if kind == 'cat-file' else None
+    if path is None or path.exists():
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file, the readers never see partial objects
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            f.write(value)
+        os.replace(f.name, path)
+    except OSError as ex:
+        logging.warning('Error writing git object cache %s: %s', path, ex)
+
+
 def get_default_branch() -> str:
     stdout = git_call(['config', '--global', 'init.defaultBranch'], capture_output=True)[1]
     default_branch = stdout.decode('utf8').strip('\n')
@@ -231,17 +778,20 @@ def init_git_repo() -> None:
     "Initialize the git repository in root folder"
     cwd: Path = get_root_folder()
     if git_enabled() and not (cwd / '.git').exists() and get_plugin_boolean_config('git_init_repo'):
-        git_call(['init', '-b', get_default_branch(), '.'])
-        gitignore = cwd / '.gitignore'
-        if not gitignore.exists():
-            with gitignore.open('w') as f:
-                ignored_entries = get_plugin_config("ignored_entries").split(",")
-                for entry in ignored_entries:
-                    entry = entry.strip()
-                    if entry != ".*":
-                        f.write(f"{entry}\n")
-            git_call(['add', '.gitignore'])
-        git_call(['commit', '-m', 'Initial commit'])
+        with _init_git_repo_lock:  # read-only commands are executed concurrently
+            if (cwd / '.git').exists():
+                return
+            git_call(['init', '-b', get_default_branch(), '.'])
+            gitignore = cwd / '.gitignore'
+            if not gitignore.exists():
+                with gitignore.open('w') as f:
+                    ignored_entries = get_plugin_config("ignored_entries").split(",")
+                    for entry in ignored_entries:
+                        entry = entry.strip()
+                        if entry != ".*":
+                            f.write(f"{entry}\n")
+                git_call(['add', '.gitignore'])
+            git_call(['commit', '-m', 'Initial commit'])
 
 
 def prepare_git_env() -> Dict[str, str]:
@@ -251,6 +801,8 @@ def prepare_git_env() -> Dict[str, str]:
     env['GIT_TERMINAL_PROMPT'] = '0'
     env['GIT_ASKPASS'] = '/bin/true'
     env['GIT_EDITOR'] = '/bin/false'
+    # Don't take optional locks (e.g. git status refreshing the index), read-only commands are executed concurrently
+    env['GIT_OPTIONAL_LOCKS'] = '0'
     # Author
     git_author_name = get_plugin_config('git_author_name')
     if not git_author_name:
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+#
+#   Copyright 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+from airflow_code_editor.utils import get_plugin_config
+
+__all__ = [
+    "PathMatcher",
+    "get_path_matcher",
+    "get_ignored_entries",
+    "get_ignored_entries_matcher",
+    "get_ignore_files",
+    "check_ignores",
+]
+
+PATH_MATCHER_CACHE_SIZE = 128
+
+
+class Rule(NamedTuple):
+    "Compiled glob pattern"
+
+    pattern: str  # original pattern
+    regex: str  # regular expression matching the relative paths
+    negate: bool  # pattern starting with ! (re-include the matching paths)
+    dir_only: bool  # pattern ending with / (match only directories)
+    prefix: Optional[List[str]]  # leading components without wildcards (None for unanchored patterns)
+
+
+def translate_glob(pattern: str) -> str:
+    """
+    Translate a glob into a regular expression, using the gitignore rules:
+    * and ? don't match /, **/ matches zero or more directories, /** matches everything inside
+    """
+    result = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                if pattern.startswith("**/", i):
+                    result.append("(?:.*/)?")
+                    i += 3
+                    continue
+                elif i + 2 == n:
+                    result.append(".*")
+                    i += 2
+                    continue
+            result.append("[^/]*")
+            while i + 1 < n and pattern[i + 1] == "*":
+                i += 1
+        elif c == "?":
+            result.append("[^/]")
+        elif c == "[":
+            j = i + 1
+            if j < n and pattern[j] in "!^":
+                j += 1
+            if j < n and pattern[j] == "]":
+                j += 1
+            j = pattern.find("]", j)
+            if j == -1:
+                result.append(re.escape(c))
+            else:
+                chars = pattern[i + 1 : j].replace("\\", "\\\\")
+                if chars[0] in "!^":
+                    chars = "^" + chars[1:]
+                result.append(f"[{chars}]")
+                i = j
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            result.append(re.escape(pattern[i]))
+        else:
+            result.append(re.escape(c))
+        i += 1
+    return "".join(result)
+
+
+def compile_rule(pattern: str) -> Optional[Rule]:
+    "Compile a gitignore-style pattern (None for blank lines and comments)"
+    original = pattern
+    pattern = pattern.strip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    elif pattern.startswith(("\\!", "\\#")):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    # Patterns containing a / are relative to the walk root, the others match the name at any level
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    regex = translate_glob(pattern)
+    prefix: Optional[List[str]] = None
+    if anchored:
+        prefix = []
+        for part in pattern.split("/")[:-1]:
+            if any(c in part for c in "*?[\\"):
+                break
+            prefix.append(part)
+    else:
+        regex = "(?:.*/)?" + regex
+    return Rule(original, regex, negate, dir_only, prefix)
+
+
+class PathMatcher:
+    """
+    Compiled list of gitignore-style glob patterns, matching paths relative to the walk root.
+    Without negated patterns, all the patterns are combined into a single regex.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.rules: List[Rule] = [rule for rule in (compile_rule(pattern) for pattern in patterns) if rule is not None]
+        self.negate = any(rule.negate for rule in self.rules)
+        self.regexes: List[Pattern[str]] = [re.compile(rule.regex + r"\Z", re.DOTALL) for rule in self.rules]
+        self.file_regex = self.combine([rule for rule in self.rules if not rule.dir_only])
+        self.dir_regex = self.combine(self.rules)
+
+    @staticmethod
+    def combine(rules: List[Rule]) -> Optional[Pattern[str]]:
+        "Combine the rules into a single regex"
+        if not rules:
+            return None
+        return re.compile("|".join(f"(?:{rule.regex})" for rule in rules) + r"\Z", re.DOTALL)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def check(self, rel_path: str, is_dir: bool = False) -> Optional[bool]:
+        "Return True if the path matches the patterns, False if it is re-included by a ! pattern, None otherwise"
+        if not self.negate:
+            regex = self.dir_regex if is_dir else self.file_regex
+            return True if regex is not None and regex.match(rel_path) is not None else None
+        for rule, regex in zip(reversed(self.rules), reversed(self.regexes)):
+            if (is_dir or not rule.dir_only) and regex.match(rel_path):
+                return not rule.negate
+        return None
+
+    def match(self, rel_path: str, is_dir: bool = False) -> bool:
+        "Check if a path matches the patterns (the last matching pattern wins)"
+        return bool(self.check(rel_path, is_dir))
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        "Check if a path, or any of its parent directories, matches the patterns"
+        parts = rel_path.split("/")
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), is_dir=True):
+                return True
+        return self.match(rel_path, is_dir)
+
+    def may_match_dir(self, rel_dir: str) -> bool:
+        "Check if a directory may contain files matching the patterns"
+        dir_parts = rel_dir.split("/")
+        for rule in self.rules:
+            if rule.negate:
+                continue
+            if rule.prefix is None:
+                return True
+            # Compare the directory with the pattern leading components without wildcards
+            n = min(len(rule.prefix), len(dir_parts))
+            if rule.prefix[:n] == dir_parts[:n]:
+                return True
+        return False
+
+
+@lru_cache(maxsize=PATH_MATCHER_CACHE_SIZE)
+def get_path_matcher(patterns: Tuple[str, ...]) -> PathMatcher:
+    "Get a compiled path matcher (compiled matchers are cached)"
+    return PathMatcher(patterns)
+
+
+def get_ignored_entries() -> List[str]:
+    "Return the patterns of the entries excluded from the file/directory lists"
+    return get_plugin_config("ignored_entries").split(",")
+
+
+def get_ignored_entries_matcher() -> PathMatcher:
+    "Get the compiled matcher of the ignored entries (cached per configuration)"
+    return get_path_matcher(tuple(get_ignored_entries()))
+
+
+def get_ignore_files() -> List[str]:
+    "Return the names of the ignore files (e.g. .gitignore) read while walking the directories"
+    return [name.strip() for name in get_plugin_config("ignore_files").split(",") if name.strip()]
+
+
+def check_ignores(ignores: Sequence[Tuple[str, PathMatcher]], path: str, is_dir: bool = False) -> bool:
+    """
+    Check if a path is ignored by the ignore files of its parent directories.
+    ignores is a list of (directory, matcher), from the outermost directory;
+    the patterns of the inner directories override the outer ones.
+    """
+    for dir_path, matcher in reversed(ignores):
+        result = matcher.check(path[len(dir_path) :].lstrip("/"), is_dir)
+        if result is not None:
+            return result
+    return False
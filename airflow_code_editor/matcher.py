@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+#
+#   Copyright 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License
+
+import re
+import sys
+from functools import lru_cache
+from typing import Generator, Iterable, List, NamedTuple, Optional, Tuple
+
+__all__ = [
+    "SEARCH_MODES",
+    "SEARCH_MODE_LITERAL",
+    "SEARCH_MODE_REGEX",
+    "MatchResult",
+    "Matcher",
+    "get_matcher",
+    "context_windows",
+]
+
+SEARCH_MODE_REGEX = "regex"
+SEARCH_MODE_LITERAL = "literal"
+SEARCH_MODES = (SEARCH_MODE_REGEX, SEARCH_MODE_LITERAL)
+MATCHER_CACHE_SIZE = 128
+REGEX_SPECIAL_CHARS = frozenset(".^$*+?{}[]\\|()")
+
+
+class MatchResult(NamedTuple):
+    "Matching line"
+
+    matching_line: bytes  # matching line
+    matching_lineno: int  # line number (1-based)
+    matching_column_ranges: List[Tuple[int, int]]  # matches column ranges
+    offset: int  # line offset in the buffer
+
+
+def count_lines(buffer, start: int, end: int) -> int:
+    "Count the newlines in buffer[start:end]"
+    if hasattr(buffer, "count"):
+        return buffer.count(b"\n", start, end)
+    else:  # mmap
+        return buffer[start:end].count(b"\n")
+
+
+class Matcher:
+    "Compiled search pattern, matching lines in a buffer"
+
+    def __init__(
+        self, query: str, mode: str = SEARCH_MODE_REGEX, ignore_case: bool = False, whole_word: bool = False
+    ) -> None:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Invalid search mode: {mode}")
+        self.key = (query, mode, ignore_case, whole_word)
+        pattern = query.encode("utf-8")
+        if mode == SEARCH_MODE_REGEX and not REGEX_SPECIAL_CHARS.intersection(query):
+            mode = SEARCH_MODE_LITERAL  # simple pattern, no regex needed
+        # Literal string that must be present in every matching line (used by the search index)
+        self.literal: Optional[bytes] = pattern if mode == SEARCH_MODE_LITERAL else None
+        # Case-sensitive literal patterns are matched with bytes.find instead of the regex engine
+        self.find: Optional[bytes] = pattern if self.literal and not ignore_case and not whole_word else None
+        if mode == SEARCH_MODE_LITERAL:
+            pattern = re.escape(pattern)
+        if whole_word:
+            pattern = rb"\b(?:" + pattern + rb")\b"
+        self.regex = re.compile(pattern, re.MULTILINE | (re.IGNORECASE if ignore_case else 0))
+
+    def line_matches(self, line: bytes) -> List[Tuple[int, int]]:
+        "Return the column ranges of the matches in a line"
+        if self.find is not None:
+            result = []
+            length = len(self.find)
+            i = line.find(self.find)
+            while i != -1:
+                result.append((i, i + length))
+                i = line.find(self.find, i + length)
+            return result
+        else:
+            return [m.span() for m in self.regex.finditer(line)]
+
+    def match(self, buffer, max_count: Optional[int] = None) -> Generator[MatchResult, None, None]:
+        """
+        Yield the matching lines of a buffer (bytes or mmap).
+        The buffer is scanned for the first match and only the matching lines are split,
+        line numbers are computed counting the newlines between two matches.
+        """
+        max_count = max_count or sys.maxsize
+        count = 0
+        pos = 0  # search position
+        lineno = 1  # line number at pos
+        size = len(buffer)
+        while pos < size and count < max_count:
+            if self.find is not None:
+                start = buffer.find(self.find, pos)
+                if start == -1:
+                    return
+            else:
+                m = self.regex.search(buffer, pos)
+                if m is None:
+                    return
+                start = m.start()
+                if start == size and buffer[size - 1 : size] == b"\n":
+                    return  # empty match after the trailing newline, not a line
+            line_start = buffer.rfind(b"\n", pos, start) + 1 or pos
+            line_end = buffer.find(b"\n", start)
+            line_end = size if line_end == -1 else line_end + 1
+            lineno += count_lines(buffer, pos, line_start)
+            line = buffer[line_start:line_end]
+            # Regex matches spanning multiple lines are not line matches
+            col_ranges = self.line_matches(line)
+            if col_ranges:
+                yield MatchResult(line, lineno, col_ranges, line_start)
+                count += 1
+            pos = line_end
+            lineno += 1
+
+    def match_file(self, f, max_count: Optional[int] = None) -> Generator[MatchResult, None, None]:
+        "Yield the matching lines of a file"
+        yield from self.match(f.read(), max_count)
+
+
+@lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def get_matcher(
+    query: str, mode: str = SEARCH_MODE_REGEX, ignore_case: bool = False, whole_word: bool = False
+) -> Matcher:
+    "Get a compiled matcher (compiled matchers are cached)"
+    return Matcher(query, mode=mode, ignore_case=ignore_case, whole_word=whole_word)
+
+
+def context_windows(
+    buffer, matches: Iterable[MatchResult], search_context: int
+) -> Generator[Tuple[int, str, int], None, None]:
+    """
+    Yield the context of the matches as (last matching row, context, context first row),
+    merging the overlapping or adjacent context windows.
+    Context boundaries are found moving from the matching lines offsets, without scanning the whole buffer.
+    """
+    size = len(buffer)
+    group: Optional[Tuple[int, int, int, int]] = None  # first row, first row offset, last row, last matching row
+    end = 0  # offset of the end of the current group
+    for match in matches:
+        lineno = match.matching_lineno
+        if group is not None and lineno - search_context <= group[2] + 1:
+            group = (group[0], group[1], lineno + search_context, lineno)
+        else:
+            if group is not None:
+                yield group[3], buffer[group[1] : end].decode("utf-8"), group[0]
+            # Move back to the first line of the context
+            first_row = lineno
+            start = match.offset
+            while first_row > max(1, lineno - search_context):
+                start = buffer.rfind(b"\n", 0, start - 1) + 1
+                first_row -= 1
+            group = (first_row, start, lineno + search_context, lineno)
+        # Move forward to the last line of the context
+        end = match.offset
+        for _ in range(search_context + 1):
+            end = buffer.find(b"\n", end)
+            end = size if end == -1 else end + 1
+            if end == size:
+                break
+    if group is not None:
+        yield group[3], buffer[group[1] : end].decode("utf-8"), group[0]
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+#
+#   Copyright 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from airflow_code_editor.git import (
+    get_repository_changes,
+    git_call,
+    git_enabled,
+    git_lock,
+    init_git_repo,
+    is_object_id,
+)
+from airflow_code_editor.utils import get_root_folder
+
+__all__ = [
+    "REFS_HEADS",
+    "REFS_REMOTES",
+    "REFS_TAGS",
+    "RefSnapshot",
+    "get_ref_snapshot",
+]
+
+REFS_HEADS = "refs/heads/"  # local branches
+REFS_REMOTES = "refs/remotes/"  # remote branches
+REFS_TAGS = "refs/tags/"  # tags
+FOR_EACH_REF_FORMAT = "%(objectname) %(*objectname) %(refname)"
+
+_snapshots: Dict[Path, Tuple[Hashable, "RefSnapshot"]] = {}
+_snapshots_lock = threading.Lock()
+
+
+class RefSnapshot:
+    "Snapshot of the repository references (branches, tags and HEAD)"
+
+    def __init__(self, head: Optional[str], refs: Dict[str, str]) -> None:
+        self.head = head  # HEAD target (ref name, or object id for a detached HEAD)
+        self.refs = refs  # ref name -> object id (annotated tags are peeled)
+
+    def names(self, prefix: str) -> List[str]:
+        "Return the sorted short names of the refs starting with prefix (e.g. REFS_TAGS)"
+        return sorted(ref[len(prefix) :] for ref in self.refs if ref.startswith(prefix))
+
+    def resolve(self, name: str) -> Optional[str]:
+        "Resolve a ref name to an object id, following the git rules (None if the name is not a ref)"
+        if is_object_id(name):
+            return None
+        if name == "HEAD":
+            if self.head is None or is_object_id(self.head):
+                return self.head
+            return self.refs.get(self.head)
+        for ref in (
+            name,
+            "refs/" + name,
+            REFS_TAGS + name,
+            REFS_HEADS + name,
+            REFS_REMOTES + name,
+            REFS_REMOTES + name + "/HEAD",
+        ):
+            if ref.startswith("refs/") and ref in self.refs:
+                return self.refs[ref]
+        return None
+
+
+def get_git_dir() -> Path:
+    "Return the git directory of the repository"
+    return get_root_folder() / ".git"
+
+
+def get_refs_stamp(git_dir: Path) -> Optional[Hashable]:
+    """
+    Return a value changing when the refs are changed (None if it can't be computed).
+    The refs are updated by renaming lock files, changing the mtime of HEAD, packed-refs
+    and the directories containing the loose refs.
+    """
+    if not git_dir.is_dir():
+        return None
+    stamps: List[Hashable] = [get_repository_changes()]
+    for path in (git_dir / "HEAD", git_dir / "packed-refs"):
+        try:
+            st = path.stat()
+            stamps.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamps.append(None)
+    for dirpath, _, _ in os.walk(git_dir / "refs"):
+        stamps.append((dirpath, os.stat(dirpath).st_mtime_ns))
+    return tuple(stamps)
+
+
+def read_head(git_dir: Path) -> Optional[str]:
+    "Read the HEAD target (ref name or object id)"
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+    except OSError:
+        return None
+    if head.startswith("ref:"):
+        return head[4:].strip()
+    return head or None
+
+
+def read_ref_snapshot(git_dir: Path) -> Optional[RefSnapshot]:
+    "Read the refs with a single for-each-ref call"
+    with git_lock(["for-each-ref"]):
+        init_git_repo()
+        returncode, stdout, stderr = git_call(["for-each-ref", "--format=" + FOR_EACH_REF_FORMAT], capture_output=True)
+    if returncode != 0:
+        logging.warning("Error reading git refs: %s", stderr.decode("utf-8", errors="replace"))
+        return None
+    refs: Dict[str, str] = {}
+    for line in stdout.decode("utf-8", errors="replace").splitlines():
+        objectname, peeled, refname = line.split(" ", 2)
+        refs[refname] = peeled or objectname
+    return RefSnapshot(read_head(git_dir), refs)
+
+
+def get_ref_snapshot() -> Optional[RefSnapshot]:
+    """
+    Get the refs of the repository (None if git is disabled or the refs can't be read).
+    The snapshot is cached until HEAD, packed-refs or the loose refs change.
+    """
+    if not git_enabled():
+        return None
+    git_dir = get_git_dir()
+    stamp = get_refs_stamp(git_dir)
+    if stamp is not None:
+        with _snapshots_lock:
+            cached = _snapshots.get(git_dir)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+    snapshot = read_ref_snapshot(git_dir)
+    if snapshot is not None and stamp is not None:
+        with _snapshots_lock:
+            _snapshots[git_dir] = (stamp, snapshot)
+    return snapshot
@@ -0,0 +1,508 @@
+#!/usr/bin/env python
+#
+#   Copyright 2019 Andrea Bonomi <andrea.bonomi@gmail.com>
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License
+
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from array import array
+from contextlib import closing
+from pathlib import PurePosixPath
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from psslib.utils import istextfile
+
+from airflow_code_editor.commons import (
+    FS_EVENT_COPY,
+    FS_EVENT_MOVE,
+    FS_EVENT_REMOVE,
+    FS_EVENT_RMDIR,
+    FS_EVENT_WRITE,
+)
+from airflow_code_editor.ignore import get_ignored_entries, get_ignored_entries_matcher
+from airflow_code_editor.utils import (
+    get_plugin_boolean_config,
+    get_plugin_config,
+    get_plugin_int_config,
+)
+
+__all__ = [
+    "SearchIndex",
+    "search_index_enabled",
+    "get_search_index",
+    "get_search_indexes",
+    "on_fs_change",
+    "trigrams",
+]
+
+INDEX_VERSION = "1"
+INSERT_BATCH_SIZE = 1000
+
+# Change kinds
+ADDED = "added"
+MODIFIED = "modified"
+REMOVED = "removed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL,
+    size INTEGER,
+    unindexed INTEGER NOT NULL DEFAULT 0,
+    trigrams BLOB
+);
+CREATE TABLE IF NOT EXISTS trigrams (
+    trigram INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    PRIMARY KEY (trigram, file_id)
+) WITHOUT ROWID;
+"""
+
+
+def search_index_enabled() -> bool:
+    "Return true if the search index is enabled in the configuration"
+    return get_plugin_boolean_config("search_index")
+
+
+def get_search_index_directory() -> str:
+    "Return the directory where the search indexes are stored"
+    return get_plugin_config("search_index_directory") or os.path.join(
+        tempfile.gettempdir(), "airflow_code_editor_index"
+    )
+
+
+def trigrams(data: bytes) -> Set[int]:
+    "Return the set of (lowercase) trigrams of the given data, encoded as int"
+    data = data.lower()
+    return {(a << 16) | (b << 8) | c for a, b, c in zip(data, data[1:], data[2:])}
+
+
+def sort_key(path: str) -> List[str]:
+    "Sort key matching the order used by RootFS.find_files"
+    return path.split("/")
+
+
+class SearchIndex:
+    "On-disk trigram index of the text files of a mount point"
+
+    def __init__(self, mount_path: str, location: str) -> None:
+        self.mount_path = mount_path  # mount point path (e.g. / or /~logs)
+        self.location = location  # mount location (fs protocol and base path)
+        self.lock = threading.RLock()
+        self.build_lock = threading.Lock()  # serialize the builds
+        self.pending: Optional[List[Tuple[str, str]]] = None  # changes received during a build
+        self.last_reconcile = 0.0  # last reconciliation sweep timestamp
+        self.last_reconcile_result: Dict[str, int] = {}  # changes found by the last reconciliation sweep
+        self.reconcile_lock = threading.Lock()  # serialize the reconciliation sweeps
+        self.reconcile_cursor: Optional[str] = None  # path where the last sweep stopped
+        self.thread: Optional[threading.Thread] = None  # background build/reconciliation
+        self.rebuild_thread: Optional[threading.Thread] = None  # background rebuild
+        self.thread_lock = threading.Lock()
+        key = f"{mount_path}\n{location}".encode("utf-8")
+        self.index_path = os.path.join(get_search_index_directory(), hashlib.sha1(key).hexdigest() + ".sqlite")
+
+    def connect(self, path: Optional[str] = None) -> sqlite3.Connection:
+        "Open a connection to the index database"
+        conn = sqlite3.connect(path or self.index_path, timeout=30)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def exists(self) -> bool:
+        "Return true if the index has been built"
+        return os.path.exists(self.index_path)
+
+    def is_excluded(self, path: str) -> bool:
+        "Check if a path is excluded from the index"
+        parts = PurePosixPath(path).parts[len(PurePosixPath(self.mount_path).parts) :]
+        return get_ignored_entries_matcher().is_ignored("/".join(parts))
+
+    def delete_file(self, conn: sqlite3.Connection, path: str) -> None:
+        "Remove a file from the index"
+        row = conn.execute("SELECT id, trigrams FROM files WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return
+        file_id, packed = row
+        file_trigrams = array("I")
+        file_trigrams.frombytes(packed or b"")
+        conn.executemany(
+            "DELETE FROM trigrams WHERE trigram = ? AND file_id = ?",
+            ((trigram, file_id) for trigram in file_trigrams),
+        )
+        conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def delete_tree(self, conn: sqlite3.Connection, path: str) -> None:
+        "Remove a file or all the files in a directory from the index"
+        prefix = path.rstrip("/") + "/"
+        rows = conn.execute(
+            "SELECT path FROM files WHERE path = ? OR substr(path, 1, ?) = ?",
+            (path, len(prefix), prefix),
+        ).fetchall()
+        for (file_path,) in rows:
+            self.delete_file(conn, file_path)
+
+    def index_file(self, conn: sqlite3.Connection, root_fs, path: str) -> None:
+        "Add (or replace) a file into the index"
+        self.delete_file(conn, path)
+        stat = root_fs.path(path).stat()
+        max_file_size = get_plugin_int_config("search_index_max_file_size")
+        file_trigrams: Set[int] = set()
+        unindexed = 0
+        with root_fs.open(path, "rb") as f:
+            # Binary files are stored without trigrams (they never match)
+            if istextfile(f):
+                f.seek(0)
+                if max_file_size and stat.st_size > max_file_size:
+                    unindexed = 1
+                else:
+                    file_trigrams = trigrams(f.read())
+        packed = array("I", sorted(file_trigrams))
+        cursor = conn.execute(
+            "INSERT INTO files (path, mtime, size, unindexed, trigrams) VALUES (?, ?, ?, ?, ?)",
+            (path, stat.st_mtime, stat.st_size, unindexed, packed.tobytes()),
+        )
+        file_id = cursor.lastrowid
+        conn.executemany(
+            "INSERT INTO trigrams (trigram, file_id) VALUES (?, ?)",
+            ((trigram, file_id) for trigram in packed),
+        )
+
+    def rebuild(self, root_fs) -> Dict[str, Any]:
+        """
+        Build the index from scratch, replacing the current one.
+        The files are walked without holding the index lock; the changes received
+        in the meantime are queued and applied to the new index.
+        """
+        with self.build_lock:
+            start = time.time()
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.index_path), suffix=".tmp")
+            os.close(fd)
+            with self.lock:
+                self.pending = []
+            try:
+                with closing(self.connect(tmp_path)) as conn:
+                    count = 0
+                    for file_path in root_fs.find_files(path=self.mount_path, exclude=get_ignored_entries()):
+                        try:
+                            self.index_file(conn, root_fs, file_path.path)
+                        except Exception as ex:  # unreadable/vanished files are skipped
+                            logging.debug("search index: skip %s: %s", file_path.path, ex)
+                        count += 1
+                        if count % INSERT_BATCH_SIZE == 0:
+                            conn.commit()
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                        [("version", INDEX_VERSION), ("built_at", str(start)), ("updated_at", str(start))],
+                    )
+                    conn.commit()
+                with self.lock:
+                    os.replace(tmp_path, self.index_path)
+                    pending, self.pending = self.pending, None
+                    self.last_reconcile = start
+                    self.reconcile_cursor = None
+                    if pending:
+                        with closing(self.connect()) as conn:
+                            for kind, path in pending:
+                                self.apply_change(conn, root_fs, kind, path)
+                            self.touch(conn)
+                            conn.commit()
+            except BaseException:
+                with self.lock:
+                    self.pending = None
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            logging.info("search index: %s rebuilt in %.2fs", self.mount_path, time.time() - start)
+            return self.status()
+
+    def candidates(self, query: bytes) -> Optional[List[str]]:
+        """
+        Return the paths of the files that may contain the query, sorted in walk order.
+        Return None if the index can't be used for this query.
+        """
+        query_trigrams = trigrams(query)
+        if not query_trigrams or not self.exists():
+            return None
+        placeholders = ",".join("?" * len(query_trigrams))
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT path FROM files WHERE unindexed = 1 "
+                "UNION "
+                "SELECT f.path FROM trigrams t JOIN files f ON f.id = t.file_id "
+                f"WHERE t.trigram IN ({placeholders}) "
+                "GROUP BY t.file_id HAVING COUNT(*) = ?",
+                (*query_trigrams, len(query_trigrams)),
+            ).fetchall()
+        return sorted((row[0] for row in rows), key=sort_key)
+
+    def is_building(self) -> bool:
+        "Return true if the index is being built"
+        return self.pending is not None
+
+    def apply_change(self, conn: sqlite3.Connection, root_fs, kind: str, path: str) -> None:
+        "Add/update (ADDED or MODIFIED) or remove (REMOVED) a file or all the files in a directory"
+        if kind == REMOVED:
+            self.delete_tree(conn, path)
+        elif root_fs.isdir(path):
+            self.delete_tree(conn, path)
+            for file_path in root_fs.find_files(path=path, exclude=get_ignored_entries()):
+                try:
+                    self.index_file(conn, root_fs, file_path.path)
+                except Exception as ex:
+                    logging.debug("search index: skip %s: %s", file_path.path, ex)
+        else:
+            try:
+                self.index_file(conn, root_fs, path)
+            except Exception as ex:
+                logging.debug("search index: skip %s: %s", path, ex)
+
+    def add_path(self, root_fs, path: str) -> None:
+        "Add (or update) a file or all the files in a directory into the index"
+        if not self.is_excluded(path):
+            self.change(root_fs, ADDED, path)
+
+    def remove_path(self, root_fs, path: str) -> None:
+        "Remove a file or all the files in a directory from the index"
+        self.change(root_fs, REMOVED, path)
+
+    def change(self, root_fs, kind: str, path: str) -> None:
+        "Apply a change to the index; if the index is being built, queue it for the new index too"
+        with self.lock:
+            if self.pending is not None:
+                self.pending.append((kind, path))
+            if not self.exists():
+                return  # the index will be built from the files
+            with closing(self.connect()) as conn:
+                self.apply_change(conn, root_fs, kind, path)
+                self.touch(conn)
+                conn.commit()
+
+    def touch(self, conn: sqlite3.Connection) -> None:
+        "Set the index last update timestamp"
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (str(time.time()),))
+
+    def changes(
+        self, root_fs, start_after: Optional[str] = None, max_files: Optional[int] = None
+    ) -> Tuple[List[Tuple[str, str]], Optional[str]]:
+        """
+        Compare the index with the files, walking at most max_files files after the start_after path.
+        Return the list of (change kind, path) - removed files at the end - and the last visited path
+        (None if the walk has been completed).
+        """
+        with closing(self.connect()) as conn:
+            indexed = {path: (mtime, size) for path, mtime, size in conn.execute("SELECT path, mtime, size FROM files")}
+        result: List[Tuple[str, str]] = []
+        last_path: Optional[str] = None
+        count = 0
+        for file_path in root_fs.find_files(
+            path=self.mount_path, exclude=get_ignored_entries(), max_files=max_files, start_after=start_after
+        ):
+            last_path = file_path.path
+            count += 1
+            signature = indexed.pop(file_path.path, None)
+            if signature is None:
+                result.append((ADDED, file_path.path))
+            else:
+                try:
+                    stat = file_path.stat()
+                except Exception:
+                    continue
+                if signature != (stat.st_mtime, stat.st_size):
+                    result.append((MODIFIED, file_path.path))
+        if not max_files or count < max_files:
+            last_path = None  # walk completed
+        # The indexed files in the walked range have been removed
+        after_key = sort_key(start_after) if start_after else None
+        last_key = sort_key(last_path) if last_path else None
+        for path in sorted(indexed, key=sort_key):
+            key = sort_key(path)
+            if (after_key is None or key > after_key) and (last_key is None or key <= last_key):
+                result.append((REMOVED, path))
+        return result, last_path
+
+    def reconcile(self, root_fs) -> Dict[str, int]:
+        """
+        Update the index with the changes not made through RootFS (e.g. git pull).
+        Each sweep checks at most search_index_reconcile_max_files files, resuming where the previous one stopped.
+        """
+        max_files = get_plugin_int_config("search_index_reconcile_max_files")
+        result = {ADDED: 0, MODIFIED: 0, REMOVED: 0}
+        with self.reconcile_lock:
+            self.last_reconcile = time.time()
+            # The walk is made without holding the index lock
+            changes, self.reconcile_cursor = self.changes(root_fs, self.reconcile_cursor, max_files)
+            self.last_reconcile_result = result
+            if not changes:
+                return result
+            with self.lock, closing(self.connect()) as conn:
+                for kind, path in changes:
+                    if kind == REMOVED:
+                        self.delete_file(conn, path)
+                    else:
+                        try:
+                            self.index_file(conn, root_fs, path)
+                        except Exception as ex:
+                            logging.debug("search index: skip %s: %s", path, ex)
+                    result[kind] += 1
+                self.touch(conn)
+                conn.commit()
+        return result
+
+    def maybe_reconcile(self, root_fs) -> None:
+        """
+        Start a reconciliation sweep of local mount points in a background thread,
+        at most every search_index_reconcile_interval seconds
+        """
+        interval = get_plugin_int_config("search_index_reconcile_interval")
+        if interval <= 0 or time.time() - self.last_reconcile < interval:
+            return
+        if root_fs.get_local_path(self.mount_path) is None:
+            # Remote mounts are updated by the change events only
+            return
+        self.last_reconcile = time.time()
+        self.start_background(self.background_reconcile, root_fs)
+
+    def maybe_build(self, root_fs) -> bool:
+        "Return true if the index has been built, otherwise start building it in a background thread"
+        if self.exists():
+            return True
+        self.start_background(self.background_build, root_fs)
+        return False
+
+    def start_background(self, task: Callable[[Any], None], root_fs) -> None:
+        "Run a task in a background thread, unless another task of this index is running"
+        with self.thread_lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.thread = threading.Thread(
+                target=task, args=(root_fs,), name=f"search-index-{task.__name__}", daemon=True
+            )
+            self.thread.start()
+
+    def start_rebuild(self, root_fs) -> None:
+        "Start rebuilding the index in a background thread, unless a rebuild is already running"
+        with self.thread_lock:
+            if self.rebuild_thread is not None and self.rebuild_thread.is_alive():
+                return
+            self.rebuild_thread = threading.Thread(
+                target=self.background_rebuild, args=(root_fs,), name="search-index-rebuild", daemon=True
+            )
+            self.rebuild_thread.start()
+
+    def background_rebuild(self, root_fs) -> None:
+        "Rebuild the index, logging the errors"
+        try:
+            self.rebuild(root_fs)
+        except Exception:
+            logging.exception("search index: %s rebuild failed", self.mount_path)
+
+    def background_build(self, root_fs) -> None:
+        "Build the index if it doesn't exist, logging the errors"
+        try:
+            if not self.exists() and not self.is_building():
+                self.rebuild(root_fs)
+        except Exception:
+            logging.exception("search index: %s build failed", self.mount_path)
+
+    def background_reconcile(self, root_fs) -> None:
+        "Run a reconciliation sweep, logging the errors"
+        try:
+            result = self.reconcile(root_fs)
+            logging.debug("search index: %s reconciled %s", self.mount_path, result)
+        except Exception:
+            logging.exception("search index: %s reconciliation failed", self.mount_path)
+
+    def status(self) -> Dict[str, Any]:
+        "Return the index status (without checking the files, see reconcile)"
+        pending = self.pending
+        result: Dict[str, Any] = {
+            "mount": self.mount_path,
+            "exists": self.exists(),
+            "building": pending is not None,
+            "pending": len(pending or ()),
+        }
+        if not result["exists"]:
+            return result
+        with closing(self.connect()) as conn:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            (files,) = conn.execute("SELECT COUNT(*) FROM files").fetchone()
+        built_at = float(meta.get("built_at", 0))
+        updated_at = float(meta.get("updated_at", built_at))
+        result.update(
+            {
+                "files": files,
+                "built_at": built_at,
+                "updated_at": updated_at,
+                "age": time.time() - updated_at,
+                "reconciled_at": self.last_reconcile,
+                **self.last_reconcile_result,
+            }
+        )
+        return result
+
+
+_indexes: Dict[str, SearchIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(root_fs, path: str) -> Optional[SearchIndex]:
+    "Return the search index for the mount point containing the given path"
+    if not search_index_enabled():
+        return None
+    mount_path, location = root_fs.get_mount_point(path)
+    key = f"{mount_path}\n{location}"
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = SearchIndex(mount_path, location)
+        return index
+
+
+def get_search_indexes(root_fs, mounts: Optional[Iterable[str]] = None) -> List[SearchIndex]:
+    "Return the search indexes for the given mount points (default: all the mount points)"
+    if mounts is None:
+        mounts = ["/"] + [mount_path for mount_path, _, _ in root_fs.mounts]
+    return [index for index in (get_search_index(root_fs, mount) for mount in mounts) if index is not None]
+
+
+def on_fs_change(root_fs, event: str, path: str, target: Optional[str]) -> None:
+    "Update the search indexes after a change made through RootFS"
+    if not search_index_enabled():
+        return
+    removed: List[str] = []
+    added: List[str] = []
+    if event == FS_EVENT_WRITE:
+        added.append(path)
+    elif event == FS_EVENT_COPY and target:
+        added.append(target)
+    elif event in (FS_EVENT_REMOVE, FS_EVENT_RMDIR):
+        removed.append(path)
+    elif event == FS_EVENT_MOVE and target:
+        removed.append(path)
+        added.append(target)
+    for removed_path in removed:
+        index = get_search_index(root_fs, removed_path)
+        if index is not None:
+            index.remove_path(root_fs, removed_path)
+    for added_path in added:
+        index = get_search_index(root_fs, added_path)
+        if index is not None:
+            index.add_path(root_fs, added_path)
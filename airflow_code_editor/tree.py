@@ -29,8 +29,14 @@ from airflow_code_editor.commons import (
     TreeFunc,
     TreeOutput,
 )
-from airflow_code_editor.fs import RootFS
-from airflow_code_editor.git import execute_git_command, git_enabled
+from airflow_code_editor.fs import get_root_fs
+from airflow_code_editor.git import execute_git_command, git_enabled, git_ls_tree
+from airflow_code_editor.refs import (
+    REFS_HEADS,
+    REFS_REMOTES,
+    REFS_TAGS,
+    get_ref_snapshot,
+)
 from airflow_code_editor.utils import always, normalize_path, read_mount_points_config
 
 __all__ = ['get_tree', 'get_stat']
@@ -96,7 +102,7 @@ def get_files_node(path: Optional[str], args: Args) -> TreeOutput:
     long_ = args.get('long') == 'true'  # long format
     all_ = args.get('all') == 'true'  # do not ignore entries
 
-    for item in RootFS().path(path).iterdir(show_ignored_entries=all_):
+    for item in get_root_fs().path(path).iterdir(show_ignored_entries=all_):
         s = item.stat()
         leaf = not item.is_dir()
         if long_:  # Long format
@@ -131,6 +137,14 @@ def prepare_git_output(line: str, icon: str) -> Dict[str, Any]:
     return {'id': name, 'leaf': True, 'icon': icon}
 
 
+def prepare_refs_output(prefix: str, icon: str) -> Optional[TreeOutput]:
+    "Prepare the result items for tags/local branches/remote branches from the refs snapshot"
+    snapshot = get_ref_snapshot()
+    if snapshot is None:
+        return None
+    return [{'id': name, 'leaf': True, 'icon': icon} for name in snapshot.names(prefix)]
+
+
 def prepare_ls_tree_output(line: str) -> Dict[str, Any]:
     "Prepare a result item for ls-tree"
     mode, type_, hash_, size, name = re.split('[\t ]+', line, 4)
@@ -147,7 +161,16 @@ def prepare_ls_tree_output(line: str) -> Dict[str, Any]:
 @node(id='git', label='Git Workspace', icon=ICON_GIT, condition=git_enabled)
 def get_git_node(path: Optional[str], args: Args) -> TreeOutput:
     "List the contents of a git tree object"
-    output = git_command_output('ls-tree', '-l', path or 'HEAD')
+    tree_ish = path or 'HEAD'
+    # Resolve the ref names using the refs snapshot (the objects addressed by id are cached)
+    snapshot = get_ref_snapshot()
+    tree_ish = (snapshot.resolve(tree_ish) if snapshot is not None else None) or tree_ish
+    entries = git_ls_tree(tree_ish)
+    if entries is not None:
+        return [
+            {'id': e.oid, 'label': e.name, 'leaf': e.type != 'tree', 'size': e.size, 'mode': e.mode} for e in entries
+        ]
+    output = git_command_output('ls-tree', '-l', tree_ish)
     return [prepare_ls_tree_output(line) for line in output if line]
 
 
@@ -156,6 +179,9 @@ def get_tags_node(path: Optional[str], args: Args) -> TreeOutput:
     "Get tree tags node"
     if path:
         return get_git_node(path, args)
+    result = prepare_refs_output(REFS_TAGS, ICON_TAGS)
+    if result is not None:
+        return result
     output = git_command_output('tag')
     return [prepare_git_output(line, ICON_TAGS) for line in output if line]
 
@@ -171,6 +197,9 @@ def get_local_branches_node(path: Optional[str], args: Args) -> TreeOutput:
     "Get tree local branches node"
     if path:
         return get_git_node(path, args)
+    result = prepare_refs_output(REFS_HEADS, ICON_LOCAL_BRANCHES)
+    if result is not None:
+        return result
     output = git_command_output('branch')
     return [prepare_git_output(line, ICON_LOCAL_BRANCHES) for line in output if line]
 
@@ -186,6 +215,9 @@ def get_remote_branches_node(path: Optional[str], args: Args) -> TreeOutput:
     "Get tree remote branches node"
     if path:
         return get_git_node(path, args)
+    result = prepare_refs_output(REFS_REMOTES, ICON_REMOTE_BRANCHES)
+    if result is not None:
+        return result
     output = git_command_output('branch', '--remotes')
     return [prepare_git_output(line, ICON_REMOTE_BRANCHES) for line in output if line]
 
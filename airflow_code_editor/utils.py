@@ -14,15 +14,23 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License
 
+import codecs
+import copy
 import itertools
 import json
 import os
-from collections import namedtuple
+import posixpath
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from configparser import ConfigParser
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Optional, cast
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TypeVar, cast
 
-from pygments.lexer import RegexLexer
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexer import Lexer, RegexLexer
+from pygments.lexers import get_lexer_for_filename
 from pygments.token import Text
 
 try:
@@ -112,6 +120,8 @@ except ImportError:
 __all__ = [
     'DummyLexer',
     'always',
+    'get_lexer',
+    'highlight_context',
     'conf',
     'error_message',
     'get_plugin_boolean_config',
@@ -121,9 +131,14 @@ __all__ = [
     'get_current_user',
     'is_enabled',
     'normalize_path',
+    'ordered_map',
+    'TextNormalizer',
+    'normalize_text_chunks',
+    'read_chunks',
     'prepare_api_response',
     'send_file',
     'make_response',
+    'make_stream_response',
     'airflow_version',
     'generate_csrf',
     'read_config_file',
@@ -180,7 +195,14 @@ def get_root_folder() -> Path:
         return Path.cwd()
 
 
-MountPoint = namedtuple('MountPoint', 'path default')
+MountPoint = namedtuple('MountPoint', 'path default cache', defaults=(None,))
+
+
+def parse_bool(value: Optional[str]) -> Optional[bool]:
+    "Parse a boolean option value (None if not set)"
+    if value is None:
+        return None
+    return value.strip().lower() in ('true', 'yes', '1', 'on')
 
 
 def read_mount_points_config() -> Dict[str, MountPoint]:
@@ -209,7 +231,9 @@ def read_mount_points_config() -> Dict[str, MountPoint]:
                 k, v = part.split('=')
                 mount_conf[k] = v
             default = mount_conf['name'] == ROOT_MOUNTPOUNT
-            config[mount_conf['name']] = MountPoint(path=mount_conf['path'], default=default)
+            config[mount_conf['name']] = MountPoint(
+                path=mount_conf['path'], default=default, cache=parse_bool(mount_conf.get('cache'))
+            )
         except Exception:
             pass
 
@@ -278,6 +302,75 @@ def always() -> bool:
     return True
 
 
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(func: Callable[[T], R], iterable: Iterable[T], workers: int, window: int = 0) -> Iterator[R]:
+    """
+    Like map, but func is executed by a pool of threads.
+    The results are yielded in the same order of the items; at most window items
+    are read ahead from the iterable (default: 4 times the number of workers).
+    """
+    if workers <= 1:
+        yield from map(func, iterable)
+        return
+    window = window or workers * 4
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending: deque = deque()
+    try:
+        for item in iterable:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Don't wait for the pending items if the consumer stops early
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+class TextNormalizer:
+    """
+    Streaming text normalization (for the uploaded text files): decode as UTF-8,
+    remove the carriage returns and the trailing whitespace, end with a newline
+    """
+
+    def __init__(self) -> None:
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.pending = ""  # trailing whitespace, written only if followed by other text
+
+    def feed(self, chunk: bytes) -> bytes:
+        "Normalize a chunk of data"
+        text = self.pending + self.decoder.decode(chunk).replace("\r", "")
+        stripped = text.rstrip()
+        self.pending = text[len(stripped) :]
+        return stripped.encode("utf-8")
+
+    def end(self) -> bytes:
+        "Return the normalized end of the data (the trailing whitespace is dropped)"
+        self.decoder.decode(b"", final=True)  # incomplete characters are ignored
+        self.pending = ""
+        return b"\n"
+
+
+def normalize_text_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    "Normalize a text split in chunks (see TextNormalizer)"
+    normalizer = TextNormalizer()
+    for chunk in chunks:
+        data = normalizer.feed(chunk)
+        if data:
+            yield data
+    yield normalizer.end()
+
+
+def read_chunks(f, chunk_size: int = 65536) -> Iterator[bytes]:
+    "Read a file-like object in chunks"
+    return iter(lambda: f.read(chunk_size), b"")
+
+
 class DummyLexer(RegexLexer):
     name = "Dummy"
     aliases = ["dummy"]
@@ -290,6 +383,37 @@ class DummyLexer(RegexLexer):
     }
 
 
+# Search context formatter, copied and customized for each context
+CONTEXT_FORMATTER = HtmlFormatter(linenos=True, cssclass="source", nobackground=True)
+
+
+@lru_cache(maxsize=256)
+def _get_lexer(key: str) -> Lexer:
+    try:
+        return get_lexer_for_filename(key)
+    except Exception:
+        return DummyLexer()
+
+
+def get_lexer(filename: str) -> Lexer:
+    "Get the Pygments lexer for a filename (lexers are cached per extension)"
+    name = posixpath.basename(filename)
+    ext = posixpath.splitext(name)[1]
+    # Files without extension (e.g. Makefile, Dockerfile) are cached by name
+    return _get_lexer("_" + ext if ext else name)
+
+
+def highlight_context(filename: str, context: str, context_first_row: int, row_number: int) -> str:
+    "Highlight a search context, returning HTML"
+    formatter = copy.copy(CONTEXT_FORMATTER)
+    formatter.linenostart = context_first_row
+    formatter.hl_lines = {row_number - context_first_row + 1}
+    try:
+        return highlight(context, get_lexer(filename), formatter)
+    except Exception:
+        return context
+
+
 try:
     from flask_login import current_user  # type: ignore
 
@@ -348,6 +472,10 @@ if FASTAPI:
         "Create a response object"
         return fastapi.Response(content=content, status_code=status, media_type=mimetype or "text/plain")
 
+    def make_stream_response(iterator, mimetype, headers=None) -> fastapi.Response:
+        "Create a response object sending the iterator items as soon as they are produced"
+        return fastapi.responses.StreamingResponse(iterator, media_type=mimetype, headers=headers)
+
     def generate_csrf() -> str:
         "Nothing to do"
         return ""
@@ -399,6 +527,10 @@ else:
             response.headers['Content-Type'] = mimetype
         return response
 
+    def make_stream_response(iterator, mimetype, headers=None) -> flask.Response:
+        "Create a response object sending the iterator items as soon as they are produced"
+        return flask.Response(flask.stream_with_context(iterator), mimetype=mimetype, headers=headers)
+
     def generate_csrf() -> str:
         "Generate a CSRF token"
         return csrf.generate_csrf()
@@ -97,6 +97,17 @@ export function prepareHref(path) {
     return pathname + '/' + path;
 }
 
+export function requestHeaders() {
+    // Return the authorization headers (for requests not made with axios)
+    const headers = {};
+    for (const [key, value] of Object.entries(axios.defaults.headers.common)) {
+        if (typeof value === 'string') {
+            headers[key] = value;
+        }
+    }
+    return headers;
+}
+
 export function splitPath(path) {
     // Split path into head, tail
     if (!path) {
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+
+import asyncio
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+import fsspec
+from fsspec.implementations.asyn_wrapper import AsyncFileSystemWrapper
+
+from airflow_code_editor.api import api
+from airflow_code_editor.async_fs import AsyncRootFS, get_async_root_fs, is_async
+from airflow_code_editor.commons import (
+    FS_EVENT_MKDIR,
+    FS_EVENT_REMOVE,
+    FS_EVENT_WRITE,
+    PLUGIN_NAME,
+)
+from airflow_code_editor.fs import RootFS, add_listener, remove_listener
+from airflow_code_editor.utils import conf
+
+
+class TestAsyncFS(TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        conf.set(PLUGIN_NAME, 'git_init_repo', 'False')
+        conf.set(PLUGIN_NAME, 'root_directory', self.root_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_local(self):
+        async def run():
+            root_fs = get_async_root_fs()
+            path = root_fs.path("dir", "a.txt")
+            assert path.name == "a.txt"
+            assert not await path.exists()
+            await path.write_text("hello\n")
+            assert await path.is_file()
+            assert not await path.is_dir()
+            assert await root_fs.isdir("/dir")
+            assert await root_fs.listdir("/dir") == ["a.txt"]
+            assert await path.read_text() == "hello\n"
+            assert await path.read_bytes() == b"hello\n"
+            assert (await path.info())["size"] == 6
+            await path.unlink()
+            await path.unlink(missing_ok=True)
+            assert not await path.exists()
+
+        asyncio.run(run())
+        assert not (Path(self.root_dir) / "dir" / "a.txt").exists()
+
+    def test_async_filesystem(self):
+        fs = AsyncFileSystemWrapper(fsspec.filesystem("memory"))
+        assert is_async(fs)
+        assert not is_async(fsspec.filesystem("memory"))
+        root_fs = RootFS()
+        root_fs.mount("/~mem", fs)
+        events = []
+
+        def listener(root_fs, event, path, target):
+            events.append((event, path))
+
+        async def run():
+            async_fs = AsyncRootFS(root_fs)
+            path = async_fs.path("/~mem/test_async/dir/a.bin")
+            await path.write_bytes(b"data")
+            assert await path.exists()
+            assert await path.is_file()
+            assert await async_fs.isdir("/~mem/test_async/dir")
+            assert await path.read_bytes() == b"data"
+            assert (await path.info())["size"] == 4
+            await path.unlink()
+            assert not await path.exists()
+
+        add_listener(listener)
+        try:
+            with mock.patch("airflow_code_editor.async_fs.run_in_executor", wraps=asyncio.to_thread) as run_in_executor:
+                asyncio.run(run())
+                # Only the listeners run in the thread pool
+                assert run_in_executor.call_count == 3
+        finally:
+            remove_listener(listener)
+        assert events == [
+            (FS_EVENT_MKDIR, "/~mem/test_async/dir"),
+            (FS_EVENT_WRITE, "/~mem/test_async/dir/a.bin"),
+            (FS_EVENT_REMOVE, "/~mem/test_async/dir/a.bin"),
+        ]
+
+    def test_save_stream(self):
+        async def stream(*chunks):
+            for chunk in chunks:
+                yield chunk
+
+        response = asyncio.run(api.save_stream("folder/a.txt", stream(b"a\r", b"\nb \r\n", b"\r\n"), "text/plain"))
+        assert (Path(self.root_dir) / "folder" / "a.txt").read_bytes() == b"a\nb\n"
+        assert json.loads(response.body)["path"] == "folder/a.txt"
+        asyncio.run(api.save_stream("folder/a.bin", stream(b"a\r\n", b"b"), "application/octet-stream"))
+        assert (Path(self.root_dir) / "folder" / "a.bin").read_bytes() == b"a\r\nb"
+
+    def test_write_stream_remote(self):
+        root_fs = RootFS()
+        root_fs.mount("/~mem", "mem://")
+        root_fs.mount("/~amem", AsyncFileSystemWrapper(fsspec.filesystem("memory")))
+        data = [bytes([i]) * 100000 for i in range(30)]
+
+        async def stream():
+            for chunk in data:
+                yield chunk
+
+        async def run(path):
+            await AsyncRootFS(root_fs).path(path).write_stream(stream())
+
+        for path in ["/~mem/dir/a.bin", "/~amem/test_write_stream/a.bin"]:
+            asyncio.run(run(path))
+            assert root_fs.read_bytes(path) == b"".join(data)
+        root_fs.path("/~mem/b.bin").write_stream(iter(data))
+        assert root_fs.read_bytes("/~mem/b.bin") == b"".join(data)
+
+    def test_write_stream_local(self):
+        target = Path(self.root_dir) / "dag.py"
+        target.write_bytes(b"original\n")
+        target.chmod(0o640)
+        link = Path(self.root_dir) / "link.py"
+        link.symlink_to(target)
+        root_fs = get_async_root_fs()
+        # Local files are written in place: links and file modes are preserved
+        root_fs.root_fs.path("link.py").write_stream(iter([b"new\n"]))
+        assert link.is_symlink()
+        assert target.read_bytes() == b"new\n"
+        assert target.stat().st_mode & 0o777 == 0o640
+
+        async def stream():
+            yield b"async\n"
+
+        asyncio.run(root_fs.path("link.py").write_stream(stream()))
+        assert link.is_symlink()
+        assert target.read_bytes() == b"async\n"
+        assert target.stat().st_mode & 0o777 == 0o640
+
+    def test_write_stream_error(self):
+        target = Path(self.root_dir) / "dag.py"
+        target.write_bytes(b"original\n")
+
+        def failing_stream():
+            yield b"partial"
+            raise ConnectionError("client disconnected")
+
+        async def failing_async_stream():
+            yield b"partial"
+            raise ConnectionError("client disconnected")
+
+        root_fs = get_async_root_fs()
+        with self.assertRaises(ConnectionError):
+            root_fs.root_fs.path("dag.py").write_stream(failing_stream())
+        assert target.read_bytes() == b"original\n"
+        with self.assertRaises(ConnectionError):
+            asyncio.run(root_fs.path("dag.py").write_stream(failing_async_stream()))
+        assert target.read_bytes() == b"original\n"
+        assert [x.name for x in Path(self.root_dir).iterdir()] == ["dag.py"]
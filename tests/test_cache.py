@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+from unittest import TestCase
+
+from airflow_code_editor.cache import LRUCache
+
+
+class TestCache(TestCase):
+
+    def test_lru(self):
+        cache = LRUCache(10, sizeof=len)
+        cache.set("a", "aaaa")
+        cache.set("b", "bbbb")
+        assert cache.get("a") == "aaaa"
+        assert cache.size == 8
+        cache.set("c", "cccc")  # evicts b (least recently used)
+        assert "b" not in cache
+        assert cache.get("b") is None
+        assert cache.get("a") == "aaaa"
+        assert cache.get("c") == "cccc"
+        assert cache.size == 8
+        assert (cache.hits, cache.misses) == (3, 1)
+
+    def test_replace(self):
+        cache = LRUCache(10, sizeof=len)
+        cache.set("a", "aaaa")
+        cache.set("a", "aaaaaa")
+        assert cache.size == 6
+        assert len(cache) == 1
+
+    def test_too_large(self):
+        cache = LRUCache(10, sizeof=len)
+        cache.set("a", "a" * 11)
+        assert "a" not in cache
+        assert cache.size == 0
+        cache.set("b", "b")
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size == 0
@@ -1,10 +1,24 @@
 #!/usr/bin/env python
 
+import os
 import shutil
+import time
+import timeit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from unittest import mock
+
+import fsspec
+import pytest
 
 from airflow_code_editor.commons import PLUGIN_NAME
-from airflow_code_editor.fs import RootFS, split
+from airflow_code_editor.fs import (
+    MountError,
+    RootFS,
+    get_root_fs,
+    reload_root_fs,
+    split,
+)
 from airflow_code_editor.utils import conf
 
 
@@ -78,6 +92,44 @@ def test_mem():
     root_fs.path("/~mem/f.bin").write_bytes(b"data")
 
 
+def test_mount_routing():
+    root_fs = RootFS()
+    fs = fsspec.filesystem("memory")
+    root_fs.mount("/~m1", fs)
+    root_fs.mount("/~m10", fs)
+    root_fs.mount("/a/b", fs)
+    root_fs.mount("/a/c/d", fs)
+    assert root_fs.get_mount_point("/~m1/x")[0] == "/~m1"
+    assert root_fs.get_mount_point("/~m10/x")[0] == "/~m10"
+    assert root_fs.get_mount_point("/~m100/x")[0] == "/"
+    assert root_fs.get_mount_point("/a/b")[0] == "/a/b"
+    assert root_fs.get_mount_point("/a/c/d/e")[0] == "/a/c/d"
+    assert root_fs.get_mount_point("/a/c")[0] == "/"
+    assert root_fs._get_fs_and_path("/~m10/x/y.txt") == (fs, "x/y.txt")
+    assert root_fs.mount_paths == {"/~m1", "/~m10", "/a/b", "/a/c/d"}
+    with pytest.raises(MountError):
+        root_fs.mount("/~m1/x", fs)
+    with pytest.raises(MountError):
+        root_fs.mount("/a", fs)
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="timing benchmark, set RUN_BENCHMARKS=1 to run")
+def test_mount_routing_benchmark():
+    "Path resolution cost does not grow with the number of mount points"
+
+    def resolution_time(root_fs):
+        return min(timeit.repeat(lambda: root_fs._get_fs_and_path("/~m0/dir/file.txt"), number=2000, repeat=5))
+
+    fs = fsspec.filesystem("memory")
+    root_fs = RootFS()
+    root_fs.mount("/~m0", fs)
+    t1 = resolution_time(root_fs)
+    for i in range(1, 64):
+        root_fs.mount(f"/~m{i}", fs)
+    t64 = resolution_time(root_fs)
+    assert t64 < t1 * 3
+
+
 def test_find():
     root_dir = "/tmp/tests"
     shutil.rmtree(root_dir, ignore_errors=True)
@@ -98,3 +150,214 @@ def test_find():
     assert len(t) == 3
     t = list(root_fs.find_files(path="/folder", filter="3*", exclude=exclude))
     assert len(t) == 1
+    # Resume a walk
+    t = [x.path for x in root_fs.find_files(exclude=exclude)]
+    assert [x.path for x in root_fs.find_files(exclude=exclude, start_after=t[2])] == t[3:]
+    assert [x.path for x in root_fs.find_files(exclude=exclude, start_after=t[-1])] == []
+
+
+def test_iterdir():
+    root_fs = RootFS()
+    root_fs.mount("/~mem", "mem://")
+    root_fs.write_text("/~mem/a.txt", "data")
+    root_fs.write_text("/~mem/dir/b.txt", "b")
+    with (
+        mock.patch.object(root_fs, "info", wraps=root_fs.info) as info,
+        mock.patch.object(root_fs, "isdir", wraps=root_fs.isdir) as isdir,
+        mock.patch.object(root_fs, "size", wraps=root_fs.size) as size,
+    ):
+        items = list(root_fs.path("/~mem").iterdir())
+        assert [item.name for item in items] == ["a.txt", "dir"]
+        assert [item.is_dir() for item in items] == [False, True]
+        assert items[0].size() == 4
+        assert items[0].stat().st_size == 4
+        # The entries carry the info from the directory listing
+        assert not info.called
+        assert not isdir.called
+        assert not size.called
+    assert items[1].size() == 1
+    with pytest.raises(NotADirectoryError):
+        list(root_fs.path("/~mem/a.txt").iterdir())
+
+
+def test_local_fast_path(tmp_path):
+    conf.set(PLUGIN_NAME, 'git_init_repo', 'False')
+    conf.set(PLUGIN_NAME, 'root_directory', str(tmp_path))
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "a.txt").write_text("data")
+    (tmp_path / "link").symlink_to(tmp_path / "dir")
+    (tmp_path / "broken").symlink_to(tmp_path / "missing")
+    root_fs = RootFS()
+    fs = fsspec.filesystem("file")
+    items = dict(root_fs.listdir_info("/"))
+    assert sorted(items) == ["broken", "dir", "link"]
+    assert items["dir"]["type"] == "directory"
+    assert items["link"]["type"] == "directory"  # symbolic links are followed
+    assert items["broken"]["type"] == "other"
+    assert root_fs.listdir("/") == ["broken", "dir", "link"]
+    info = root_fs.info("/dir/a.txt")
+    expected = fs.info(str(tmp_path / "dir" / "a.txt"))
+    for key in ("name", "size", "type", "mode", "mtime", "ino"):
+        assert info[key] == expected[key]
+    assert root_fs.size("/dir/a.txt") == 4
+    assert root_fs.isdir("/link")
+    assert root_fs.isfile("/link/a.txt")
+    assert not root_fs.exists("/broken")
+    assert [x.path for x in root_fs.find_files()] == ["/broken", "/dir/a.txt", "/link/a.txt"]
+    with pytest.raises(NotADirectoryError):
+        root_fs.listdir_info("/dir/a.txt")
+    with pytest.raises(FileNotFoundError):
+        root_fs.listdir("/missing")
+
+
+def test_local_symlink_loop(tmp_path):
+    conf.set(PLUGIN_NAME, 'git_init_repo', 'False')
+    conf.set(PLUGIN_NAME, 'root_directory', str(tmp_path))
+    (tmp_path / "a.txt").write_text("data")
+    (tmp_path / "loop").symlink_to("loop")
+    root_fs = RootFS()
+    items = dict(root_fs.listdir_info("/"))
+    assert sorted(items) == ["a.txt", "loop"]
+    assert items["loop"]["type"] == "other"
+    assert sorted(x.name for x in root_fs.path("/").iterdir()) == ["a.txt", "loop"]
+    assert [x["path"] for x in root_fs.search("data")] == ["/a.txt"]
+
+
+def test_listing_cache():
+    root_fs = RootFS()
+    root_fs.mount("/~mem", "mem://")
+    root_fs.mount("/~nocache", "mem://", cache=False)
+    assert "/~mem" in root_fs.cached_mounts
+    assert "/~nocache" not in root_fs.cached_mounts
+    assert "/" not in root_fs.cached_mounts  # local
+    root_fs.write_text("/~mem/dir/a.txt", "a")
+    fs, _ = root_fs._get_fs_and_path("/~mem")
+    with mock.patch.object(fs, "ls", wraps=fs.ls) as ls:
+        assert root_fs.listdir("/~mem/dir") == ["a.txt"]
+        assert root_fs.listdir("/~mem/dir") == ["a.txt"]
+        assert [name for name, _ in root_fs.listdir_info("/~mem/dir")] == ["a.txt"]
+        assert ls.call_count == 1
+        # Changes made through RootFS invalidate the cache
+        root_fs.write_text("/~mem/dir/b.txt", "b")
+        assert root_fs.listdir("/~mem/dir") == ["a.txt", "b.txt"]
+        root_fs.move("/~mem/dir", "/~mem/dir2")
+        assert root_fs.listdir("/~mem") == ["dir2"]
+        assert root_fs.listdir("/~mem/dir2") == ["a.txt", "b.txt"]
+        root_fs.remove("/~mem/dir2/a.txt")
+        assert root_fs.listdir("/~mem/dir2") == ["b.txt"]
+        root_fs.makedirs("/~mem/dir3")
+        assert root_fs.listdir("/~mem") == ["dir2", "dir3"]
+        calls = ls.call_count
+        # Cached listings expire after listing_cache_ttl seconds
+        with mock.patch("airflow_code_editor.fs.time.monotonic", return_value=time.monotonic() + 3600):
+            assert root_fs.listdir("/~mem") == ["dir2", "dir3"]
+        assert ls.call_count == calls + 1
+    # Disabled cache
+    try:
+        conf.set(PLUGIN_NAME, 'listing_cache_ttl', '0')
+        assert root_fs.listing_cache_key("/~mem/dir2") is None
+    finally:
+        conf.remove_option(PLUGIN_NAME, 'listing_cache_ttl')
+
+
+def test_root_fs_pool(tmp_path):
+    conf.set(PLUGIN_NAME, 'root_directory', '/tmp')
+    root_fs = get_root_fs()
+    assert get_root_fs() is root_fs
+    # A new instance is created when the configuration changes
+    conf.set(PLUGIN_NAME, 'root_directory', str(tmp_path))
+    other_fs = get_root_fs()
+    assert other_fs is not root_fs
+    assert get_root_fs() is other_fs
+    conf.set(PLUGIN_NAME, 'root_directory', '/tmp')
+    assert get_root_fs() is root_fs
+    # Reload
+    reload_root_fs()
+    assert get_root_fs() is not root_fs
+
+
+def test_find_ignore_files(tmp_path):
+    conf.set(PLUGIN_NAME, 'root_directory', str(tmp_path))
+    (tmp_path / ".gitignore").write_text("# generated\nlogs/\n*.gen.py\n/build\n")
+    for name in ["a.py", "a.gen.py", "logs/x.py", "build/x.py", "sub/b.py", "sub/keep.gen.py", "sub/data/c.py"]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text("x\n")
+    (tmp_path / "sub" / ".codeeditorignore").write_text("!keep.gen.py\ndata\n")
+    (tmp_path / "sub" / "build").mkdir()
+    (tmp_path / "sub" / "build" / "d.py").write_text("x\n")
+    root_fs = RootFS()
+    exclude = [".*"]
+    assert sorted(x.path for x in root_fs.find_files(exclude=exclude)) == [
+        "/a.py",
+        "/sub/b.py",
+        "/sub/build/d.py",
+        "/sub/keep.gen.py",
+    ]
+    # The ignore files of the parent directories are applied
+    (tmp_path / "sub" / "x.gen.py").write_text("x\n")
+    assert sorted(x.path for x in root_fs.find_files(path="/sub", exclude=exclude)) == [
+        "/sub/b.py",
+        "/sub/build/d.py",
+        "/sub/keep.gen.py",
+    ]
+    ignored, ignores = root_fs.ignore_state("/sub/data", {})
+    assert ignored
+    assert [x[0] for x in ignores] == ["/", "/sub"]
+    # Disabled
+    try:
+        conf.set(PLUGIN_NAME, 'ignore_files', '')
+        assert len(list(root_fs.find_files(exclude=exclude))) == 9
+    finally:
+        conf.remove_option(PLUGIN_NAME, 'ignore_files')
+
+
+def test_find_limits():
+    root_fs = RootFS()
+    root_fs.mount("/~mem", "mem://")
+    for i in range(3):
+        for j in range(3):
+            root_fs.write_text(f"/~mem/d{i}/s{j}/f.txt", "x")
+        root_fs.write_text(f"/~mem/d{i}/f.txt", "x")
+    paths = [x.path for x in root_fs.find_files("/~mem")]
+    assert len(paths) == 12
+    assert paths[:5] == [
+        "/~mem/d0/f.txt",
+        "/~mem/d0/s0/f.txt",
+        "/~mem/d0/s1/f.txt",
+        "/~mem/d0/s2/f.txt",
+        "/~mem/d1/f.txt",
+    ]
+    # Max files
+    assert [x.path for x in root_fs.find_files("/~mem", max_files=3)] == paths[:3]
+    # Max depth
+    assert [x.path for x in root_fs.find_files("/~mem", max_depth=1)] == [
+        "/~mem/d0/f.txt",
+        "/~mem/d1/f.txt",
+        "/~mem/d2/f.txt",
+    ]
+    # Time budget
+    walk = root_fs.find_files("/~mem", time_budget=10)
+    assert next(walk).path == paths[0]
+    with mock.patch("airflow_code_editor.fs.time.monotonic", return_value=time.monotonic() + 3600):
+        assert list(walk) == []
+    # Remote directories are listed in advance
+    with mock.patch.object(root_fs, "listdir_info", wraps=root_fs.listdir_info) as listdir_info:
+        assert [x.path for x in root_fs.find_files("/~mem")] == paths
+        assert listdir_info.call_count == 13
+    try:
+        conf.set(PLUGIN_NAME, 'search_workers', '1')
+        assert [x.path for x in root_fs.find_files("/~mem")] == paths
+    finally:
+        conf.remove_option(PLUGIN_NAME, 'search_workers')
+    # The number of directories listed in advance is limited
+    for i in range(20):
+        root_fs.write_text(f"/~mem/many/d{i:02}/f.txt", "x")
+    try:
+        conf.set(PLUGIN_NAME, 'search_workers', '2')
+        submit = ThreadPoolExecutor.submit
+        with mock.patch.object(ThreadPoolExecutor, "submit", autospec=True, side_effect=submit) as prefetch:
+            assert [x.path for x in root_fs.find_files("/~mem/many", max_files=1)] == ["/~mem/many/d00/f.txt"]
+            assert prefetch.call_count <= 4 + 1  # 4 listings in flight, one more submitted entering d00
+            assert [x.path for x in root_fs.find_files("/~mem/many")][-1] == "/~mem/many/d19/f.txt"
+    finally:
+        conf.remove_option(PLUGIN_NAME, 'search_workers')
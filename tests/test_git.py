@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+
+import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, mock
+
+from airflow_code_editor.api import api
+from airflow_code_editor.commons import PLUGIN_NAME
+from airflow_code_editor.git import (
+    GitOutputStream,
+    ReadWriteLock,
+    close_cat_file_processes,
+    execute_git_command,
+    get_cat_file,
+    get_object_cache,
+    git_ls_tree,
+    is_object_id,
+    is_read_only_command,
+)
+from airflow_code_editor.tree import get_tree
+from airflow_code_editor.utils import conf
+
+
+class TestGitLock(TestCase):
+
+    def test_read_only_commands(self):
+        assert is_read_only_command(["log", "--oneline"])
+        assert is_read_only_command(["cat-file", "-p", "HEAD:a.py"])
+        assert is_read_only_command(["ls-local", "-l"])
+        assert is_read_only_command(["branch"])
+        assert is_read_only_command(["branch", "--remotes"])
+        assert is_read_only_command(["tag"])
+        assert not is_read_only_command(["branch", "new-branch"])
+        assert not is_read_only_command(["tag", "-d", "v1"])
+        assert not is_read_only_command(["commit", "-m", "test"])
+        assert not is_read_only_command(["rm-local", "a.txt"])
+        assert not is_read_only_command([])
+
+    def test_concurrent_readers(self):
+        lock = ReadWriteLock()
+        active = []
+        max_active = [0]
+        active_lock = threading.Lock()
+        # Each group of 3 readers waits for the others inside the lock (deadlock if they can't overlap)
+        barrier = threading.Barrier(3, timeout=10)
+
+        def reader():
+            with lock.read_lock(max_readers=3):
+                with active_lock:
+                    active.append(1)
+                    max_active[0] = max(max_active[0], len(active))
+                barrier.wait()
+                with active_lock:
+                    active.pop()
+
+        threads = [threading.Thread(target=reader) for _ in range(9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not barrier.broken
+        assert max_active[0] == 3
+
+    def test_exclusive_writer(self):
+        lock = ReadWriteLock()
+        events = []
+        reading = threading.Event()
+        release = threading.Event()
+
+        def first_reader():
+            with lock.read_lock():
+                reading.set()
+                release.wait(10)
+                events.append("read")
+
+        def reader():
+            with lock.read_lock():
+                events.append("read")
+
+        def writer():
+            with lock.write_lock():
+                events.append("write start")
+                events.append("write end")
+
+        threads = [threading.Thread(target=first_reader)]
+        threads[0].start()
+        assert reading.wait(10)
+        # The writer waits for the active reader, the new readers wait for the writer
+        threads.append(threading.Thread(target=writer))
+        threads[1].start()
+        deadline = time.monotonic() + 10
+        while lock._writers_waiting == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert lock._writers_waiting == 1
+        threads.append(threading.Thread(target=reader))
+        threads[2].start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert events == ["read", "write start", "write end", "read"]
+
+
+class TestGitCatFile(TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        conf.set(PLUGIN_NAME, "git_init_repo", "True")
+        conf.set(PLUGIN_NAME, "git_author_name", "test")
+        conf.set(PLUGIN_NAME, "git_author_email", "test@example.com")
+        conf.set(PLUGIN_NAME, "root_directory", self.root_dir)
+        (Path(self.root_dir) / "dir").mkdir()
+        (Path(self.root_dir) / "dir" / "a.txt").write_text("hello\n")
+        (Path(self.root_dir) / "b c.py").write_text("print('b')\n")
+        execute_git_command(["add", "."])
+        execute_git_command(["commit", "-m", "test"])
+
+    def tearDown(self):
+        close_cat_file_processes()
+        conf.set(PLUGIN_NAME, "git_init_repo", "False")
+        conf.remove_option(PLUGIN_NAME, "git_author_name")
+        conf.remove_option(PLUGIN_NAME, "git_author_email")
+        conf.remove_option(PLUGIN_NAME, "git_batch_idle_timeout")
+        conf.remove_option(PLUGIN_NAME, "git_object_cache_directory")
+        get_object_cache().clear()
+        shutil.rmtree(self.root_dir)
+
+    def git(self, *args):
+        return subprocess.run(["git"] + list(args), cwd=self.root_dir, capture_output=True).stdout
+
+    def test_cat_file(self):
+        blob = self.git("rev-parse", "HEAD:dir/a.txt").decode().strip()
+        for args in (["-p", blob], ["-t", blob], ["-s", blob], ["-p", "HEAD"], ["-p", "HEAD:dir/a.txt"]):
+            r = execute_git_command(["cat-file"] + args)
+            assert r.returncode == 0
+            assert r.stdout == self.git("cat-file", *args)
+        assert get_cat_file().process is not None
+        r = execute_git_command(["cat-file", "-p", "0" * 40])
+        assert r.returncode != 0
+        assert r.stdout == b""
+
+    def test_ls_tree(self):
+        entries = git_ls_tree("HEAD")
+        assert [(e.type, e.name, e.size) for e in entries] == [
+            ("blob", ".gitignore", 23),
+            ("blob", "b c.py", 11),
+            ("tree", "dir", None),
+        ]
+        assert git_ls_tree("HEAD:dir")[0].oid == self.git("rev-parse", "HEAD:dir/a.txt").decode().strip()
+        assert git_ls_tree("missing") == []
+        t = get_tree("git/HEAD")
+        assert [(x["label"], x["leaf"], x["size"]) for x in t][1:] == [("b c.py", True, 11), ("dir", False, None)]
+
+    def test_restart(self):
+        blob = self.git("rev-parse", "HEAD:dir/a.txt").decode().strip()
+        cat_file = get_cat_file()
+        assert cat_file.read([blob])[0].data == b"hello\n"
+        # Kill the process, the next read starts a new one
+        cat_file.process.kill()
+        cat_file.process.wait()
+        assert cat_file.read([blob])[0].data == b"hello\n"
+        # The processes are restarted after the changes to the repository
+        process = cat_file.process
+        (Path(self.root_dir) / "dir" / "a.txt").write_text("world\n")
+        execute_git_command(["commit", "-a", "-m", "update"])
+        assert cat_file.process is None
+        assert execute_git_command(["cat-file", "-p", "HEAD:dir/a.txt"]).stdout == b"world\n"
+        assert cat_file.process is not process
+
+    def test_idle_timeout(self):
+        cat_file = get_cat_file()
+        with mock.patch.object(cat_file, "idle_timeout", 0.05):
+            assert cat_file.read(["HEAD"])[0].type == "commit"
+            assert cat_file.process is not None
+            # Set when the idle process is terminated
+            assert cat_file.closed.wait(10)
+            assert cat_file.process is None
+        conf.set(PLUGIN_NAME, "git_batch_idle_timeout", "0")
+        assert get_cat_file() is None
+        assert execute_git_command(["cat-file", "-t", "HEAD"]).stdout == b"commit\n"
+
+    def test_object_cache(self):
+        blob = self.git("rev-parse", "HEAD:dir/a.txt").decode().strip()
+        tree = self.git("rev-parse", "HEAD^{tree}").decode().strip()
+        assert is_object_id(blob)
+        assert not is_object_id("HEAD")
+        assert execute_git_command(["cat-file", "-p", blob]).stdout == b"hello\n"
+        entries = git_ls_tree(tree)
+        # The objects addressed by id are served from the cache
+        with mock.patch("airflow_code_editor.git.get_cat_file") as get_cat_file, mock.patch(
+            "airflow_code_editor.git.git_call"
+        ) as git_call:
+            assert execute_git_command(["cat-file", "-p", blob]).stdout == b"hello\n"
+            assert git_ls_tree(tree) == entries
+            assert get_cat_file.call_count == 0
+            assert git_call.call_count == 0
+        # HEAD is resolved, the tree entries are cached
+        with mock.patch("airflow_code_editor.git.parse_tree") as parse_tree:
+            assert git_ls_tree("HEAD") == entries
+            assert parse_tree.call_count == 0
+        # Disk cache
+        disk_cache = Path(self.root_dir) / "cache"
+        conf.set(PLUGIN_NAME, "git_object_cache_directory", str(disk_cache))
+        get_object_cache().clear()
+        conf.set(PLUGIN_NAME, "git_batch_idle_timeout", "0")
+        assert execute_git_command(["cat-file", "-p", blob]).stdout == b"hello\n"
+        assert (disk_cache / blob[:2] / blob[2:]).read_bytes() == b"hello\n"
+        get_object_cache().clear()
+        with mock.patch("airflow_code_editor.git.git_call") as git_call:
+            assert execute_git_command(["cat-file", "-p", blob]).stdout == b"hello\n"
+            assert git_call.call_count == 0
+
+    def test_etag(self):
+        blob = self.git("rev-parse", "HEAD:dir/a.txt").decode().strip()
+        response = api.load(f"~git/{blob}/a.txt")
+        assert response.status_code == 200
+        assert response.headers["ETag"] == f'"{blob}"'
+        assert "immutable" in response.headers["Cache-Control"]
+        response = api.load(f"~git/{blob}/a.txt", if_none_match=f'W/"x", "{blob}"')
+        assert response.status_code == 304
+        assert response.headers["ETag"] == f'"{blob}"'
+        response = api.load("~git/HEAD:dir/a.txt", if_none_match=f'"{blob}"')
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
+
+    def test_output_stream(self):
+        for i in range(20):
+            execute_git_command(["commit", "--allow-empty", "-m", f"commit {i}"])
+        output = GitOutputStream(["log", "--oneline"])
+        data = b"".join(output)
+        assert data.decode() == execute_git_command(["log", "--oneline"]).stdout
+        assert output.returncode == 0
+        assert not output.truncated
+        # Limits
+        output = GitOutputStream(["log", "--oneline"], max_lines=5)
+        data = b"".join(output)
+        assert data.count(b"\n") == 5 and data.endswith(b"\n")
+        assert output.truncated
+        assert output.returncode is not None
+        output = GitOutputStream(["log", "--oneline"], max_bytes=10)
+        assert len(b"".join(output)) == 10
+        assert output.truncated
+        output = GitOutputStream(["log", "--oneline"], max_lines=22)  # 22 commits
+        assert b"".join(output).count(b"\n") == 22
+        assert not output.truncated
+        # Errors, local commands
+        output = GitOutputStream(["log", "missing"])
+        assert b"".join(output) == b""
+        assert output.returncode != 0
+        assert b"missing" in output.stderr
+        output = GitOutputStream(["ls-local"])
+        assert b"dir" in b"".join(output)
+        assert output.returncode == 0
+
+    def test_output_stream_limit(self):
+        output = GitOutputStream(["log"], max_lines=3)
+        assert list(output.limit(iter([b"a\nb", b"\nc\nd\n", b"e\n"]))) == [b"a\nb", b"\nc\n"]
+        assert output.truncated
+        output = GitOutputStream(["log"], max_bytes=4)
+        assert list(output.limit(iter([b"abc", b"d", b""]))) == [b"abc", b"d"]
+        assert not output.truncated
+
+    def test_stream_api(self):
+        execute_git_command(["commit", "--allow-empty", "-m", "second"])
+        lines = list(api.stream_git_output(GitOutputStream(["log", "--oneline"], max_lines=1), "ndjson"))
+        assert json.loads(lines[0])["data"].endswith("second\n")
+        end = json.loads(lines[-1])
+        assert end["end"] and end["truncated"]
+        lines = list(api.stream_git_output(GitOutputStream(["log", "--oneline"]), "ndjson"))
+        assert json.loads(lines[-1]) == {"end": True, "returncode": 0, "truncated": False}
+        events = list(api.stream_git_output(GitOutputStream(["log", "missing"]), "sse"))
+        assert events[-1].startswith("event: end\ndata: ")
+        assert "missing" in json.loads(events[-1].split("data: ", 1)[1])["error"]["message"]
+        response = api.execute_git_command(["log"], stream="invalid")
+        assert response.status_code == 400
+        # Only the read-only commands can be streamed
+        with self.assertRaises(ValueError):
+            GitOutputStream(["commit", "-m", "test"])
+        response = api.execute_git_command(["rm-local", "dir"], stream="ndjson")
+        assert response.status_code == 400
+        assert (Path(self.root_dir) / "dir").exists()
+
+    def test_output_stream_lock(self):
+        for i in range(2000):
+            (Path(self.root_dir) / f"{i}.txt").write_text(f"{i}\n")
+        execute_git_command(["add", "."])
+        execute_git_command(["commit", "-m", "files"])
+        # The lock is not held while the output is consumed, commands changing the repository are not blocked
+        chunks = iter(GitOutputStream(["ls-tree", "-r", "HEAD"]))
+        assert next(chunks)
+        done = threading.Event()
+
+        def writer():
+            execute_git_command(["tag", "v1"])
+            done.set()
+
+        threading.Thread(target=writer).start()
+        assert done.wait(5)
+        chunks.close()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+from unittest import TestCase
+
+from airflow_code_editor.commons import PLUGIN_NAME
+from airflow_code_editor.ignore import (
+    PathMatcher,
+    get_ignored_entries_matcher,
+    get_path_matcher,
+)
+from airflow_code_editor.utils import conf
+
+
+class TestIgnore(TestCase):
+
+    def test_name_patterns(self):
+        matcher = PathMatcher([".*", "__pycache__", "*.py[co]"])
+        assert matcher.match(".git", is_dir=True)
+        assert matcher.match("dags/.hidden")
+        assert matcher.match("dags/__pycache__", is_dir=True)
+        assert matcher.match("a/b/c.pyc")
+        assert not matcher.match("a/b/c.py")
+        assert not matcher.match("dags/a.txt")
+
+    def test_path_patterns(self):
+        matcher = PathMatcher(["/build", "docs/*.md", "src/**/*.py", "logs/**"])
+        assert matcher.match("build", is_dir=True)
+        assert not matcher.match("src/build", is_dir=True)
+        assert matcher.match("docs/a.md")
+        assert not matcher.match("docs/sub/a.md")  # * doesn't match /
+        assert matcher.match("src/a.py")
+        assert matcher.match("src/x/y/a.py")
+        assert matcher.match("logs/2024/01/a.log")
+        assert not matcher.match("logs", is_dir=True)
+
+    def test_dir_only(self):
+        matcher = PathMatcher(["tmp/"])
+        assert matcher.match("tmp", is_dir=True)
+        assert matcher.match("a/tmp", is_dir=True)
+        assert not matcher.match("tmp")
+        assert matcher.is_ignored("tmp/a.txt")
+
+    def test_negation(self):
+        matcher = PathMatcher(["*.log", "!keep.log", "# comment", ""])
+        assert len(matcher.rules) == 2
+        assert matcher.match("a.log")
+        assert not matcher.match("dir/keep.log")
+        assert not matcher.match("a.txt")
+        matcher = PathMatcher(["!keep.log", "*.log"])  # the last matching pattern wins
+        assert matcher.match("keep.log")
+
+    def test_escape_and_classes(self):
+        matcher = PathMatcher(["\\!important", "file[0-9].txt", "x[!a].txt", "[abc"])
+        assert matcher.match("!important")
+        assert matcher.match("file1.txt")
+        assert not matcher.match("filea.txt")
+        assert matcher.match("xb.txt")
+        assert not matcher.match("xa.txt")
+        assert matcher.match("[abc")
+
+    def test_may_match_dir(self):
+        matcher = PathMatcher(["folder/sub/*.py"])
+        assert matcher.may_match_dir("folder")
+        assert matcher.may_match_dir("folder/sub")
+        assert not matcher.may_match_dir("other")
+        assert PathMatcher(["*.py"]).may_match_dir("other")
+
+    def test_cache(self):
+        assert get_path_matcher((".*",)) is get_path_matcher((".*",))
+        assert not get_path_matcher(())
+        try:
+            conf.set(PLUGIN_NAME, 'ignored_entries', '*.txt')
+            matcher = get_ignored_entries_matcher()
+            assert matcher.match("a.txt")
+            assert get_ignored_entries_matcher() is matcher
+        finally:
+            conf.remove_option(PLUGIN_NAME, 'ignored_entries')
+        assert get_ignored_entries_matcher() is not matcher
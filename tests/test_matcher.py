@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import mmap
+import tempfile
+from unittest import TestCase
+
+from airflow_code_editor.matcher import (
+    SEARCH_MODE_LITERAL,
+    context_windows,
+    get_matcher,
+)
+
+DATA = b"first line\nSecond Line\nline 3 (three)\nno match\n\nlast lines"
+
+
+class TestMatcher(TestCase):
+
+    def matches(self, matcher, data=DATA, max_count=None):
+        return [(m.matching_lineno, m.matching_line, m.matching_column_ranges) for m in matcher.match(data, max_count)]
+
+    def test_literal(self):
+        matcher = get_matcher("line")
+        assert matcher.find == b"line"
+        assert matcher.literal == b"line"
+        assert self.matches(matcher) == [
+            (1, b"first line\n", [(6, 10)]),
+            (3, b"line 3 (three)\n", [(0, 4)]),
+            (6, b"last lines", [(5, 9)]),
+        ]
+        assert [x[0] for x in self.matches(matcher, max_count=2)] == [1, 3]
+
+    def test_ignore_case(self):
+        matcher = get_matcher("line", ignore_case=True)
+        assert matcher.find is None
+        assert [x[0] for x in self.matches(matcher)] == [1, 2, 3, 6]
+
+    def test_whole_word(self):
+        matcher = get_matcher("line", whole_word=True)
+        assert [x[0] for x in self.matches(matcher)] == [1, 3]
+        # alternations are grouped
+        data = b"foox\nbar\nxfoo\n"
+        assert [x[0] for x in self.matches(get_matcher("foo|bar", whole_word=True), data)] == [2]
+
+    def test_regex(self):
+        matcher = get_matcher("^l.*[0-9]")
+        assert matcher.literal is None
+        assert self.matches(matcher) == [(3, b"line 3 (three)\n", [(0, 6)])]
+        # matches spanning multiple lines are ignored
+        assert self.matches(get_matcher(r"match\s+last")) == []
+        assert [x[0] for x in self.matches(get_matcher("^$"))] == [5]
+        # no empty line after the trailing newline
+        assert [x[0] for x in self.matches(get_matcher("^$"), DATA + b"\n")] == [5]
+        assert [x[0] for x in self.matches(get_matcher("^$"), b"a\n\n")] == [2]
+        assert [x[0] for x in self.matches(get_matcher("^.*$"), b"a\nb\n")] == [1, 2]
+        assert [x[0] for x in self.matches(get_matcher("$"), b"a\nb")] == [1, 2]
+
+    def test_literal_mode(self):
+        matcher = get_matcher("(three)", mode=SEARCH_MODE_LITERAL)
+        assert matcher.literal == b"(three)"
+        assert self.matches(matcher) == [(3, b"line 3 (three)\n", [(7, 14)])]
+
+    def test_cache(self):
+        assert get_matcher("line") is get_matcher("line")
+        assert get_matcher("line") is not get_matcher("line", ignore_case=True)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_matcher("line", mode="invalid")
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(DATA)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                assert self.matches(get_matcher("line"), buffer) == self.matches(get_matcher("line"))
+
+    def test_context_windows(self):
+        matches = list(get_matcher("line").match(DATA))
+        assert list(context_windows(DATA, matches, 1)) == [(6, DATA.decode(), 1)]
+        data = b"a\nb\nc\nd\ne\nf\na\n"
+        assert list(context_windows(data, list(get_matcher("a").match(data)), 1)) == [
+            (1, "a\nb\n", 1),
+            (7, "f\na\n", 6),
+        ]
+        assert list(context_windows(DATA, matches, 2)) == [(6, DATA.decode(), 1)]
+        assert list(context_windows(DATA, [], 2)) == []
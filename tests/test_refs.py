@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+from airflow_code_editor.commons import PLUGIN_NAME
+from airflow_code_editor.git import execute_git_command
+from airflow_code_editor.refs import REFS_HEADS, REFS_TAGS, get_ref_snapshot
+from airflow_code_editor.tree import get_tree
+from airflow_code_editor.utils import conf
+
+
+class TestRefs(TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        conf.set(PLUGIN_NAME, "git_init_repo", "True")
+        conf.set(PLUGIN_NAME, "git_author_name", "test")
+        conf.set(PLUGIN_NAME, "git_author_email", "test@example.com")
+        conf.set(PLUGIN_NAME, "root_directory", self.root_dir)
+        (Path(self.root_dir) / "a.txt").write_text("hello\n")
+        execute_git_command(["add", "."])
+        execute_git_command(["commit", "-m", "test"])
+        execute_git_command(["tag", "v1"])
+        execute_git_command(["tag", "-a", "v2", "-m", "annotated"])
+        execute_git_command(["branch", "dev"])
+
+    def tearDown(self):
+        conf.set(PLUGIN_NAME, "git_init_repo", "False")
+        conf.remove_option(PLUGIN_NAME, "git_author_name")
+        conf.remove_option(PLUGIN_NAME, "git_author_email")
+        shutil.rmtree(self.root_dir)
+
+    def git(self, *args):
+        return subprocess.run(["git"] + list(args), cwd=self.root_dir, capture_output=True).stdout.decode().strip()
+
+    def test_snapshot(self):
+        head = self.git("rev-parse", "HEAD")
+        snapshot = get_ref_snapshot()
+        assert snapshot.names(REFS_TAGS) == ["v1", "v2"]
+        assert snapshot.names(REFS_HEADS) == ["dev", self.git("branch", "--show-current")]
+        assert snapshot.resolve("HEAD") == head
+        assert snapshot.resolve("dev") == head
+        assert snapshot.resolve("v2") == head  # annotated tags are peeled
+        assert snapshot.resolve("refs/tags/v1") == head
+        assert snapshot.resolve("missing") is None
+        assert snapshot.resolve(head) is None
+        # Detached HEAD
+        execute_git_command(["checkout", "--detach"])
+        assert get_ref_snapshot().head == head
+        assert get_ref_snapshot().resolve("HEAD") == head
+
+    def test_cache(self):
+        snapshot = get_ref_snapshot()
+        with mock.patch("airflow_code_editor.refs.git_call") as git_call:
+            assert get_ref_snapshot() is snapshot
+            assert git_call.call_count == 0
+        # Refs changed by git commands or outside the editor
+        execute_git_command(["branch", "feature/x"])
+        assert get_ref_snapshot().names(REFS_HEADS)[1] == "feature/x"
+        subprocess.run(["git", "tag", "v3"], cwd=self.root_dir, check=True)
+        assert get_ref_snapshot().names(REFS_TAGS) == ["v1", "v2", "v3"]
+        subprocess.run(["git", "pack-refs", "--all"], cwd=self.root_dir, check=True)
+        subprocess.run(["git", "tag", "-d", "v3"], cwd=self.root_dir, check=True, capture_output=True)
+        assert get_ref_snapshot().names(REFS_TAGS) == ["v1", "v2"]
+
+    def test_tree(self):
+        assert [x["id"] for x in get_tree("tags")] == ["v1", "v2"]
+        assert "dev" in [x["id"] for x in get_tree("local-branches")]
+        assert get_tree("remote-branches") == []
+        labels = [x["label"] for x in get_tree("tags/v2")]
+        assert labels == [x["label"] for x in get_tree("git")]
+        assert "a.txt" in labels
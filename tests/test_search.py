@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+
+import io
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from airflow_code_editor.api import api
+from airflow_code_editor.commons import PLUGIN_NAME
+from airflow_code_editor.fs import (
+    RootFS,
+    get_search_cache,
+    search_buffer,
+    search_stream,
+)
+from airflow_code_editor.matcher import get_matcher
+from airflow_code_editor.utils import conf
+
+
+def get_body(response):
+    "Get the body of a FastAPI/Flask response"
+    return response.body if hasattr(response, "body") else response.get_data()
+
+
+class TestSearch(TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        shutil.copytree(Path(__file__).parent, self.root_dir, dirs_exist_ok=True)
+        conf.set(PLUGIN_NAME, 'git_init_repo', 'False')
+        conf.set(PLUGIN_NAME, 'root_directory', self.root_dir)
+        conf.set(PLUGIN_NAME, 'search_index', 'False')
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_search(self):
+        root_fs = RootFS()
+        result = root_fs.search("class TestSearch[(]TestCase", search_context=0)
+        assert len(result) == 1
+        assert result[0]["path"] == "/test_search.py"
+        assert result[0]["row_number"] == result[0]["context_first_row"]
+        result = root_fs.search("class TestSearch[(]TestCase", search_context=2)
+        assert len(result) == 1
+        assert result[0]["context_first_row"] == result[0]["row_number"] - 2
+        assert result[0]["context"].count("\n") == 5
+
+    def test_iter_search(self):
+        root_fs = RootFS()
+        matches = root_fs.iter_search("import")
+        first = next(matches)
+        assert first["path"]
+        matches.close()
+
+    def test_stream_ndjson(self):
+        root_fs = RootFS()
+        matches = root_fs.iter_search("class TestSearch[(]TestCase")
+        lines = list(api.stream_search(api.SearchResults(matches), True, "ndjson"))
+        assert len(lines) == 2
+        item = json.loads(lines[0])
+        assert item["path"] == "/test_search.py"
+        assert "context" in item
+        assert json.loads(lines[1]) == {"end": True, "truncated": False, "cursor": None}
+
+    def test_stream_sse(self):
+        root_fs = RootFS()
+        matches = root_fs.iter_search("class TestSearch[(]TestCase")
+        events = list(api.stream_search(api.SearchResults(matches), False, "sse"))
+        assert len(events) == 2
+        assert events[0].startswith("data: ")
+        row_number = Path(__file__).read_text().split("\n").index("class TestSearch" + "(TestCase):") + 1
+        assert json.loads(events[0][len("data: ") :]) == {"row_number": row_number, "path": "/test_search.py"}
+        assert events[-1].startswith("event: end")
+
+    def test_pagination(self):
+        root_fs = RootFS()
+        full = [(x["path"], x["row_number"]) for x in root_fs.iter_search("import")]
+        assert len(full) > 6
+        pages = []
+        cursor = (None, 0)
+        while True:
+            results = api.SearchResults(root_fs.iter_search("import", start_at=cursor[0]), max_results=3, cursor=cursor)
+            pages.extend((x["path"], x["row_number"]) for x in results)
+            if not results.truncated:
+                break
+            cursor = api.decode_search_cursor(results.cursor)
+        assert pages == full
+        results = api.SearchResults(root_fs.iter_search("import"), max_results=2, offset=3)
+        assert [(x["path"], x["row_number"]) for x in results] == full[3:5]
+        assert results.truncated
+
+    def test_pagination_changes(self):
+        folder = Path(self.root_dir) / "pages"
+        folder.mkdir()
+        for i in range(40):
+            (folder / f"f{i:03d}").write_text("needle_here\n" * 2)
+        root_fs = RootFS()
+
+        def page(cursor):
+            results = api.SearchResults(
+                root_fs.iter_search("needle_here", search_context=0, path="/pages", start_at=cursor[0]),
+                max_results=20,
+                cursor=cursor,
+            )
+            return [(x["path"], x["row_number"]) for x in results], api.decode_search_cursor(results.cursor)
+
+        first, cursor = page((None, 0))
+        assert first[-1] == ("/pages/f009", 2)
+        assert cursor == ("/pages/f010", 0)
+        # The files added or removed before the cursor don't shift the next page
+        (folder / "a000").write_text("needle_here\n")
+        (folder / "f000").unlink()
+        second, _ = page(cursor)
+        assert second[0] == ("/pages/f010", 1)
+        assert second[-1] == ("/pages/f019", 2)
+        # The search index can be used for the next page
+        conf.set(PLUGIN_NAME, 'search_index', 'True')
+        conf.set(PLUGIN_NAME, 'search_index_directory', self.root_dir + "_index")
+        try:
+            index = api.get_search_indexes(root_fs, ["/"])[0]
+            assert not index.maybe_build(root_fs)
+            index.thread.join()
+            assert root_fs.search_candidates(get_matcher("needle_here")) is not None
+            indexed, _ = page(cursor)
+            assert indexed == second
+        finally:
+            conf.set(PLUGIN_NAME, 'search_index', 'False')
+            shutil.rmtree(self.root_dir + "_index", ignore_errors=True)
+
+    def test_pagination_filters(self):
+        folder = Path(self.root_dir) / "pages"
+        folder.mkdir()
+        (folder / "a.py").write_text("needle_here\n")
+        (folder / "b.txt").write_text("needle_here\n")
+        (folder / "c.py").write_text("needle_here\n")
+        (folder / ".gitignore").write_text("c.py\n")
+        (Path(self.root_dir) / "secret.py").write_text("needle_here\n")
+        root_fs = RootFS()
+
+        def resume(start_at):
+            matches = root_fs.iter_search("needle_here", path="/pages", filter=["*.py"], start_at=start_at)
+            return [x["path"] for x in matches]
+
+        assert resume(None) == ["/pages/a.py"]
+        assert resume("/pages/a.py") == ["/pages/a.py"]
+        # The file in the cursor is searched only if selected by the filters
+        assert resume("/pages/b.txt") == []
+        assert resume("/pages/c.py") == []
+        assert resume("/secret.py") == []
+        assert resume("/pages/../secret.py") == ["/pages/a.py"]
+
+    def test_max_matches_per_file(self):
+        root_fs = RootFS()
+        result = root_fs.search("import", search_context=0, max_matches_per_file=1)
+        paths = [x["path"] for x in result]
+        assert len(paths) == len(set(paths))
+
+    def test_api_search(self):
+        response = api.search({"query": "import", "max_results": "2"})
+        data = json.loads(get_body(response))
+        assert len(data["value"]) == 2
+        assert data["truncated"]
+        assert data["cursor"]
+        response = api.search({"query": "import", "max_results": "-1"})
+        assert response.status_code == 400
+
+    def test_search_workers(self):
+        root_fs = RootFS()
+        try:
+            conf.set(PLUGIN_NAME, 'search_workers', '1')
+            sequential = root_fs.search("import")
+            conf.set(PLUGIN_NAME, 'search_workers', '8')
+            parallel = root_fs.search("import")
+        finally:
+            conf.remove_option(PLUGIN_NAME, 'search_workers')
+        assert sequential == parallel
+
+    def test_search_path(self):
+        root_fs = RootFS()
+        result = root_fs.search("import", search_context=0, path="/folder")
+        assert result == []
+        (Path(self.root_dir) / "folder" / "a.py").write_text("import os\n")
+        result = root_fs.search("import", search_context=0, path="/folder")
+        assert {x["path"] for x in result} == {"/folder/a.py"}
+
+    def test_search_include_exclude(self):
+        root_fs = RootFS()
+        (Path(self.root_dir) / "folder" / "sub").mkdir()
+        (Path(self.root_dir) / "folder" / "sub" / "a.py").write_text("import os\n")
+        (Path(self.root_dir) / "folder" / "a.py").write_text("import os\n")
+        (Path(self.root_dir) / "folder" / "a.txt").write_text("import os\n")
+        result = root_fs.search("import os", search_context=0, filter=["folder/**/*.py"])
+        assert {x["path"] for x in result} == {"/folder/a.py", "/folder/sub/a.py"}
+        result = root_fs.search("import os", search_context=0, filter=["folder/sub/*.py"])
+        assert {x["path"] for x in result} == {"/folder/sub/a.py"}
+        result = root_fs.search("import os", search_context=0, path="/folder", filter=["*.py"], exclude=["sub"])
+        assert {x["path"] for x in result} == {"/folder/a.py"}
+        result = root_fs.search("import os", search_context=0, path="/folder", max_depth=0)
+        assert {x["path"] for x in result} == {"/folder/a.py", "/folder/a.txt"}
+
+    def test_api_search_filters(self):
+        (Path(self.root_dir) / "folder" / "a.py").write_text("import os\n")
+        (Path(self.root_dir) / "folder" / "a.txt").write_text("import os\n")
+        response = api.search({"query": "import os", "path": "folder", "include": "*.py, *.cfg"})
+        data = json.loads(get_body(response))
+        assert [x["path"] for x in data["value"]] == ["/folder/a.py"]
+        response = api.search({"query": "import os", "path": "/folder", "exclude": "*.py"})
+        data = json.loads(get_body(response))
+        assert [x["path"] for x in data["value"]] == ["/folder/a.txt"]
+
+    def test_search_modes(self):
+        (Path(self.root_dir) / "folder" / "a.txt").write_text("Import os\nimport_sys\n(import)\n")
+        root_fs = RootFS()
+        result = root_fs.search("import", path="/folder", search_context=0)
+        assert [x["row_number"] for x in result] == [2, 3]
+        result = root_fs.search("import", path="/folder", search_context=0, ignore_case=True, whole_word=True)
+        assert [x["row_number"] for x in result] == [1, 3]
+        result = root_fs.search("(import)", path="/folder", search_context=0, mode="literal")
+        assert [x["row_number"] for x in result] == [3]
+        response = api.search({"query": "IMPORT_SYS", "path": "folder"})
+        assert json.loads(get_body(response))["value"] == []
+        response = api.search({"query": "IMPORT_SYS", "path": "folder", "ignore_case": "true"})
+        assert [x["path"] for x in json.loads(get_body(response))["value"]] == ["/folder/a.txt"]
+        response = api.search({"query": "(import", "path": "folder"})
+        assert response.status_code == 400
+
+    def test_search_local_files(self):
+        (Path(self.root_dir) / "folder" / "empty").write_bytes(b"")
+        (Path(self.root_dir) / "folder" / "binary").write_bytes(b"import\x00")
+        (Path(self.root_dir) / "folder" / "text").write_bytes(b"import")
+        root_fs = RootFS()
+        result = root_fs.search("import", path="/folder", search_context=1)
+        assert [(x["path"], x["context"]) for x in result] == [("/folder/text", "import")]
+
+    def test_search_stream(self):
+        data = b"".join(b"import %d\n" % i if i % 7 == 0 else b"line %d\n" % i for i in range(100)) + b"import"
+        matcher = get_matcher("import")
+        for search_context in (0, 1, 3, 5):
+            for block_size in (1, 16, 1024):
+                for max_matches in (None, 5):
+                    expected = search_buffer(data, "/a", matcher, search_context, max_matches)
+                    result = search_stream(io.BytesIO(data), "/a", matcher, search_context, max_matches, block_size)
+                    assert result == expected
+
+    def test_search_remote_files(self):
+        root_fs = RootFS()
+        root_fs.mount("/~mem", "mem://")
+        root_fs.write_text("/~mem/folder/text", "a\nimport\nb\n")
+        root_fs.write_bytes("/~mem/folder/binary", b"import\x00")
+        result = root_fs.search("import", path="/~mem/folder", search_context=1)
+        assert [(x["path"], x["context"]) for x in result] == [("/~mem/folder/text", "a\nimport\nb\n")]
+
+    def test_search_cache(self):
+        path = Path(self.root_dir) / "folder" / "a.txt"
+        path.write_text("import os\n")
+        root_fs = RootFS()
+        cache = get_search_cache()
+        cache.clear()
+        result = root_fs.search("import", path="/folder", search_context=0)
+        files = cache.misses
+        assert files > 1
+        assert len(cache) == files
+        assert root_fs.search("import", path="/folder", search_context=0) == result
+        assert cache.hits == files
+        path.write_text("import os\nimport sys\n")
+        result = root_fs.search("import", path="/folder", search_context=0)
+        assert [x["row_number"] for x in result] == [1, 2]
+        try:
+            conf.set(PLUGIN_NAME, 'search_cache_size', '0')
+            assert get_search_cache() is None
+            assert root_fs.search("import", path="/folder", search_context=0) == result
+        finally:
+            conf.remove_option(PLUGIN_NAME, 'search_cache_size')
+
+    def test_lazy_highlight(self):
+        response = api.search({"query": "class TestSearch[(]TestCase", "context": "true", "highlight": "lazy"})
+        item = json.loads(get_body(response))["value"][0]
+        assert item["context"].startswith("\n")
+        assert item["context_first_row"] == item["row_number"] - 2
+        response = api.search({"query": "class TestSearch[(]TestCase", "context": "true"})
+        highlighted = json.loads(get_body(response))["value"][0]["context"]
+        response = api.search_highlight([item])
+        assert json.loads(get_body(response))["value"] == [highlighted]
+        response = api.search_highlight([{"path": "/test_search.py"}])
+        assert response.status_code == 400
@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from unittest import TestCase
+from unittest.mock import patch
+
+from airflow_code_editor.commons import PLUGIN_NAME
+from airflow_code_editor.fs import RootFS
+from airflow_code_editor.search_index import get_search_index, trigrams
+from airflow_code_editor.utils import conf
+
+
+class TestSearchIndex(TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+        self.index_dir = tempfile.mkdtemp()
+        shutil.copytree(Path(__file__).parent, self.root_dir, dirs_exist_ok=True)
+        conf.set(PLUGIN_NAME, 'git_init_repo', 'False')
+        conf.set(PLUGIN_NAME, 'root_directory', self.root_dir)
+        conf.set(PLUGIN_NAME, 'search_index', 'True')
+        conf.set(PLUGIN_NAME, 'search_index_directory', self.index_dir)
+
+    def tearDown(self):
+        conf.set(PLUGIN_NAME, 'search_index', 'False')
+        shutil.rmtree(self.root_dir)
+        shutil.rmtree(self.index_dir)
+
+    def test_trigrams(self):
+        assert trigrams(b"ab") == set()
+        assert trigrams(b"abcd") == trigrams(b"ABCD")
+        assert len(trigrams(b"abcd")) == 2
+
+    def test_rebuild(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        assert not index.exists()
+        status = index.rebuild(root_fs)
+        assert status["exists"]
+        assert status["files"] > 0
+        assert index.changes(root_fs)[0] == []
+        (Path(self.root_dir) / "folder" / "new_file").write_text("new")
+        assert index.changes(root_fs)[0] == [("added", "/folder/new_file")]
+        # The status reports the changes found by the last reconciliation, without checking the files
+        assert "added" not in index.status()
+        index.reconcile(root_fs)
+        status = index.status()
+        assert status["reconciled_at"] >= status["built_at"]
+        assert (status["added"], status["modified"], status["removed"]) == (1, 0, 0)
+        assert status["pending"] == 0
+
+    def test_candidates(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        index.rebuild(root_fs)
+        candidates = index.candidates(b"class TestSearchIndex")
+        assert candidates == ["/test_search_index.py"]
+        assert index.candidates(b"ab") is None
+
+    def test_search(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        # The index is built in background, meanwhile the files are walked
+        result = root_fs.search("def test_rebuild", search_context=0)
+        assert {x["path"] for x in result} == {"/test_search_index.py"}
+        index.thread.join()
+        assert index.exists()
+        result = root_fs.search("def test_rebuild", search_context=0)
+        assert {x["path"] for x in result} == {"/test_search_index.py"}
+        result = root_fs.search("def test_rebuild", search_context=0, path="/folder")
+        assert result == []
+        # regex queries don't use the index
+        result = root_fs.search("def test_reb[u]ild", search_context=0)
+        assert {x["path"] for x in result} == {"/test_search_index.py"}
+
+    def test_fs_events(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        index.rebuild(root_fs)
+        token = "unique" + "_token_1"
+        root_fs.write_text("/folder/events", token)
+        assert index.candidates(token.encode()) == ["/folder/events"]
+        root_fs.move("/folder/events", "/folder/moved")
+        assert index.candidates(token.encode()) == ["/folder/moved"]
+        root_fs.copy("/folder/moved", "/copied")
+        assert index.candidates(token.encode()) == ["/copied", "/folder/moved"]
+        root_fs.remove("/folder/moved")
+        root_fs.remove("/copied")
+        assert index.candidates(token.encode()) == []
+        assert index.changes(root_fs)[0] == []
+
+    def test_reconcile(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        index.rebuild(root_fs)
+        token = "unique" + "_token_2"
+        (Path(self.root_dir) / "folder" / "external").write_text(token)
+        (Path(self.root_dir) / "folder" / "1").unlink()
+        assert index.candidates(token.encode()) == []
+        assert index.reconcile(root_fs) == {"added": 1, "modified": 0, "removed": 1}
+        assert index.candidates(token.encode()) == ["/folder/external"]
+        assert index.changes(root_fs)[0] == []
+
+    def test_reconcile_resume(self):
+        conf.set(PLUGIN_NAME, 'search_index_reconcile_max_files', '2')
+        try:
+            root_fs = RootFS()
+            index = get_search_index(root_fs, "/")
+            index.rebuild(root_fs)
+            (Path(self.root_dir) / "zzz_external").write_text("external")
+            (Path(self.root_dir) / "folder" / "1").unlink()
+            result = {"added": 0, "modified": 0, "removed": 0}
+            sweeps = 0
+            while True:
+                for kind, count in index.reconcile(root_fs).items():
+                    result[kind] += count
+                sweeps += 1
+                if index.reconcile_cursor is None:
+                    break
+            assert sweeps > 1
+            assert result == {"added": 1, "modified": 0, "removed": 1}
+            assert index.changes(root_fs)[0] == []
+        finally:
+            conf.set(PLUGIN_NAME, 'search_index_reconcile_max_files', '10000')
+
+    def test_maybe_reconcile(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        index.rebuild(root_fs)
+        token = "unique" + "_token_3"
+        (Path(self.root_dir) / "folder" / "external").write_text(token)
+        index.last_reconcile = 0
+        index.maybe_reconcile(root_fs)
+        index.thread.join()
+        assert index.candidates(token.encode()) == ["/folder/external"]
+
+    def test_fs_events_during_build(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        token = "unique" + "_token_4"
+        find_files = root_fs.find_files
+
+        def walk(*args, **kwargs):
+            yield from find_files(*args, **kwargs)
+            # Write a file after the walk, from another thread: the index lock is not held
+            writer = threading.Thread(target=root_fs.write_text, args=("/during_build", token))
+            writer.start()
+            writer.join(timeout=10)
+            assert not writer.is_alive()
+            assert index.is_building()
+
+        with patch.object(root_fs, "find_files", walk):
+            index.rebuild(root_fs)
+        assert not index.is_building()
+        assert index.candidates(token.encode()) == ["/during_build"]
+        assert index.changes(root_fs)[0] == []
+
+    def test_start_rebuild(self):
+        root_fs = RootFS()
+        index = get_search_index(root_fs, "/")
+        index.start_rebuild(root_fs)
+        index.rebuild_thread.join()
+        status = index.status()
+        assert status["exists"]
+        assert not status["building"]
+        assert status["files"] > 0
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
 
 import contextlib
+import io
 import os
 import os.path
 import shutil
@@ -11,10 +12,15 @@ from unittest import TestCase, mock
 from airflow_code_editor.commons import PLUGIN_DEFAULT_CONFIG, PLUGIN_NAME
 from airflow_code_editor.git import execute_git_command, git_enabled
 from airflow_code_editor.utils import (
+    DummyLexer,
     conf,
+    get_lexer,
     get_plugin_config,
     get_root_folder,
     normalize_path,
+    normalize_text_chunks,
+    ordered_map,
+    read_chunks,
     read_mount_points_config,
 )
 
@@ -48,6 +54,10 @@ class TestUtils(TestCase):
         assert 'root' in mount_points
         assert 'airflow_home' in mount_points
         assert 'logs' in mount_points
+        assert mount_points['logs'].cache is None
+        with mock.patch.dict(os.environ, {"AIRFLOW__CODE_EDITOR__MOUNT2": "name=nocache,path=/tmp,cache=false"}):
+            mount_points = read_mount_points_config()
+            assert mount_points['nocache'].cache is False
 
     def test_normalize_path(self):
         assert normalize_path(None) == ''
@@ -75,6 +85,30 @@ class TestUtils(TestCase):
         assert normalize_path('/aaa') == 'aaa'
         assert normalize_path('aaa') == 'aaa'
 
+    def test_ordered_map(self):
+        items = list(range(100))
+        assert list(ordered_map(lambda x: x * 2, items, workers=1)) == [x * 2 for x in items]
+        assert list(ordered_map(lambda x: x * 2, items, workers=8)) == [x * 2 for x in items]
+        results = ordered_map(lambda x: x * 2, iter(items), workers=4, window=2)
+        assert next(results) == 0
+        results.close()
+
+    def test_normalize_text_chunks(self):
+        def normalize(*chunks):
+            return b"".join(normalize_text_chunks(chunks))
+
+        assert normalize() == b"\n"
+        assert normalize(b"a\r\nb\r", b"\n\r\n  ", b"\t\n") == b"a\nb\n"
+        assert normalize(b"a  ", b"  b") == b"a    b\n"
+        assert normalize("é".encode()[:1], "é".encode()[1:], b"\xff") == "é\n".encode()
+        assert list(read_chunks(io.BytesIO(b"abcde"), 2)) == [b"ab", b"cd", b"e"]
+
+    def test_get_lexer(self):
+        assert get_lexer("/a/b.py") is get_lexer("c.py")
+        assert get_lexer("b.py").name == "Python"
+        assert get_lexer("/a/Makefile").name == "Makefile"
+        assert isinstance(get_lexer("/a/unknown.unknown-ext"), DummyLexer)
+
     def test_invalid_command(self):
         r = execute_git_command(['invalid-command'])
         assert r.returncode != 0